@@ -1,85 +1,313 @@
 
+import json
 import math
+from collections import namedtuple
+from decimal import Decimal
+from fractions import Fraction
+from functools import lru_cache
 
-def decimal_a_binario(numero):
-    """Convierte un número decimal a binario"""
+DIGITOS = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+# Dígitos por hoja en la conversión divide y vencerás de enteros enormes
+DIGITOS_HOJA = 256
+
+def _validar_base(base):
+    if not isinstance(base, int) or not 2 <= base <= 36:
+        raise ValueError(f"La base debe ser un entero entre 2 y 36, no {base}")
+
+def _entero_a_base_simple(numero, base):
+    """Divisiones sucesivas para enteros pequeños (no negativos)"""
     if numero == 0:
         return "0"
+    digitos = []
+    while numero > 0:
+        numero, residuo = divmod(numero, base)
+        digitos.append(DIGITOS[residuo])
+    return "".join(reversed(digitos))
+
+def _potencia(base, exponente, potencias):
+    """base**exponente para exponentes DIGITOS_HOJA * 2^k, calculada por cuadrados y guardada"""
+    if exponente not in potencias:
+        if exponente <= DIGITOS_HOJA:
+            potencias[exponente] = base ** exponente
+        else:
+            mitad = _potencia(base, exponente // 2, potencias)
+            potencias[exponente] = mitad * mitad
+    return potencias[exponente]
+
+def entero_a_base(numero, base):
+    """
+    Convierte un entero (de cualquier tamaño) a la base indicada.
+    Los enteros enormes se parten por la mitad con divmod sobre base^(k*2^i),
+    así 10^5 dígitos se convierten en una fracción de segundo
+    """
+    _validar_base(base)
+    numero = int(numero)
+    if numero < 0:
+        return "-" + entero_a_base(-numero, base)
+    if base in (2, 8, 16):
+        return format(numero, {2: 'b', 8: 'o', 16: 'X'}[base])
     
-    binario = ""
-    temp = int(numero)
+    potencias = {}
+    def convertir(n, digitos, rellenar):
+        # Devuelve n con exactamente 'digitos' cifras si 'rellenar'
+        if digitos <= DIGITOS_HOJA:
+            texto = str(n) if base == 10 else _entero_a_base_simple(n, base)
+            return texto.zfill(digitos) if rellenar else texto
+        mitad = digitos // 2
+        alto, bajo = divmod(n, _potencia(base, mitad, potencias))
+        if alto == 0 and not rellenar:
+            return convertir(bajo, mitad, False)
+        return convertir(alto, mitad, rellenar) + convertir(bajo, mitad, True)
     
-    while temp > 0:
-        residuo = temp % 2
-        binario = str(residuo) + binario
-        temp = temp // 2
+    digitos = DIGITOS_HOJA
+    while _potencia(base, digitos, potencias) <= numero:
+        digitos *= 2
+    return convertir(numero, digitos, False)
+
+def base_a_entero(texto, base):
+    """
+    Interpreta una cadena de dígitos en la base indicada (admite signo).
+    Las cadenas largas se parten en mitades potencia de dos y se recombinan
+    con multiplicaciones, evitando el límite y el costo cuadrático de int()
+    """
+    _validar_base(base)
+    texto = texto.strip().upper().replace("_", "")
+    if texto.startswith("-"):
+        return -base_a_entero(texto[1:], base)
+    if texto.startswith("+"):
+        texto = texto[1:]
+    if not texto or any(c not in DIGITOS[:base] for c in texto):
+        raise ValueError(f"'{texto}' no es un número válido en base {base}")
     
-    return binario
+    potencias = {}
+    def convertir(t):
+        if len(t) <= DIGITOS_HOJA:
+            return int(t, base)
+        bajo = DIGITOS_HOJA
+        while bajo * 2 < len(t):
+            bajo *= 2
+        return convertir(t[:-bajo]) * _potencia(base, bajo, potencias) + convertir(t[-bajo:])
+    return convertir(texto)
 
-def decimal_a_octal(numero):
-    """Convierte un número decimal a octal"""
-    if numero == 0:
-        return "0"
+def fraccion_a_base(fraccion, base, precision=20):
+    """
+    Convierte la parte fraccionaria (0 <= f < 1) por multiplicaciones sucesivas.
+    Devuelve (digitos, periodo, truncado): 'periodo' son las cifras que se repiten
+    indefinidamente y 'truncado' indica que se alcanzó la precisión sin terminar
+    """
+    _validar_base(base)
+    numerador, denominador = fraccion.numerator, fraccion.denominator
+    digitos = []
+    vistos = {}
+    while numerador and len(digitos) < precision:
+        if numerador in vistos:
+            inicio = vistos[numerador]
+            return "".join(digitos[:inicio]), "".join(digitos[inicio:]), False
+        vistos[numerador] = len(digitos)
+        digito, numerador = divmod(numerador * base, denominador)
+        digitos.append(DIGITOS[digito])
+    if numerador and numerador in vistos:
+        inicio = vistos[numerador]
+        return "".join(digitos[:inicio]), "".join(digitos[inicio:]), False
+    return "".join(digitos), "", bool(numerador)
+
+def _a_fraccion(numero, base_origen):
+    """Pasa la entrada (texto en base_origen, int, float, Decimal o Fraction) a Fraction exacta"""
+    if isinstance(numero, Fraction):
+        return numero
+    if isinstance(numero, int):
+        return Fraction(numero)
+    if isinstance(numero, float):
+        # repr() conserva el valor decimal que escribió el usuario (0.1 y no 0.1000000000000000055...)
+        return Fraction(repr(numero))
+    if isinstance(numero, Decimal):
+        return Fraction(numero)
     
-    octal = ""
-    temp = int(numero)
+    texto = str(numero).strip().replace(",", ".")
+    negativo = texto.startswith("-")
+    texto = texto.lstrip("+-")
+    entero, _, fraccion = texto.partition(".")
+    valor = Fraction(base_a_entero(entero or "0", base_origen))
+    if fraccion:
+        valor += Fraction(base_a_entero(fraccion, base_origen), base_origen ** len(fraccion))
+    return -valor if negativo else valor
+
+def complemento_a_dos(numero, ancho):
+    """Patrón de 'ancho' bits del entero en complemento a dos"""
+    numero = int(numero)
+    if not -(1 << (ancho - 1)) <= numero < (1 << (ancho - 1)):
+        raise ValueError(f"{numero} no cabe en {ancho} bits con signo")
+    return numero & ((1 << ancho) - 1)
+
+def convertir_numero(numero, base_destino, base_origen=10, precision=20, ancho=None):
+    """
+    Motor general de conversión entre bases 2 a 36.
     
-    while temp > 0:
-        residuo = temp % 8
-        octal = str(residuo) + octal
-        temp = temp // 8
+    Parámetros:
+    - numero: texto en base_origen (con signo y parte fraccionaria) o int/float/Decimal/Fraction
+    - precision: máximo de cifras fraccionarias; las periódicas se marcan entre paréntesis, 0.(3)
+    - ancho: si se indica, los negativos se escriben en complemento a dos de ese número de bits
+    """
+    _validar_base(base_destino)
+    _validar_base(base_origen)
+    valor = _a_fraccion(numero, base_origen)
+    
+    if ancho is not None:
+        if valor.denominator != 1:
+            raise ValueError("El complemento a dos sólo se aplica a enteros")
+        patron = complemento_a_dos(valor.numerator, ancho)
+        texto = entero_a_base(patron, base_destino)
+        bits_por_digito = math.log2(base_destino)
+        if bits_por_digito.is_integer():
+            texto = texto.zfill(math.ceil(ancho / bits_por_digito))
+        return texto
     
-    return octal
+    signo = "-" if valor < 0 else ""
+    valor = abs(valor)
+    entero = valor.numerator // valor.denominator
+    texto = signo + entero_a_base(entero, base_destino)
+    resto = valor - entero
+    if resto:
+        digitos, periodo, truncado = fraccion_a_base(resto, base_destino, precision)
+        texto += "." + digitos
+        if periodo:
+            texto += f"({periodo})"
+        elif truncado:
+            texto += "..."
+    return texto
+
+def decimal_a_binario(numero):
+    """Convierte un número decimal a binario"""
+    return convertir_numero(numero, 2)
+
+def decimal_a_octal(numero):
+    """Convierte un número decimal a octal"""
+    return convertir_numero(numero, 8)
 
 def decimal_a_hexadecimal(numero):
     """Convierte un número decimal a hexadecimal"""
-    if numero == 0:
-        return "0"
-    
-    hexadecimal = ""
-    temp = int(numero)
-    digitos_hex = "0123456789ABCDEF"
+    return convertir_numero(numero, 16)
+
+# Tabla de consulta para el rango habitual de las hojas de ejercicios
+TAMANO_TABLA = 1 << 12
+_tabla_conversiones = None
+
+def _obtener_tabla():
+    """Construye una sola vez la tabla (binario, octal, hexadecimal) de 0 a TAMANO_TABLA-1"""
+    global _tabla_conversiones
+    tabla = _tabla_conversiones
+    if tabla is None:
+        # Se publica ya completa: otro hilo ve None (y la construye también) o la tabla entera
+        tabla = [(format(i, 'b'), format(i, 'o'), format(i, 'X')) for i in range(TAMANO_TABLA)]
+        _tabla_conversiones = tabla
+    return tabla
+
+def convertir_lote(numeros):
+    """
+    Convierte muchos números decimales a la vez.
+    Acepta cualquier iterable de enteros (o un arreglo de NumPy) y devuelve
+    tres listas paralelas: (binarios, octales, hexadecimales)
+    """
+    if hasattr(numeros, 'tolist'):
+        # Arreglos de NumPy: pasar a enteros de Python de una sola vez
+        numeros = numeros.tolist()
     
-    while temp > 0:
-        residuo = temp % 16
-        hexadecimal = digitos_hex[residuo] + hexadecimal
-        temp = temp // 16
+    tabla = _obtener_tabla()
+    binarios = []
+    octales = []
+    hexadecimales = []
+    for numero in numeros:
+        temp = int(numero)
+        if temp < 0:
+            raise ValueError(f"No se pueden convertir números negativos: {numero}")
+        if temp < TAMANO_TABLA:
+            binario, octal, hexadecimal = tabla[temp]
+        else:
+            # format() trabaja en tiempo lineal para bases potencia de 2,
+            # incluso con enteros de miles de dígitos
+            binario = format(temp, 'b')
+            octal = format(temp, 'o')
+            hexadecimal = format(temp, 'X')
+        binarios.append(binario)
+        octales.append(octal)
+        hexadecimales.append(hexadecimal)
     
-    return hexadecimal
+    return binarios, octales, hexadecimales
 
-def mostrar_proceso_conversion(numero, base, nombre_base):
-    """Muestra el proceso de conversión por divisiones sucesivas"""
-    print(f"\n{'='*50}")
-    print(f"CONVERSIÓN A {nombre_base.upper()} (BASE {base})")
-    print(f"{'='*50}")
-    print(f"Número decimal: {numero}")
-    print(f"\nProceso de divisiones sucesivas:")
-    print(f"{'División':<15} {'Cociente':<15} {'Residuo':<15}")
-    print("-" * 45)
-    
+# Paso de las divisiones sucesivas, guardado como tupla compacta
+PasoDivision = namedtuple("PasoDivision", ["dividendo", "cociente", "residuo"])
+
+def iterar_pasos(numero, base):
+    """Genera perezosamente los pasos (dividendo, cociente, residuo) de las divisiones sucesivas"""
+    _validar_base(base)
     temp = int(numero)
-    divisiones = []
-    
     while temp > 0:
-        cociente = temp // base
-        residuo = temp % base
-        
-        # Para hexadecimal, convertir residuos mayores a 9
-        if base == 16 and residuo > 9:
-            residuo_mostrar = chr(65 + residuo - 10)  # A=10, B=11, etc.
-        else:
-            residuo_mostrar = str(residuo)
-        
-        divisiones.append((temp, cociente, residuo_mostrar))
-        print(f"{temp} ÷ {base:<10} {cociente:<15} {residuo_mostrar:<15}")
+        cociente, residuo = divmod(temp, base)
+        yield PasoDivision(temp, cociente, residuo)
         temp = cociente
-    
-    # Construir resultado leyendo residuos de abajo hacia arriba
-    resultado = "".join([str(d[2]) for d in reversed(divisiones)])
-    print(f"\nResultado (residuos de abajo hacia arriba): {resultado}")
-    print(f"{'='*50}\n")
-    
-    return resultado
+
+@lru_cache(maxsize=256)
+def pasos_conversion(numero, base):
+    """Pasos de la conversión, calculados una sola vez por (número, base)"""
+    return tuple(iterar_pasos(numero, base))
+
+def _resultado_pasos(pasos):
+    """Lee los residuos de abajo hacia arriba"""
+    return "".join(DIGITOS[paso.residuo] for paso in reversed(pasos)) or "0"
+
+def traza_texto(numero, base, nombre_base):
+    """Proceso de conversión como texto (el mismo formato que imprime la hoja de trabajo)"""
+    pasos = pasos_conversion(int(numero), base)
+    lineas = [
+        f"\n{'='*50}",
+        f"CONVERSIÓN A {nombre_base.upper()} (BASE {base})",
+        f"{'='*50}",
+        f"Número decimal: {numero}",
+        f"\nProceso de divisiones sucesivas:",
+        f"{'División':<15} {'Cociente':<15} {'Residuo':<15}",
+        "-" * 45,
+    ]
+    for paso in pasos:
+        lineas.append(f"{paso.dividendo} ÷ {base:<10} {paso.cociente:<15} {DIGITOS[paso.residuo]:<15}")
+    lineas.append(f"\nResultado (residuos de abajo hacia arriba): {_resultado_pasos(pasos)}")
+    lineas.append(f"{'='*50}\n")
+    return "\n".join(lineas)
+
+def traza_dict(numero, base):
+    """Proceso de conversión listo para serializar a JSON"""
+    pasos = pasos_conversion(int(numero), base)
+    return {
+        "numero": int(numero),
+        "base": base,
+        "pasos": [
+            {"dividendo": p.dividendo, "cociente": p.cociente, "residuo": DIGITOS[p.residuo]}
+            for p in pasos
+        ],
+        "resultado": _resultado_pasos(pasos),
+    }
+
+def traza_json(numero, base):
+    return json.dumps(traza_dict(numero, base))
+
+def traza_html(numero, base):
+    """Proceso de conversión como tabla HTML"""
+    pasos = pasos_conversion(int(numero), base)
+    filas = "".join(
+        f"<tr><td>{p.dividendo} ÷ {base}</td><td>{p.cociente}</td><td>{DIGITOS[p.residuo]}</td></tr>"
+        for p in pasos
+    )
+    return (
+        '<table class="proceso-conversion">'
+        "<thead><tr><th>División</th><th>Cociente</th><th>Residuo</th></tr></thead>"
+        f"<tbody>{filas}</tbody>"
+        f'<tfoot><tr><td colspan="3">Resultado: {_resultado_pasos(pasos)}</td></tr></tfoot>'
+        "</table>"
+    )
+
+def mostrar_proceso_conversion(numero, base, nombre_base):
+    """Muestra el proceso de conversión por divisiones sucesivas"""
+    print(traza_texto(numero, base, nombre_base))
+    return _resultado_pasos(pasos_conversion(int(numero), base))
 
 def hoja_principal():
     """Simula la hoja PRINCIPAL de Excel"""
@@ -89,34 +317,37 @@ def hoja_principal():
     
     while True:
         try:
-            numero = float(input("\nIngrese un número decimal (0-1000) o -1 para salir: "))
+            texto = input("\nIngrese un número decimal (admite signo y decimales) o 's' para salir: ").strip()
             
-            if numero == -1:
+            if texto.lower() in ("s", "salir", ""):
                 print("Saliendo...")
                 break
             
-            if numero < 0 or numero > 1000:
-                print("Error: El número debe estar entre 0 y 1000")
-                continue
-            
-            numero_entero = int(numero)
+            valor = _a_fraccion(texto, 10)
             
             # Realizar conversiones
-            binario = decimal_a_binario(numero_entero)
-            octal = decimal_a_octal(numero_entero)
-            hexadecimal = decimal_a_hexadecimal(numero_entero)
+            binario = decimal_a_binario(valor)
+            octal = decimal_a_octal(valor)
+            hexadecimal = decimal_a_hexadecimal(valor)
             
             # Mostrar resultados
             print(f"\n{'='*60}")
             print(f"RESULTADOS DE LA CONVERSIÓN")
             print(f"{'='*60}")
-            print(f"Decimal:        {numero_entero}")
+            print(f"Decimal:        {texto}")
             print(f"Binario:        {binario}")
             print(f"Octal:          {octal}")
             print(f"Hexadecimal:    {hexadecimal}")
+            if valor < 0 and valor.denominator == 1:
+                # Menor ancho múltiplo de 8 que admite el número con signo
+                ancho = 8
+                while not -(1 << (ancho - 1)) <= valor.numerator:
+                    ancho *= 2
+                print(f"Compl. a 2:     {convertir_numero(valor, 2, ancho=ancho)} ({ancho} bits)")
             print(f"{'='*60}")
             
             # Preguntar si desea ver el proceso
+            numero_entero = abs(int(valor))
             ver_proceso = input("\n¿Desea ver el proceso de conversión? (s/n): ").lower()
             if ver_proceso == 's':
                 hoja_trabajo(numero_entero)
@@ -124,6 +355,26 @@ def hoja_principal():
         except ValueError:
             print("Error: Ingrese un número válido")
 
+def hoja_bases():
+    """Conversión entre cualquier par de bases de 2 a 36"""
+    print("\n" + "="*60)
+    print(" "*15 + "CONVERSIÓN ENTRE BASES (2-36)")
+    print("="*60)
+    
+    try:
+        base_origen = int(input("\nBase de origen (2-36): "))
+        base_destino = int(input("Base de destino (2-36): "))
+        texto = input(f"Número en base {base_origen}: ")
+        precision = input("Cifras fraccionarias máximas [20]: ").strip()
+        ancho = input("Ancho en bits para complemento a dos (vacío = con signo -): ").strip()
+        
+        resultado = convertir_numero(texto, base_destino, base_origen,
+                                     precision=int(precision) if precision else 20,
+                                     ancho=int(ancho) if ancho else None)
+        print(f"\n{texto} (base {base_origen}) = {resultado} (base {base_destino})")
+    except ValueError as e:
+        print(f"Error: {e}")
+
 def hoja_trabajo(numero):
     """Simula la hoja HTRABAJO de Excel - Muestra el proceso detallado"""
     print("\n" + "="*60)
@@ -152,6 +403,8 @@ def hoja_prueba():
         (255, "11111111", "377", "FF"),
         (500, "111110100", "764", "1F4"),
         (1000, "1111101000", "1750", "3E8"),
+        (10.625, "1010.101", "12.5", "A.A"),
+        (0.1, "0.0(0011)", "0.0(6314)", "0.1(9)"),
     ]
     
     print(f"\n{'Decimal':<10} {'Binario':<15} {'Octal':<10} {'Hex':<10} {'Estado':<15}")
@@ -187,25 +440,28 @@ def menu_principal():
         print("1. Hoja Principal - Calculadora de Conversiones")
         print("2. Hoja de Trabajo - Ver Proceso Detallado")
         print("3. Hoja de Pruebas - Verificar Casos de Prueba")
-        print("4. Salir")
+        print("4. Conversión entre Bases (2-36)")
+        print("5. Salir")
         print("="*60)
         
-        opcion = input("\nSeleccione una opción (1-4): ")
+        opcion = input("\nSeleccione una opción (1-5): ")
         
         if opcion == "1":
             hoja_principal()
         elif opcion == "2":
             try:
                 numero = int(input("\nIngrese un número decimal para ver su proceso de conversión: "))
-                if 0 <= numero <= 1000:
+                if numero >= 0:
                     hoja_trabajo(numero)
                 else:
-                    print("Error: El número debe estar entre 0 y 1000")
+                    print("Error: El número no puede ser negativo")
             except ValueError:
                 print("Error: Ingrese un número válido")
         elif opcion == "3":
             hoja_prueba()
         elif opcion == "4":
+            hoja_bases()
+        elif opcion == "5":
             print("\n¡Hasta luego!")
             break
         else:
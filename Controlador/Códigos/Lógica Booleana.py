@@ -1,257 +1,738 @@
+import json
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from itertools import islice, product
+from typing import List, Dict, Tuple, Iterable, Iterator, Optional, Set, Union, NamedTuple, BinaryIO
+
+
+# Operadores binarios ordenados de menor a mayor precedencia
+OPERADORES_BINARIOS = ['<-->', '-->', 'v', 'y']
+
+
+def tokenizar(expr: str) -> List[Tuple[str, str]]:
+    """Divide la expresión en tokens (tipo, texto)"""
+    tokens = []
+    i = 0
+    while i < len(expr):
+        char = expr[i]
+        if char.isspace():
+            i += 1
+        elif expr.startswith('<-->', i):
+            tokens.append(('op', '<-->'))
+            i += 4
+        elif expr.startswith('-->', i):
+            tokens.append(('op', '-->'))
+            i += 3
+        elif char in ('y', 'v'):
+            tokens.append(('op', char))
+            i += 1
+        elif char == '~':
+            tokens.append(('no', char))
+            i += 1
+        elif char in '()':
+            tokens.append((char, char))
+            i += 1
+        elif char.isalpha():
+            tokens.append(('var', char))
+            i += 1
+        else:
+            raise ValueError(f"Carácter no válido '{char}' en la posición {i + 1}")
+    return tokens
+
+
+# Precedencia de los operadores binarios (mayor número, más fuerte)
+PRECEDENCIA = {op: i for i, op in enumerate(OPERADORES_BINARIOS)}
+
+
+def _combinar(op: str, a: Tuple, b: Tuple) -> Tuple:
+    """
+    Une dos operandos en un nodo n-ario: las cadenas del mismo operador quedan
+    planas (A y B y C es un solo nodo), así que la profundidad del árbol no
+    crece con la longitud de la cadena
+    """
+    if op == '-->':
+        # Asociatividad derecha: A --> (B --> C) es el nodo ('-->', A, B, C)
+        if b[0] == '-->':
+            return (op, a) + b[1:]
+        return (op, a, b)
+    # y, v y <--> son asociativos
+    izquierda = a[1:] if a[0] == op else (a,)
+    derecha = b[1:] if b[0] == op else (b,)
+    return (op,) + izquierda + derecha
+
+
+class _Parser:
+    """
+    Parser iterativo (shunting-yard) con precedencia:
+    ~  >  y  >  v  >  -->  >  <-->
+    El condicional asocia a la derecha, el resto a la izquierda.
+    El árbol resultante usa tuplas: ('var', nombre), ('~', a), (op, a, b, ...).
+    Al no usar recursión, el anidamiento sólo está limitado por la memoria
+    """
+
+    def __init__(self, tokens: List[Tuple[str, str]]):
+        self.tokens = tokens
+
+    def analizar(self) -> Tuple:
+        if not self.tokens:
+            raise ValueError("La expresión está vacía")
+        operandos: List[Tuple] = []
+        operadores: List[str] = []
+
+        def reducir():
+            op = operadores.pop()
+            if op == '~':
+                a = operandos.pop()
+                # ~~A es A
+                operandos.append(a[1] if a[0] == '~' else ('~', a))
+            else:
+                b = operandos.pop()
+                operandos.append(_combinar(op, operandos.pop(), b))
+
+        espera_operando = True
+        for tipo, texto in self.tokens:
+            if espera_operando:
+                if tipo == 'var':
+                    operandos.append(('var', texto))
+                    espera_operando = False
+                elif tipo == 'no':
+                    operadores.append('~')
+                elif tipo == '(':
+                    operadores.append('(')
+                else:
+                    raise ValueError(f"Token inesperado '{texto}'")
+            elif tipo == 'op':
+                precedencia = PRECEDENCIA[texto]
+                while operadores and operadores[-1] != '(':
+                    tope = operadores[-1]
+                    if tope != '~' and (PRECEDENCIA[tope] < precedencia or
+                                        PRECEDENCIA[tope] == precedencia and texto == '-->'):
+                        break
+                    reducir()
+                operadores.append(texto)
+                espera_operando = True
+            elif tipo == ')':
+                while operadores and operadores[-1] != '(':
+                    reducir()
+                if not operadores:
+                    raise ValueError(f"Token inesperado '{texto}'")
+                operadores.pop()
+            else:
+                raise ValueError(f"Token inesperado '{texto}'")
+        if espera_operando:
+            raise ValueError("La expresión termina de forma inesperada")
+        while operadores:
+            if operadores[-1] == '(':
+                raise ValueError("Falta cerrar un paréntesis")
+            reducir()
+        return operandos[0]
+
+
+# Paréntesis anidados antes de guardar un subárbol en un temporal, y operandos
+# por cadena antes de partirla: el compilador de Python no admite más de 200
+# niveles de paréntesis ni cadenas de operadores de profundidad arbitraria
+LIMITE_ANIDAMIENTO = 32
+LIMITE_CADENA = 64
+
+# Valor intermedio de la generación de código: (texto, profundidad de paréntesis)
+Codigo = Tuple[str, int]
+
+
+def _operacion_python(tipo: str, a: List[Codigo], unir) -> Codigo:
+    if tipo == '~':
+        return f"not {a[0][0]}", a[0][1]
+    if tipo == 'y':
+        return unir(' and ', a)
+    if tipo == 'v':
+        return unir(' or ', a)
+    if tipo == '-->':
+        premisa, p = unir(' and ', a[:-1])
+        return f"not ({premisa}) or {a[-1][0]}", max(p + 1, a[-1][1])
+    # A1 <--> ... <--> An es la paridad de los operandos, negada si n es par
+    paridad, p = unir(' ^ ', a)
+    return (f"not ({paridad})", p + 1) if len(a) % 2 == 0 else (paridad, p)
+
+
+def _operacion_bits(tipo: str, a: List[Codigo], unir) -> Codigo:
+    if tipo == '~':
+        return f"M ^ {a[0][0]}", a[0][1]
+    if tipo == 'y':
+        return unir(' & ', a)
+    if tipo == 'v':
+        return unir(' | ', a)
+    if tipo == '-->':
+        premisa, p = unir(' & ', a[:-1])
+        return f"(M ^ ({premisa})) | {a[-1][0]}", max(p + 2, a[-1][1])
+    paridad, p = unir(' ^ ', a)
+    return (f"M ^ ({paridad})", p + 1) if len(a) % 2 == 0 else (paridad, p)
+
+
+def _generar_funcion(arbol: Tuple, parametros: str, hoja, operacion) -> str:
+    """
+    Traduce el árbol a una función Python recorriéndolo sin recursión. Los
+    subárboles se escriben en línea, como una sola expresión; sólo cuando la
+    expresión anidaría demasiados paréntesis (o una cadena es muy larga) el
+    subárbol pasa a una variable temporal
+    """
+    lineas: List[str] = []
+
+    def temporal(texto: str) -> Codigo:
+        nombre = f"t{len(lineas)}"
+        lineas.append(f"    {nombre} = {texto}\n")
+        return nombre, 0
+
+    def unir(separador: str, operandos: List[Codigo]) -> Codigo:
+        while len(operandos) > LIMITE_CADENA:
+            operandos = [temporal(separador.join(texto for texto, _ in operandos[i:i + LIMITE_CADENA]))
+                         for i in range(0, len(operandos), LIMITE_CADENA)]
+        return separador.join(texto for texto, _ in operandos), max(p for _, p in operandos)
+
+    valores: List[Codigo] = []
+    pendientes = [(arbol, False)]
+    while pendientes:
+        nodo, visitado = pendientes.pop()
+        if nodo[0] == 'var':
+            valores.append((hoja(nodo[1]), 0))
+        elif not visitado:
+            pendientes.append((nodo, True))
+            pendientes.extend((hijo, False) for hijo in reversed(nodo[1:]))
+        else:
+            n = len(nodo) - 1
+            # Los operandos compuestos van entre paréntesis
+            operandos = [(texto, p) if nodo_hijo[0] == 'var' or texto.isidentifier() else (f"({texto})", p + 1)
+                         for (texto, p), nodo_hijo in zip(valores[-n:], nodo[1:])]
+            del valores[-n:]
+            texto, p = operacion(nodo[0], operandos, unir)
+            valores.append(temporal(texto) if p >= LIMITE_ANIDAMIENTO else (texto, p))
+    return f"def f({parametros}):\n" + ''.join(lineas) + f"    return {valores[0][0]}\n"
+
+
+def _compilar(fuente: str, nombre: str):
+    espacio: Dict = {'__builtins__': {}}
+    exec(compile(fuente, nombre, 'exec'), espacio)
+    return espacio['f']
+
+
+@lru_cache(maxsize=8)
+def columnas_bits(n_vars: int) -> Tuple[int, ...]:
+    """
+    Devuelve una máscara de 2^n bits por variable: el bit r vale 1 si la
+    variable es verdadera en la fila r de la tabla (la primera variable
+    es la más significativa, igual que en itertools.product)
+    """
+    filas = 1 << n_vars
+    columnas = []
+    for i in range(n_vars):
+        bloque = 1 << (n_vars - 1 - i)
+        # Patrón 0...01...1 de un periodo, replicado duplicando su ancho
+        patron = ((1 << bloque) - 1) << bloque
+        ancho = 2 * bloque
+        while ancho < filas:
+            patron |= patron << ancho
+            ancho *= 2
+        columnas.append(patron)
+    return tuple(columnas)
+
+
+def bits_a_lista(bits: int, filas: int) -> List[bool]:
+    """Convierte una máscara de resultados en la lista de booleanos por fila"""
+    return [c == '1' for c in format(bits, f'0{filas}b')[::-1]]
+
+
+def minterminos_de_bloques(bloques: Iterable[Tuple[int, int, int]]) -> int:
+    """Reúne en una sola máscara los bloques (inicio, cantidad, bits) de un flujo"""
+    on = 0
+    for inicio, _, bits in bloques:
+        on |= bits << inicio
+    return on
+
+
+def lista_a_bits(resultados: Iterable[bool]) -> int:
+    """Convierte la lista de resultados por fila en una máscara de bits"""
+    # Un solo int(..., 2): con |= 1 << i por fila cada paso copia la máscara entera
+    cifras = ''.join(['1' if r else '0' for r in resultados])
+    return int(cifras[::-1] or '0', 2)
+
+
+# ============================================
+# MINIMIZACIÓN (QUINE-MCCLUSKEY / ESPRESSO)
+# ============================================
+
+# A partir de este número de variables se usa la heurística tipo Espresso
+UMBRAL_ESPRESSO = 10
+# Tamaño máximo de la tabla de Petrick antes de recurrir a la cobertura voraz
+LIMITE_PETRICK = 256
+
+
+class Implicante(NamedTuple):
+    """
+    Término producto sobre el índice de fila: los bits de 'mascara' son
+    variables eliminadas y 'valor' fija el resto (bit n-1 = primera variable)
+    """
+    valor: int
+    mascara: int
+
+    def literales(self, variables: List[str]) -> List[Tuple[str, bool]]:
+        """Devuelve (variable, afirmada) para cada variable que aparece en el término"""
+        n_vars = len(variables)
+        resultado = []
+        for i, var in enumerate(variables):
+            bit = 1 << (n_vars - 1 - i)
+            if not self.mascara & bit:
+                resultado.append((var, bool(self.valor & bit)))
+        return resultado
+
+    def a_texto(self, variables: List[str]) -> str:
+        """Escribe el término con la notación de la calculadora"""
+        literales = [var if afirmada else f'~{var}'
+                     for var, afirmada in self.literales(variables)]
+        if not literales:
+            return "1"
+        if len(literales) == 1:
+            return literales[0]
+        return '(' + ' y '.join(literales) + ')'
+
+
+def _minterminos_de(imp: Implicante) -> List[int]:
+    """Enumera los mintérminos que cubre un implicante"""
+    resultado = [imp.valor]
+    libres = imp.mascara
+    while libres:
+        bit = libres & -libres
+        libres ^= bit
+        resultado += [m | bit for m in resultado]
+    return resultado
+
+
+def implicantes_primos(minterminos: Iterable[int], n_vars: int) -> List[Implicante]:
+    """
+    Primera fase de Quine-McCluskey: agrupa por número de unos y combina
+    implicantes de grupos vecinos que difieren en un solo bit
+    """
+    todos = (1 << n_vars) - 1
+    actuales = {Implicante(m, 0) for m in minterminos}
+    primos = set()
+    while actuales:
+        grupos: Dict[Tuple[int, int], Set[int]] = {}
+        for imp in actuales:
+            grupos.setdefault((imp.mascara, imp.valor.bit_count()), set()).add(imp.valor)
+        siguientes = set()
+        combinados = set()
+        for (mascara, unos), valores in grupos.items():
+            vecinos = grupos.get((mascara, unos + 1))
+            if not vecinos:
+                continue
+            for valor in valores:
+                libres = todos & ~(valor | mascara)
+                while libres:
+                    bit = libres & -libres
+                    libres ^= bit
+                    if valor | bit in vecinos:
+                        siguientes.add(Implicante(valor, mascara | bit))
+                        combinados.add(Implicante(valor, mascara))
+                        combinados.add(Implicante(valor | bit, mascara))
+        primos.update(actuales - combinados)
+        actuales = siguientes
+    return sorted(primos, key=lambda imp: (-imp.mascara.bit_count(), imp.valor))
+
+
+def _petrick(pendientes: Set[int], cubre: Dict[Implicante, Set[int]]) -> Optional[List[Implicante]]:
+    """Método de Petrick; devuelve None si el producto crece demasiado"""
+    productos = {frozenset()}
+    for m in sorted(pendientes):
+        opciones = [imp for imp, cubiertos in cubre.items() if m in cubiertos]
+        nuevos = {p | {imp} for p in productos for imp in opciones}
+        # Absorción: X + XY = X
+        minimos = sorted(nuevos, key=len)
+        productos = set()
+        for p in minimos:
+            if not any(q <= p for q in productos):
+                productos.add(p)
+        if len(productos) > LIMITE_PETRICK:
+            return None
+    # Menos términos primero y, a igualdad, menos literales
+    mejor = min(productos, key=lambda p: (len(p), -sum(imp.mascara.bit_count() for imp in p), sorted(p)))
+    return sorted(mejor, key=lambda imp: (-imp.mascara.bit_count(), imp.valor))
+
+
+def _cobertura_voraz(pendientes: Set[int], cubre: Dict[Implicante, Set[int]]) -> List[Implicante]:
+    """Elige en cada paso el implicante que cubre más mintérminos pendientes"""
+    elegidos = []
+    pendientes = set(pendientes)
+    while pendientes:
+        imp = max(cubre, key=lambda p: (len(cubre[p] & pendientes), p.mascara.bit_count(), -p.valor))
+        elegidos.append(imp)
+        pendientes -= cubre[imp]
+    return elegidos
+
+
+def quine_mccluskey(minterminos: Iterable[int], indiferentes: Iterable[int],
+                    n_vars: int) -> List[Implicante]:
+    """Minimización exacta: primos, esenciales y Petrick (o voraz si es muy grande)"""
+    minterminos = set(minterminos)
+    primos = implicantes_primos(minterminos | set(indiferentes), n_vars)
+    cubre = {imp: set(_minterminos_de(imp)) & minterminos for imp in primos}
+    cubre = {imp: cubiertos for imp, cubiertos in cubre.items() if cubiertos}
+
+    # Implicantes primos esenciales
+    elegidos = []
+    for m in minterminos:
+        opciones = [imp for imp, cubiertos in cubre.items() if m in cubiertos]
+        if len(opciones) == 1 and opciones[0] not in elegidos:
+            elegidos.append(opciones[0])
+    pendientes = set(minterminos)
+    for imp in elegidos:
+        pendientes -= cubre[imp]
+    if not pendientes:
+        return sorted(elegidos, key=lambda imp: (-imp.mascara.bit_count(), imp.valor))
+
+    restantes = {imp: cubiertos & pendientes for imp, cubiertos in cubre.items()
+                 if imp not in elegidos and cubiertos & pendientes}
+    resto = _petrick(pendientes, restantes)
+    if resto is None:
+        resto = _cobertura_voraz(pendientes, restantes)
+    return sorted(elegidos + resto, key=lambda imp: (-imp.mascara.bit_count(), imp.valor))
+
+
+def espresso(on: int, dc: int, n_vars: int) -> List[Implicante]:
+    """
+    Heurística tipo Espresso sobre máscaras de filas: EXPAND de cada
+    mintérmino no cubierto mientras no toque el conjunto OFF, seguido de
+    IRREDUNDANT para quitar cubos cubiertos por los demás
+    """
+    todas = (1 << (1 << n_vars)) - 1
+    off = todas & ~(on | dc)
+    cubos = []
+    restante = on
+    while restante:
+        m = (restante & -restante).bit_length() - 1
+        valor, mascara, bits = m, 0, 1 << m
+        for i in range(n_vars):
+            bit = 1 << (n_vars - 1 - i)
+            # Cambiar la variable i equivale a desplazar la fila 2^(n-1-i) posiciones
+            if valor & bit:
+                nuevo = bits | (bits >> bit)
+            else:
+                nuevo = bits | (bits << bit)
+            if not nuevo & off:
+                bits = nuevo
+                mascara |= bit
+                valor &= ~bit
+        cubos.append((Implicante(valor, mascara), bits))
+        restante &= ~bits
+
+    # IRREDUNDANT: quitar (de menor a mayor) los cubos cuyos mintérminos ON
+    # siguen cubiertos por algún otro cubo
+    filas_on = format(on, f'0{1 << n_vars}b')[::-1]
+    cobertura = [0] * (1 << n_vars)
+    minterminos = []
+    for imp, bits in cubos:
+        propios = [m for m in _minterminos_de(imp) if filas_on[m] == '1']
+        minterminos.append(propios)
+        for m in propios:
+            cobertura[m] += 1
+    conservados = []
+    orden = sorted(range(len(cubos)), key=lambda k: cubos[k][0].mascara.bit_count())
+    for k in orden:
+        if all(cobertura[m] > 1 for m in minterminos[k]):
+            for m in minterminos[k]:
+                cobertura[m] -= 1
+        else:
+            conservados.append(cubos[k])
+    cubos = conservados
+    return sorted((imp for imp, _ in cubos), key=lambda imp: (-imp.mascara.bit_count(), imp.valor))
+
+
+# ============================================
+# MAPAS DE KARNAUGH
+# ============================================
+
+def _gray(i: int) -> int:
+    return i ^ (i >> 1)
+
+
+@lru_cache(maxsize=32)
+def _estructura_karnaugh(n_vars: int) -> Tuple[int, Tuple[str, ...], Tuple[str, ...], Tuple[int, ...]]:
+    """
+    Calcula una sola vez por número de variables la división filas/columnas,
+    las etiquetas en código Gray y la permutación celda -> fila de la tabla
+    """
+    n_filas = max(1, n_vars // 2) if n_vars else 0
+    n_columnas = n_vars - n_filas
+    etiquetas_filas = tuple(format(_gray(r), f'0{n_filas}b') if n_filas else '' for r in range(1 << n_filas))
+    etiquetas_columnas = tuple(format(_gray(c), f'0{n_columnas}b') if n_columnas else ''
+                               for c in range(1 << n_columnas))
+    permutacion = tuple((_gray(r) << n_columnas) | _gray(c)
+                        for r in range(1 << n_filas) for c in range(1 << n_columnas))
+    return n_filas, etiquetas_filas, etiquetas_columnas, permutacion
+
+
+class MapaKarnaugh(NamedTuple):
+    """
+    Rejilla de Karnaugh independiente de los nombres de las variables: las
+    primeras 'n_filas' variables van en las filas y el resto en las columnas.
+    El bit k de 'celdas' es el valor de la celda k (fila a fila)
+    """
+    n_filas: int
+    etiquetas_filas: Tuple[str, ...]
+    etiquetas_columnas: Tuple[str, ...]
+    celdas: int
+
+    def filas(self) -> List[str]:
+        """Valores de cada fila como cadenas de '0'/'1'"""
+        ancho = len(self.etiquetas_columnas)
+        todas = format(self.celdas, f'0{ancho * len(self.etiquetas_filas)}b')[::-1]
+        return [todas[i:i + ancho] for i in range(0, len(todas), ancho)]
+
+    def a_texto(self, variables: List[str]) -> str:
+        """Dibuja el mapa en ASCII"""
+        vars_filas = ''.join(variables[:self.n_filas])
+        vars_columnas = ''.join(variables[self.n_filas:])
+        ancho_fila = max(len(self.etiquetas_filas[0]), len(vars_filas), 1)
+        ancho_celda = max(len(self.etiquetas_columnas[0]), 1)
+        cuerpo = len(self.etiquetas_columnas) * (ancho_celda + 1) - 1
+        margen = ' ' * (2 + ancho_fila + 3)
+        lineas = [f"\nMapa de Karnaugh ({len(variables)} variable{'s' if len(variables) != 1 else ''}):"]
+        if vars_columnas:
+            lineas.append(margen + vars_columnas)
+            lineas.append(margen + ' '.join(e.center(ancho_celda) for e in self.etiquetas_columnas))
+        lineas.append(f"  {vars_filas.ljust(ancho_fila)} ┌{'─' * (cuerpo + 2)}┐")
+        for etiqueta, fila in zip(self.etiquetas_filas, self.filas()):
+            valores = ' '.join(v.center(ancho_celda) for v in fila)
+            lineas.append(f"  {etiqueta.ljust(ancho_fila)} │ {valores} │")
+        lineas.append(f"  {' ' * ancho_fila} └{'─' * (cuerpo + 2)}┘")
+        return '\n'.join(lineas) + '\n'
+
+    def a_dict(self, variables: List[str]) -> Dict:
+        """Representación lista para JSON"""
+        return {
+            'variables_filas': list(variables[:self.n_filas]),
+            'variables_columnas': list(variables[self.n_filas:]),
+            'etiquetas_filas': list(self.etiquetas_filas),
+            'etiquetas_columnas': list(self.etiquetas_columnas),
+            'celdas': [[int(v) for v in fila] for fila in self.filas()],
+        }
+
+    def a_json(self, variables: List[str]) -> str:
+        return json.dumps(self.a_dict(variables))
+
+    def a_html(self, variables: List[str]) -> str:
+        """Tabla HTML con etiquetas Gray en encabezados"""
+        esquina = f"{''.join(variables[:self.n_filas])} \\ {''.join(variables[self.n_filas:])}"
+        partes = ['<table class="karnaugh">', '<thead><tr>', f'<th>{esquina}</th>']
+        partes += [f'<th>{e}</th>' for e in self.etiquetas_columnas]
+        partes.append('</tr></thead><tbody>')
+        for etiqueta, fila in zip(self.etiquetas_filas, self.filas()):
+            celdas = ''.join(f'<td class="v{v}">{v}</td>' for v in fila)
+            partes.append(f'<tr><th>{etiqueta}</th>{celdas}</tr>')
+        partes.append('</tbody></table>')
+        return ''.join(partes)
+
+
+def mapa_karnaugh(resultados: int, n_vars: int) -> MapaKarnaugh:
+    """Reordena la máscara de resultados según la permutación Gray del mapa"""
+    n_filas, etiquetas_filas, etiquetas_columnas, permutacion = _estructura_karnaugh(n_vars)
+    filas_tabla = format(resultados, f'0{1 << n_vars}b')[::-1]
+    celdas = ''.join(map(filas_tabla.__getitem__, permutacion))
+    return MapaKarnaugh(n_filas, etiquetas_filas, etiquetas_columnas, int(celdas[::-1], 2))
+
+
+def terminos_a_texto(terminos: List[Implicante], variables: List[str]) -> str:
+    """Escribe una suma de productos con la notación de la calculadora"""
+    if not terminos:
+        return "0"
+    return ' v '.join(imp.a_texto(variables) for imp in terminos)
 
-import re
-from itertools import product
-from typing import List, Dict, Tuple
 
 class CalculadoraBooleana:
-    def __init__(self, expresion: str):
+    # 'bits' evalúa todas las filas a la vez; 'filas' es la referencia fila por fila
+    MOTORES = ('bits', 'filas')
+
+    def __init__(self, expresion: str, motor: str = 'bits'):
+        if motor not in self.MOTORES:
+            raise ValueError(f"Motor desconocido '{motor}'. Opciones: {', '.join(self.MOTORES)}")
         self.expresion_original = expresion
-        self.variables = self._identificar_variables(expresion)
+        self.motor = motor
+        self.tokens = tokenizar(expresion)
+        self.variables = self._identificar_variables(self.tokens)
         self.n_vars = len(self.variables)
+        self._indices = {var: i for i, var in enumerate(self.variables)}
+        # Compilar una sola vez: cada fila se evalúa sin trabajo sobre cadenas
+        try:
+            self.arbol = _Parser(self.tokens).analizar()
+            indices = self._indices
+            self._funcion = _compilar(
+                _generar_funcion(self.arbol, 'v', lambda var: f"v[{indices[var]}]", _operacion_python),
+                '<expresion booleana>')
+            self._funcion_bits = _compilar(
+                _generar_funcion(self.arbol, 'c, M', lambda var: f"c[{indices[var]}]", _operacion_bits),
+                '<expresion booleana (bits)>')
+        except (SyntaxError, RecursionError, MemoryError) as e:
+            raise ValueError(f"La expresión es demasiado compleja: {e}") from None
         
-    def _identificar_variables(self, expr: str) -> List[str]:
+    def _identificar_variables(self, tokens: List[Tuple[str, str]]) -> List[str]:
         """Identifica todas las variables en la expresión"""
-        # Buscar letras que no sean operadores
-        variables = set()
-        i = 0
-        while i < len(expr):
-            if expr[i].isalpha() and expr[i] not in ['y', 'v']:
-                variables.add(expr[i])
-            i += 1
-        return sorted(list(variables))
-    
-    def _reemplazar_variables(self, expr: str, valores: Dict[str, bool]) -> str:
-        """Reemplaza variables por sus valores"""
-        resultado = ""
-        i = 0
-        while i < len(expr):
-            char = expr[i]
-            if char in self.variables:
-                resultado += "True" if valores[char] else "False"
-            else:
-                resultado += char
-            i += 1
-        return resultado
+        return sorted({texto for tipo, texto in tokens if tipo == 'var'})
     
     def _evaluar(self, valores: Dict[str, bool]) -> bool:
         """Evalúa la expresión con los valores dados"""
-        expr = self.expresion_original.replace(' ', '')
-        
-        # Paso 1: Reemplazar variables por valores
-        expr = self._reemplazar_variables(expr, valores)
-        
-        # Paso 2: Procesar NOT (~)
-        while '~True' in expr or '~False' in expr:
-            expr = expr.replace('~True', 'False')
-            expr = expr.replace('~False', 'True')
-        
-        # Paso 3: Convertir operadores a Python
-        # Reemplazar operadores en orden correcto
-        expr = expr.replace('y', ' and ')
-        expr = expr.replace('v', ' or ')
-        
-        # Paso 4: Manejar condicionales
-        # A --> B = (not A) or B
-        while '-->' in expr:
-            # Buscar patrones simples primero
-            pattern = r'(True|False)\s*-->\s*(True|False)'
-            match = re.search(pattern, expr)
-            if match:
-                a_str, b_str = match.groups()
-                a = (a_str == 'True')
-                b = (b_str == 'True')
-                resultado = (not a) or b
-                expr = expr[:match.start()] + str(resultado) + expr[match.end():]
-            else:
-                # Si no hay patrón simple, buscar con paréntesis
-                pattern = r'\((True|False)\)\s*-->\s*\((True|False)\)'
-                match = re.search(pattern, expr)
-                if match:
-                    a_str, b_str = match.groups()
-                    a = (a_str == 'True')
-                    b = (b_str == 'True')
-                    resultado = (not a) or b
-                    expr = expr[:match.start()] + str(resultado) + expr[match.end():]
-                else:
-                    break
-        
-        # Paso 5: Manejar bicondicionales
-        # A <--> B = (A and B) or (not A and not B)
-        while '<-->' in expr:
-            pattern = r'(True|False)\s*<-->\s*(True|False)'
-            match = re.search(pattern, expr)
-            if match:
-                a_str, b_str = match.groups()
-                a = (a_str == 'True')
-                b = (b_str == 'True')
-                resultado = (a == b)
-                expr = expr[:match.start()] + str(resultado) + expr[match.end():]
-            else:
-                pattern = r'\((True|False)\)\s*<-->\s*\((True|False)\)'
-                match = re.search(pattern, expr)
-                if match:
-                    a_str, b_str = match.groups()
-                    a = (a_str == 'True')
-                    b = (b_str == 'True')
-                    resultado = (a == b)
-                    expr = expr[:match.start()] + str(resultado) + expr[match.end():]
-                else:
-                    break
-        
-        # Paso 6: Evaluar expresión Python
-        try:
-            resultado = eval(expr)
-            return bool(resultado)
-        except Exception as e:
-            print(f"Error evaluando: {expr}")
-            print(f"Error: {e}")
-            return False
+        return bool(self._funcion(tuple(valores[var] for var in self.variables)))
+    
+    def evaluar_bits(self) -> int:
+        """Evalúa las 2^n filas a la vez; el bit r del resultado es la fila r"""
+        mascara = (1 << (1 << self.n_vars)) - 1
+        return self._funcion_bits(columnas_bits(self.n_vars), mascara)
     
     def generar_tabla_verdad(self) -> Tuple[List[List], List[bool]]:
         """Genera la tabla de verdad completa"""
+        if self.motor == 'bits':
+            resultados = bits_a_lista(self.evaluar_bits(), 1 << self.n_vars)
+            combinaciones = product([False, True], repeat=self.n_vars)
+            tabla = [list(comb) + [r] for comb, r in zip(combinaciones, resultados)]
+            return tabla, resultados
+        
         combinaciones = list(product([False, True], repeat=self.n_vars))
         resultados = []
         
         tabla = []
+        funcion = self._funcion
         for comb in combinaciones:
-            valores = dict(zip(self.variables, comb))
-            resultado = self._evaluar(valores)
+            resultado = bool(funcion(comb))
             fila = list(comb) + [resultado]
             tabla.append(fila)
             resultados.append(resultado)
         
         return tabla, resultados
     
-    def generar_mapa_karnaugh(self, resultados: List[bool]) -> str:
-        """Genera el mapa de Karnaugh según el número de variables"""
-        if self.n_vars <= 1:
-            return self._karnaugh_1var(resultados)
-        elif self.n_vars == 2:
-            return self._karnaugh_2var(resultados)
-        elif self.n_vars == 3:
-            return self._karnaugh_3var(resultados)
-        elif self.n_vars == 4:
-            return self._karnaugh_4var(resultados)
-        elif self.n_vars == 5:
-            return self._karnaugh_5var(resultados)
-        else:
-            return "Mapa de Karnaugh no disponible para más de 5 variables"
-    
-    def _karnaugh_1var(self, res: List[bool]) -> str:
-        v = self.variables[0]
-        return f"""
-Mapa de Karnaugh (1 variable):
-     {v}
-  0 | {int(res[0])}
-  1 | {int(res[1])}
-"""
-    
-    def _karnaugh_2var(self, res: List[bool]) -> str:
-        v1, v2 = self.variables
-        return f"""
-Mapa de Karnaugh (2 variables):
-        {v2}
-      0  1
-  {v1} ┌─────┐
-  0 │ {int(res[0])} {int(res[1])} │
-  1 │ {int(res[2])} {int(res[3])} │
-    └─────┘
-"""
+    def comparar_motores(self) -> bool:
+        """Verifica que el motor por bits coincide con la evaluación fila por fila"""
+        funcion = self._funcion
+        esperado = [bool(funcion(comb)) for comb in product([False, True], repeat=self.n_vars)]
+        return bits_a_lista(self.evaluar_bits(), 1 << self.n_vars) == esperado
     
-    def _karnaugh_3var(self, res: List[bool]) -> str:
-        v1, v2, v3 = self.variables
-        # Orden Gray para columnas: 00, 01, 11, 10
-        indices = [0, 1, 3, 2, 4, 5, 7, 6]
-        valores = [res[i] for i in indices]
-        return f"""
-Mapa de Karnaugh (3 variables):
-           {v2}{v3}
-        00 01 11 10
-  {v1} ┌──────────┐
-  0 │ {int(valores[0])}  {int(valores[1])}  {int(valores[2])}  {int(valores[3])} │
-  1 │ {int(valores[4])}  {int(valores[5])}  {int(valores[6])}  {int(valores[7])} │
-    └──────────┘
-"""
+    def iterar_bloques(self, filas_por_bloque: int = 1 << 16) -> Iterator[Tuple[int, int, int]]:
+        """
+        Genera la tabla por bloques empaquetados (inicio, cantidad, bits) sin
+        guardarla completa: el bit j de 'bits' es el resultado de la fila inicio+j
+        """
+        k = min(self.n_vars, max(filas_por_bloque, 1).bit_length() - 1)
+        cantidad = 1 << k
+        mascara = (1 << cantidad) - 1
+        # Las últimas k variables repiten el mismo patrón en cada bloque;
+        # las primeras n-k son constantes dentro del bloque
+        internas = list(columnas_bits(k))
+        externas = self.n_vars - k
+        combinaciones = product([False, True], repeat=self.n_vars)
+        for inicio in range(0, 1 << self.n_vars, cantidad):
+            if self.motor == 'filas':
+                bits = 0
+                for j, comb in enumerate(islice(combinaciones, cantidad)):
+                    if self._funcion(comb):
+                        bits |= 1 << j
+            else:
+                fila_bloque = inicio >> k
+                columnas = [mascara if fila_bloque >> (externas - 1 - i) & 1 else 0
+                            for i in range(externas)] + internas
+                bits = self._funcion_bits(columnas, mascara)
+            yield inicio, cantidad, bits
     
-    def _karnaugh_4var(self, res: List[bool]) -> str:
-        v1, v2, v3, v4 = self.variables
-        # Orden Gray para filas y columnas
-        indices = [
-            0, 1, 3, 2,
-            4, 5, 7, 6,
-            12, 13, 15, 14,
-            8, 9, 11, 10
-        ]
-        valores = [res[i] for i in indices]
-        return f"""
-Mapa de Karnaugh (4 variables):
-            {v3}{v4}
-         00 01 11 10
-  {v1}{v2} ┌──────────┐
-  00 │ {int(valores[0])}  {int(valores[1])}  {int(valores[2])}  {int(valores[3])} │
-  01 │ {int(valores[4])}  {int(valores[5])}  {int(valores[6])}  {int(valores[7])} │
-  11 │ {int(valores[8])}  {int(valores[9])}  {int(valores[10])}  {int(valores[11])} │
-  10 │ {int(valores[12])}  {int(valores[13])}  {int(valores[14])}  {int(valores[15])} │
-     └──────────┘
-"""
+    def iterar_filas(self, filas_por_bloque: int = 1 << 16) -> Iterator[Tuple[bool, ...]]:
+        """Genera las filas (valores..., resultado) de forma perezosa"""
+        combinaciones = product([False, True], repeat=self.n_vars)
+        for _, cantidad, bits in self.iterar_bloques(filas_por_bloque):
+            for comb, r in zip(islice(combinaciones, cantidad), format(bits, f'0{cantidad}b')[::-1]):
+                yield comb + (r == '1',)
     
-    def _karnaugh_5var(self, res: List[bool]) -> str:
-        v1, v2, v3, v4, v5 = self.variables
-        # Dos mapas de 4x4 para 5 variables
-        indices_0 = [0, 1, 3, 2, 4, 5, 7, 6, 12, 13, 15, 14, 8, 9, 11, 10]
-        indices_1 = [16, 17, 19, 18, 20, 21, 23, 22, 28, 29, 31, 30, 24, 25, 27, 26]
+    def escribir_tabla(self, destino: Union[str, BinaryIO], formato: str = 'csv',
+                       filas_por_bloque: int = 1 << 12) -> int:
+        """
+        Escribe la tabla de verdad en CSV o NDJSON con memoria constante
         
-        valores_0 = [res[i] for i in indices_0]
-        valores_1 = [res[i] for i in indices_1]
+        Parámetros:
+        - destino: ruta de archivo o flujo binario (archivo abierto en 'wb', wfile de HTTP, ...)
+        - formato: 'csv' o 'ndjson'
+        - filas_por_bloque: filas que se evalúan y escriben en cada escritura
         
-        return f"""
-Mapa de Karnaugh (5 variables):
-
-{v1}=0           {v3}{v4}
-         00 01 11 10
-  {v2}{v5} ┌──────────┐
-  00 │ {int(valores_0[0])}  {int(valores_0[1])}  {int(valores_0[2])}  {int(valores_0[3])} │
-  01 │ {int(valores_0[4])}  {int(valores_0[5])}  {int(valores_0[6])}  {int(valores_0[7])} │
-  11 │ {int(valores_0[8])}  {int(valores_0[9])}  {int(valores_0[10])}  {int(valores_0[11])} │
-  10 │ {int(valores_0[12])}  {int(valores_0[13])}  {int(valores_0[14])}  {int(valores_0[15])} │
-     └──────────┘
-
-{v1}=1           {v3}{v4}
-         00 01 11 10
-  {v2}{v5} ┌──────────┐
-  00 │ {int(valores_1[0])}  {int(valores_1[1])}  {int(valores_1[2])}  {int(valores_1[3])} │
-  01 │ {int(valores_1[4])}  {int(valores_1[5])}  {int(valores_1[6])}  {int(valores_1[7])} │
-  11 │ {int(valores_1[8])}  {int(valores_1[9])}  {int(valores_1[10])}  {int(valores_1[11])} │
-  10 │ {int(valores_1[12])}  {int(valores_1[13])}  {int(valores_1[14])}  {int(valores_1[15])} │
-     └──────────┘
-"""
-    
-    def simplificar_quine_mccluskey(self, resultados: List[bool]) -> str:
-        """Simplifica usando método Quine-McCluskey (versión básica)"""
-        # Obtener mintérminos (donde el resultado es True)
-        minterms = [i for i, r in enumerate(resultados) if r]
+        Devuelve el número de filas escritas
+        """
+        if formato not in ('csv', 'ndjson'):
+            raise ValueError(f"Formato desconocido '{formato}'. Opciones: csv, ndjson")
+        if isinstance(destino, str):
+            with open(destino, 'wb') as archivo:
+                return self.escribir_tabla(archivo, formato, filas_por_bloque)
         
-        if not minterms:
-            return "0"
-        if len(minterms) == 2**self.n_vars:
-            return "1"
+        if formato == 'csv':
+            destino.write((','.join(self.variables + ['Resultado']) + '\n').encode('utf-8'))
+            claves = [''] * (self.n_vars + 1)
+            separador, inicio_linea, fin_linea = ',', '', '\n'
+        else:
+            claves = [json.dumps(var) + ': ' for var in self.variables] + ['"resultado": ']
+            separador, inicio_linea, fin_linea = ', ', '{', '}\n'
         
-        # Simplificación básica
-        terminos = []
-        for m in minterms:
-            binario = format(m, f'0{self.n_vars}b')
-            termino = []
-            for i, bit in enumerate(binario):
-                if bit == '1':
-                    termino.append(self.variables[i])
-                else:
-                    termino.append(f'~{self.variables[i]}')
-            terminos.append('(' + ' y '.join(termino) + ')')
+        # Los valores de las variables de cada fila son los bits de su índice.
+        # La parte baja (k bits) se repite en cada bloque y se calcula una vez.
+        k = min(self.n_vars, max(filas_por_bloque, 1).bit_length() - 1)
+        externas = self.n_vars - k
+        sufijos = [''.join(f'{claves[externas + i]}{bit}{separador}'
+                           for i, bit in enumerate(format(j, f'0{k}b') if k else ''))
+                   for j in range(1 << k)]
+        escritas = 0
+        for inicio, cantidad, bits in self.iterar_bloques(1 << k):
+            prefijo = inicio_linea + ''.join(f'{claves[i]}{bit}{separador}'
+                                             for i, bit in enumerate(format(inicio >> k, f'0{externas}b')
+                                                                     if externas else ''))
+            resultados = format(bits, f'0{cantidad}b')[::-1]
+            ultima = claves[-1]
+            destino.write(''.join(f'{prefijo}{sufijos[j]}{ultima}{resultados[j]}{fin_linea}'
+                                  for j in range(cantidad)).encode('utf-8'))
+            escritas += cantidad
+        return escritas
+    
+    def generar_mapa_karnaugh(self, resultados: Union[List[bool], int],
+                              variables: Optional[List[str]] = None) -> str:
+        """Genera el mapa de Karnaugh (en texto) para cualquier número de variables"""
+        return self.mapa_karnaugh(resultados).a_texto(variables or self.variables)
+    
+    def mapa_karnaugh(self, resultados: Union[List[bool], int]) -> 'MapaKarnaugh':
+        """Devuelve la rejilla estructurada del mapa de Karnaugh"""
+        if not isinstance(resultados, int):
+            resultados = lista_a_bits(resultados)
+        return mapa_karnaugh(resultados, self.n_vars)
+    
+    def minimizar(self, resultados: Union[List[bool], int],
+                  indiferentes: Iterable[int] = (), metodo: str = 'auto') -> List[Implicante]:
+        """
+        Obtiene una suma de productos mínima (o casi mínima)
         
-        if len(terminos) <= 6:
-            return ' v '.join(terminos)
-        else:
-            return f"{terminos[0]} v ... v {terminos[-1]} [{len(terminos)} términos]"
+        Parámetros:
+        - resultados: lista de resultados por fila o máscara de bits
+        - indiferentes: filas cuyo valor no importa (don't cares)
+        - metodo: 'qm', 'espresso' o 'auto' (Espresso a partir de UMBRAL_ESPRESSO variables)
+        """
+        on = resultados if isinstance(resultados, int) else lista_a_bits(resultados)
+        dc = 0
+        for i in indiferentes:
+            dc |= 1 << i
+        on &= ~dc
+        if not on:
+            return []
+        if metodo == 'auto':
+            metodo = 'espresso' if self.n_vars > UMBRAL_ESPRESSO else 'qm'
+        if metodo == 'espresso':
+            return espresso(on, dc, self.n_vars)
+        if metodo != 'qm':
+            raise ValueError(f"Método de minimización desconocido '{metodo}'")
+        minterminos = [i for i, c in enumerate(reversed(bin(on)[2:])) if c == '1']
+        indices_dc = [i for i, c in enumerate(reversed(bin(dc)[2:])) if c == '1'] if dc else []
+        return quine_mccluskey(minterminos, indices_dc, self.n_vars)
+    
+    def simplificar_quine_mccluskey(self, resultados: Union[List[bool], int],
+                                    indiferentes: Iterable[int] = ()) -> str:
+        """Simplifica usando Quine-McCluskey (o Espresso para muchas variables)"""
+        return terminos_a_texto(self.minimizar(resultados, indiferentes), self.variables)
     
     def mostrar_resultados(self):
         """Muestra todos los resultados del análisis"""
@@ -264,18 +745,20 @@ Mapa de Karnaugh (5 variables):
         
         print("\n2. TABLA DE VERDAD:")
         print("-" * 70)
-        tabla, resultados = self.generar_tabla_verdad()
         
         # Encabezado
         header = " | ".join(self.variables) + " | Resultado"
         print(header)
         print("-" * len(header))
         
-        # Filas
-        for fila in tabla:
-            valores_str = " | ".join(["1" if v else "0" for v in fila[:-1]])
-            resultado_str = "1" if fila[-1] else "0"
-            print(f"{valores_str} |     {resultado_str}")
+        # Filas: se imprimen bloque a bloque y sólo se guarda la máscara de resultados
+        resultados = 0
+        for inicio, cantidad, bits in self.iterar_bloques():
+            resultados |= bits << inicio
+            columna = format(bits, f'0{cantidad}b')[::-1]
+            for j in range(cantidad):
+                valores_str = " | ".join(format(inicio + j, f'0{self.n_vars}b'))
+                print(f"{valores_str} |     {columna[j]}")
         
         print("\n3. MAPA DE KARNAUGH:")
         print("-" * 70)
@@ -288,6 +771,177 @@ Mapa de Karnaugh (5 variables):
         print("\n" + "="*70)
 
 
+# ============================================
+# CACHÉ DE EXPRESIONES
+# ============================================
+
+RUTA_DB = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'DB', 'DBusuariosSqlite.db')
+
+
+def forma_canonica(expresion: str) -> Tuple[str, List[str]]:
+    """
+    Devuelve la clave canónica de una expresión (sin espacios y con las
+    variables renombradas por su posición) y sus variables en orden.
+    'P y ~Q' y 'A  y ~B' comparten la clave 'x0y~x1'
+    """
+    tokens = tokenizar(expresion)
+    variables = sorted({texto for tipo, texto in tokens if tipo == 'var'})
+    indices = {var: i for i, var in enumerate(variables)}
+    clave = ''.join(f'x{indices[texto]}' if tipo == 'var' else texto for tipo, texto in tokens)
+    return clave, variables
+
+
+class CacheBooleana:
+    """
+    Caché LRU de análisis completos (evaluador compilado, resultados, mapa
+    de Karnaugh y suma de productos simplificada) indexada por forma canónica.
+    El mapa se guarda como rejilla estructurada y la expresión simplificada
+    como plantilla con {0}, {1}, ... en lugar de los nombres de las variables.
+    Opcionalmente persiste en la base SQLite de DB/ para sobrevivir reinicios.
+    """
+    
+    def __init__(self, capacidad: int = 256, persistir: bool = False, ruta_db: str = RUTA_DB):
+        self.capacidad = capacidad
+        self.persistir = persistir
+        self.ruta_db = ruta_db
+        self._entradas: 'OrderedDict[str, Dict]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.aciertos = 0
+        self.aciertos_disco = 0
+        self.fallos = 0
+        if persistir:
+            self._crear_tabla()
+    
+    def analizar(self, expresion: str) -> Dict:
+        """Devuelve el análisis de la expresión, calculándolo sólo si no está en caché"""
+        clave, variables = forma_canonica(expresion)
+        with self._lock:
+            entrada = self._entradas.get(clave)
+            if entrada is not None:
+                self._entradas.move_to_end(clave)
+                self.aciertos += 1
+        if entrada is None:
+            entrada = self._leer_disco(clave, expresion) if self.persistir else None
+            if entrada is not None:
+                with self._lock:
+                    self.aciertos_disco += 1
+            else:
+                entrada = self._calcular(expresion)
+                with self._lock:
+                    self.fallos += 1
+                if self.persistir:
+                    self._guardar_disco(clave, entrada)
+            self._insertar(clave, entrada)
+        return {
+            'variables': variables,
+            'n_vars': len(variables),
+            'funcion': entrada['calculadora']._funcion,
+            'funcion_bits': entrada['calculadora']._funcion_bits,
+            'resultados': entrada['resultados'],
+            'implicantes': entrada['implicantes'],
+            'mapa': entrada['mapa'].a_texto(variables),
+            'mapa_karnaugh': entrada['mapa'],
+            'simplificada': entrada['simplificada'].format(*variables),
+        }
+    
+    def estadisticas(self) -> Dict:
+        """Aciertos, fallos y ocupación de la caché"""
+        with self._lock:
+            consultas = self.aciertos + self.aciertos_disco + self.fallos
+            return {
+                'aciertos': self.aciertos,
+                'aciertos_disco': self.aciertos_disco,
+                'fallos': self.fallos,
+                'tamaño': len(self._entradas),
+                'capacidad': self.capacidad,
+                'tasa_aciertos': round((self.aciertos + self.aciertos_disco) / consultas, 4) if consultas else 0.0,
+            }
+    
+    def limpiar(self):
+        """Vacía la caché en memoria y reinicia las estadísticas"""
+        with self._lock:
+            self._entradas.clear()
+            self.aciertos = self.aciertos_disco = self.fallos = 0
+    
+    def _insertar(self, clave: str, entrada: Dict):
+        with self._lock:
+            self._entradas[clave] = entrada
+            self._entradas.move_to_end(clave)
+            while len(self._entradas) > self.capacidad:
+                self._entradas.popitem(last=False)
+    
+    @staticmethod
+    def _plantillas(n_vars: int) -> List[str]:
+        return ['{%d}' % i for i in range(n_vars)]
+    
+    def _calcular(self, expresion: str) -> Dict:
+        calc = CalculadoraBooleana(expresion)
+        resultados = calc.evaluar_bits()
+        implicantes = calc.minimizar(resultados)
+        plantillas = self._plantillas(calc.n_vars)
+        return {
+            'calculadora': calc,
+            'resultados': resultados,
+            'implicantes': implicantes,
+            'mapa': calc.mapa_karnaugh(resultados),
+            'simplificada': terminos_a_texto(implicantes, plantillas),
+        }
+    
+    def _conectar(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.ruta_db, timeout=5)
+    
+    def _crear_tabla(self):
+        conn = self._conectar()
+        try:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS cache_booleana (
+                    clave TEXT PRIMARY KEY,
+                    resultados TEXT NOT NULL,
+                    implicantes TEXT NOT NULL,
+                    mapa TEXT NOT NULL,
+                    simplificada TEXT NOT NULL
+                )
+            ''')
+            conn.commit()
+        finally:
+            conn.close()
+    
+    def _leer_disco(self, clave: str, expresion: str) -> Optional[Dict]:
+        conn = self._conectar()
+        try:
+            fila = conn.execute(
+                'SELECT resultados, implicantes, mapa, simplificada FROM cache_booleana WHERE clave = ?',
+                (clave,)
+            ).fetchone()
+        finally:
+            conn.close()
+        if fila is None:
+            return None
+        resultados, implicantes, mapa, simplificada = fila
+        n_filas, etiquetas_filas, etiquetas_columnas, celdas = json.loads(mapa)
+        return {
+            # El evaluador compilado no se serializa: se vuelve a compilar
+            'calculadora': CalculadoraBooleana(expresion),
+            'resultados': int(resultados, 16),
+            'implicantes': [Implicante(*imp) for imp in json.loads(implicantes)],
+            'mapa': MapaKarnaugh(n_filas, tuple(etiquetas_filas), tuple(etiquetas_columnas), celdas),
+            'simplificada': simplificada,
+        }
+    
+    def _guardar_disco(self, clave: str, entrada: Dict):
+        conn = self._conectar()
+        try:
+            conn.execute(
+                'INSERT OR REPLACE INTO cache_booleana VALUES (?, ?, ?, ?, ?)',
+                (clave, format(entrada['resultados'], 'x'),
+                 json.dumps([list(imp) for imp in entrada['implicantes']]),
+                 json.dumps(entrada['mapa']), entrada['simplificada'])
+            )
+            conn.commit()
+        finally:
+            conn.close()
+
+
 # Ejemplo de uso
 if __name__ == "__main__":
     print("\nIngresa una expresión booleana.")
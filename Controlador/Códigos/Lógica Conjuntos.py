@@ -1,6 +1,14 @@
 
 import re
-from typing import Dict, List, Tuple, Optional
+import math
+from fractions import Fraction
+from typing import Dict, List, Tuple, Optional, Iterator, Sequence, Union, Iterable, Set
+
+try:
+    import numpy as np
+except ImportError:
+    # El cálculo por lotes funciona igual con listas de Python, sólo más lento
+    np = None
 
 class SolucionadorConjuntos:
     """
@@ -244,6 +252,688 @@ VERIFICACIÓN:
 """
 
 
+# ============================================
+# RESOLUCIÓN POR LOTES
+# ============================================
+
+Columna = Union[int, Sequence[int]]
+
+COLUMNAS_DOS = ('total', 'solo_a', 'solo_b', 'ambos', 'ninguno',
+                'total_a', 'total_b', 'porcentaje_a', 'porcentaje_b', 'valido')
+COLUMNAS_TRES = ('total', 'solo_a', 'solo_b', 'solo_c', 'a_y_b', 'a_y_c', 'b_y_c', 'todos', 'ninguno',
+                 'total_a', 'total_b', 'total_c', 'valido')
+
+
+class LoteConjuntos:
+    """
+    Resultados de muchos problemas a la vez, guardados por columnas (arreglos
+    de NumPy si está instalado, listas si no). La columna 'valido' indica qué
+    filas son consistentes; el texto paso a paso se genera sólo al pedirlo.
+    """
+    
+    def __init__(self, tres_conjuntos: bool, columnas: Dict[str, Sequence]):
+        self.tres_conjuntos = tres_conjuntos
+        self.columnas = columnas
+    
+    def __len__(self) -> int:
+        return len(self.columnas['total'])
+    
+    def __getitem__(self, nombre: str) -> Sequence:
+        return self.columnas[nombre]
+    
+    def fila(self, i: int) -> Dict:
+        """Valores de la fila i como tipos de Python"""
+        resultado = {}
+        for nombre, columna in self.columnas.items():
+            valor = columna[i]
+            if nombre == 'valido':
+                resultado[nombre] = bool(valor)
+            elif nombre.startswith('porcentaje_'):
+                resultado[nombre] = None if math.isnan(valor) else float(valor)
+            else:
+                resultado[nombre] = int(valor)
+        return resultado
+    
+    def filas(self) -> Iterator[Dict]:
+        return (self.fila(i) for i in range(len(self)))
+    
+    def invalidos(self) -> List[int]:
+        """Índices de las filas inconsistentes"""
+        return [i for i, valido in enumerate(self.columnas['valido']) if not valido]
+    
+    def a_columnas(self) -> Dict[str, List]:
+        """Columnas como listas de Python, listas para JSON"""
+        columnas = {}
+        for nombre, columna in self.columnas.items():
+            valores = columna.tolist() if np is not None and isinstance(columna, np.ndarray) else list(columna)
+            if nombre.startswith('porcentaje_'):
+                valores = [None if math.isnan(v) else v for v in valores]
+            columnas[nombre] = valores
+        return columnas
+    
+    def a_estructurado(self):
+        """Arreglo estructurado de NumPy con una fila por problema"""
+        if np is None:
+            raise ImportError("a_estructurado() necesita NumPy")
+        tipos = [(nombre, np.asarray(columna).dtype) for nombre, columna in self.columnas.items()]
+        arreglo = np.empty(len(self), dtype=tipos)
+        for nombre, columna in self.columnas.items():
+            arreglo[nombre] = columna
+        return arreglo
+    
+    def solucionador(self, i: int, cat_a: str = "A", cat_b: str = "B", cat_c: str = "C") -> SolucionadorConjuntos:
+        """SolucionadorConjuntos cargado con la fila i, para generar sus textos y diagramas"""
+        datos = self.fila(i)
+        if not datos['valido']:
+            raise ValueError(f"Los datos de la fila {i} son inconsistentes. Revisa los números.")
+        solver = SolucionadorConjuntos()
+        solver.categoria_a, solver.categoria_b, solver.categoria_c = cat_a, cat_b, cat_c
+        solver.tiene_tres_categorias = self.tres_conjuntos
+        solver.total = datos['total']
+        solver.solo_a = datos['solo_a']
+        solver.solo_b = datos['solo_b']
+        solver.ninguno = datos['ninguno']
+        if self.tres_conjuntos:
+            solver.solo_c = datos['solo_c']
+            solver.a_y_b = datos['a_y_b']
+            solver.a_y_c = datos['a_y_c']
+            solver.b_y_c = datos['b_y_c']
+            solver.todos = datos['todos']
+        else:
+            solver.a_y_b = datos['ambos']
+        return solver
+    
+    def texto(self, i: int, cat_a: str = "A", cat_b: str = "B", cat_c: str = "C") -> str:
+        """Explicación paso a paso de la fila i"""
+        solver = self.solucionador(i, cat_a, cat_b, cat_c)
+        return solver._texto_solucion_tres() if self.tres_conjuntos else solver._texto_solucion_dos()
+
+
+def _longitud(*columnas: Optional[Columna]) -> int:
+    """Número de filas; los escalares se repiten en todas"""
+    longitudes = {len(c) for c in columnas if c is not None and hasattr(c, '__len__')}
+    if len(longitudes) > 1:
+        raise ValueError("Todas las columnas deben tener la misma longitud")
+    return longitudes.pop() if longitudes else 1
+
+
+def _arreglo(columna: Columna, n: int):
+    if not hasattr(columna, '__len__'):
+        return np.full(n, columna, dtype=np.int64)
+    return np.asarray(columna, dtype=np.int64)
+
+
+def _lista(columna: Columna, n: int) -> List[int]:
+    if not hasattr(columna, '__len__'):
+        return [int(columna)] * n
+    return [int(v) for v in columna]
+
+
+def _porcentaje(parte: int, total: int) -> float:
+    return round(parte / total * 100, 2) if total > 0 else math.nan
+
+
+def resolver_lote_dos_conjuntos(total: Columna, solo_a: Columna, solo_b: Columna,
+                                ninguno: Optional[Columna] = None,
+                                ambos: Optional[Columna] = None) -> LoteConjuntos:
+    """
+    Resuelve muchos problemas de 2 conjuntos a la vez. Con 'ninguno' calcula
+    cuántos están en ambos (como problema_dos_conjuntos); con 'ambos' calcula
+    cuántos no están en ninguno (como problema_dos_conjuntos_con_ambos)
+    """
+    if (ninguno is None) == (ambos is None):
+        raise ValueError("Indica 'ninguno' o 'ambos' (sólo uno de los dos)")
+    n = _longitud(total, solo_a, solo_b, ninguno, ambos)
+    
+    if np is not None:
+        total, solo_a, solo_b = (_arreglo(c, n) for c in (total, solo_a, solo_b))
+        if ambos is None:
+            ninguno = _arreglo(ninguno, n)
+            ambos = total - ninguno - (solo_a + solo_b)
+        else:
+            ambos = _arreglo(ambos, n)
+            ninguno = total - (solo_a + solo_b + ambos)
+        total_a = solo_a + ambos
+        total_b = solo_b + ambos
+        valido = (total > 0) & (solo_a >= 0) & (solo_b >= 0) & (ambos >= 0) & (ninguno >= 0)
+        divisor = np.where(total > 0, total, 1)
+        porcentaje_a = np.where(total > 0, np.round(total_a / divisor * 100, 2), np.nan)
+        porcentaje_b = np.where(total > 0, np.round(total_b / divisor * 100, 2), np.nan)
+    else:
+        total, solo_a, solo_b = (_lista(c, n) for c in (total, solo_a, solo_b))
+        if ambos is None:
+            ninguno = _lista(ninguno, n)
+            ambos = [t - ni - (a + b) for t, ni, a, b in zip(total, ninguno, solo_a, solo_b)]
+        else:
+            ambos = _lista(ambos, n)
+            ninguno = [t - (a + b + ab) for t, a, b, ab in zip(total, solo_a, solo_b, ambos)]
+        total_a = [a + ab for a, ab in zip(solo_a, ambos)]
+        total_b = [b + ab for b, ab in zip(solo_b, ambos)]
+        valido = [t > 0 and min(a, b, ab, ni) >= 0
+                  for t, a, b, ab, ni in zip(total, solo_a, solo_b, ambos, ninguno)]
+        porcentaje_a = [_porcentaje(x, t) for x, t in zip(total_a, total)]
+        porcentaje_b = [_porcentaje(x, t) for x, t in zip(total_b, total)]
+    
+    return LoteConjuntos(False, dict(zip(COLUMNAS_DOS, (
+        total, solo_a, solo_b, ambos, ninguno, total_a, total_b, porcentaje_a, porcentaje_b, valido))))
+
+
+def resolver_lote_tres_conjuntos(total: Columna, solo_a: Columna, solo_b: Columna, solo_c: Columna,
+                                 a_y_b: Columna, a_y_c: Columna, b_y_c: Columna, todos: Columna,
+                                 ninguno: Optional[Columna] = None) -> LoteConjuntos:
+    """
+    Resuelve muchos problemas de 3 conjuntos a la vez. Si no se da 'ninguno'
+    se deduce del total; si se da, la fila sólo es válida si las ocho
+    regiones suman exactamente el total
+    """
+    n = _longitud(total, solo_a, solo_b, solo_c, a_y_b, a_y_c, b_y_c, todos, ninguno)
+    regiones = (solo_a, solo_b, solo_c, a_y_b, a_y_c, b_y_c, todos)
+    
+    if np is not None:
+        total = _arreglo(total, n)
+        solo_a, solo_b, solo_c, a_y_b, a_y_c, b_y_c, todos = (_arreglo(c, n) for c in regiones)
+        suma = solo_a + solo_b + solo_c + a_y_b + a_y_c + b_y_c + todos
+        if ninguno is None:
+            ninguno = total - suma
+            cuadra = np.ones(n, dtype=bool)
+        else:
+            ninguno = _arreglo(ninguno, n)
+            cuadra = suma + ninguno == total
+        total_a = solo_a + a_y_b + a_y_c + todos
+        total_b = solo_b + a_y_b + b_y_c + todos
+        total_c = solo_c + a_y_c + b_y_c + todos
+        minimo = np.minimum.reduce([solo_a, solo_b, solo_c, a_y_b, a_y_c, b_y_c, todos, ninguno])
+        valido = (total > 0) & (minimo >= 0) & cuadra
+    else:
+        total = _lista(total, n)
+        solo_a, solo_b, solo_c, a_y_b, a_y_c, b_y_c, todos = (_lista(c, n) for c in regiones)
+        suma = [sum(r) for r in zip(solo_a, solo_b, solo_c, a_y_b, a_y_c, b_y_c, todos)]
+        if ninguno is None:
+            ninguno = [t - s for t, s in zip(total, suma)]
+            cuadra = [True] * n
+        else:
+            ninguno = _lista(ninguno, n)
+            cuadra = [s + ni == t for s, ni, t in zip(suma, ninguno, total)]
+        total_a = [a + ab + ac + abc for a, ab, ac, abc in zip(solo_a, a_y_b, a_y_c, todos)]
+        total_b = [b + ab + bc + abc for b, ab, bc, abc in zip(solo_b, a_y_b, b_y_c, todos)]
+        total_c = [c + ac + bc + abc for c, ac, bc, abc in zip(solo_c, a_y_c, b_y_c, todos)]
+        valido = [t > 0 and min(r) >= 0 and ok for t, ok, r in
+                  zip(total, cuadra, zip(solo_a, solo_b, solo_c, a_y_b, a_y_c, b_y_c, todos, ninguno))]
+    
+    return LoteConjuntos(True, dict(zip(COLUMNAS_TRES, (
+        total, solo_a, solo_b, solo_c, a_y_b, a_y_c, b_y_c, todos, ninguno, total_a, total_b, total_c, valido))))
+
+
+# ============================================
+# N CONJUNTOS (REGIONES POR MÁSCARA DE BITS)
+# ============================================
+# La región m (0 <= m < 2^k) son los elementos que están exactamente en los
+# conjuntos cuyos bits están en m: la región 0 es "ninguno" y la 2^k - 1 "todos".
+
+MAX_CONJUNTOS = 20
+
+
+class DatosInconsistentes(ValueError):
+    """Los datos se contradicen o llevan a una región negativa o no entera"""
+
+
+class DatosInsuficientes(ValueError):
+    """Faltan datos: 'regiones' son las que no se pueden determinar"""
+    
+    def __init__(self, mensaje: str, regiones: List[str], faltantes: int):
+        super().__init__(mensaje)
+        self.regiones = regiones
+        self.faltantes = faltantes
+    
+    def __reduce__(self):
+        # Para que viaje entre procesos (la cola de trabajos) con sus atributos
+        return (self.__class__, (str(self), self.regiones, self.faltantes))
+
+
+class DemasiadosConjuntos(ValueError):
+    """Los datos no permiten el camino rápido y hay demasiados conjuntos para la eliminación gaussiana"""
+
+
+def _supermascaras(mascara: int, completa: int) -> Iterator[int]:
+    """Máscaras que contienen a 'mascara'"""
+    libres = completa ^ mascara
+    sub = libres
+    while True:
+        yield mascara | sub
+        if sub == 0:
+            break
+        sub = (sub - 1) & libres
+
+
+def _submascaras(mascara: int) -> Iterator[int]:
+    """Máscaras contenidas en 'mascara'"""
+    sub = mascara
+    while True:
+        yield sub
+        if sub == 0:
+            break
+        sub = (sub - 1) & mascara
+
+
+def _suma_supermascaras(valores: List) -> List:
+    """Transformada zeta: g[S] = suma de valores[m] para m que contiene a S, en O(k·2^k)"""
+    g = list(valores)
+    n = len(g)
+    bit = 1
+    while bit < n:
+        for m in range(n):
+            if not m & bit:
+                g[m] += g[m | bit]
+        bit <<= 1
+    return g
+
+
+def _moebius_supermascaras(totales: List) -> List:
+    """Inversa de la anterior: regiones a partir de todos los totales de intersección"""
+    r = list(totales)
+    n = len(r)
+    bit = 1
+    while bit < n:
+        for m in range(n):
+            if not m & bit:
+                r[m] -= r[m | bit]
+        bit <<= 1
+    return r
+
+
+def _suma_submascaras(valores: List) -> List:
+    """Transformada zeta sobre subconjuntos: h[T] = suma de valores[m] para m contenida en T"""
+    h = list(valores)
+    n = len(h)
+    bit = 1
+    while bit < n:
+        for m in range(n):
+            if m & bit:
+                h[m] += h[m ^ bit]
+        bit <<= 1
+    return h
+
+
+def _moebius_submascaras(sumas: List) -> List:
+    """Inversa de la anterior: regiones a partir de todas las sumas de subconjuntos"""
+    r = list(sumas)
+    n = len(r)
+    bit = 1
+    while bit < n:
+        for m in range(n):
+            if m & bit:
+                r[m] -= r[m ^ bit]
+        bit <<= 1
+    return r
+
+
+class SolucionConjuntos:
+    """Las 2^k regiones resueltas, con consultas de intersecciones, uniones y totales"""
+    
+    def __init__(self, categorias: List[str], regiones: List[int]):
+        self.categorias = categorias
+        self.regiones = regiones
+        self._intersecciones: Optional[List[int]] = None
+    
+    def mascara(self, nombres: Iterable[str]) -> int:
+        return _mascara_de(nombres, self.categorias)
+    
+    def nombre_region(self, m: int) -> str:
+        return _nombre_region(m, self.categorias)
+    
+    def region(self, *nombres: str) -> int:
+        """Elementos que están exactamente en esos conjuntos (ninguno si no se da ninguno)"""
+        return self.regiones[self.mascara(nombres)]
+    
+    def interseccion(self, *nombres: str) -> int:
+        """Elementos que están al menos en todos esos conjuntos (el total si no se da ninguno)"""
+        if self._intersecciones is None:
+            self._intersecciones = _suma_supermascaras(self.regiones)
+        return self._intersecciones[self.mascara(nombres)]
+    
+    def union(self, *nombres: str) -> int:
+        m = self.mascara(nombres)
+        return sum(v for r, v in enumerate(self.regiones) if r & m)
+    
+    def totales(self) -> Dict[str, int]:
+        return {nombre: self.interseccion(nombre) for nombre in self.categorias}
+    
+    def a_dict(self) -> Dict:
+        return {
+            'categorias': list(self.categorias),
+            'total': self.interseccion(),
+            'totales': self.totales(),
+            'regiones': {self.nombre_region(m): v for m, v in enumerate(self.regiones)},
+        }
+    
+    def texto(self) -> str:
+        ancho = max(len(self.nombre_region(m)) for m in range(len(self.regiones)))
+        lineas = [f"\nREGIONES ({len(self.categorias)} conjuntos, total {self.interseccion()}):"]
+        for m, v in enumerate(self.regiones):
+            lineas.append(f"  {self.nombre_region(m).ljust(ancho)} : {v}")
+        lineas.append("\nTOTALES:")
+        for nombre, v in self.totales().items():
+            lineas.append(f"  → {nombre}: {v}")
+        return '\n'.join(lineas) + '\n'
+
+
+def _nombre_region(m: int, categorias: List[str]) -> str:
+    if m == 0:
+        return "ninguno"
+    return "solo " + "∩".join(c for i, c in enumerate(categorias) if m >> i & 1)
+
+
+def _nombre_interseccion(m: int, categorias: List[str]) -> str:
+    if m == 0:
+        return "total"
+    return "|" + "∩".join(c for i, c in enumerate(categorias) if m >> i & 1) + "|"
+
+
+def _nombre_union(m: int, categorias: List[str]) -> str:
+    return "|" + "∪".join(c for i, c in enumerate(categorias) if m >> i & 1) + "|"
+
+
+def _mascara_de(clave, categorias: List[str]) -> int:
+    """Acepta una máscara entera, un iterable de nombres o un texto 'A∩B' / 'A,B'"""
+    if isinstance(clave, int):
+        if not 0 <= clave < 1 << len(categorias):
+            raise ValueError(f"Máscara fuera de rango: {clave}")
+        return clave
+    if isinstance(clave, str):
+        clave = clave.strip()
+        if clave in ('', 'ninguno', 'total'):
+            return 0
+        clave = re.split(r'\s*[∩,&]\s*', clave)
+    m = 0
+    for nombre in clave:
+        try:
+            m |= 1 << categorias.index(nombre)
+        except ValueError:
+            raise ValueError(f"Conjunto desconocido '{nombre}'") from None
+    return m
+
+
+def resolver_conjuntos(categorias: Sequence[str], total: Optional[int] = None,
+                       totales: Optional[Dict] = None, intersecciones: Optional[Dict] = None,
+                       regiones: Optional[Dict] = None, uniones: Optional[Dict] = None,
+                       max_conjuntos_eliminacion: Optional[int] = None) -> SolucionConjuntos:
+    """
+    Resuelve un problema de k conjuntos a partir de cualquier combinación de datos.
+    
+    Parámetros:
+    - categorias: nombres de los k conjuntos (el i-ésimo es el bit i de las máscaras)
+    - total: tamaño del universo
+    - totales: {conjunto: cuántos están en él}
+    - intersecciones: {conjuntos: cuántos están al menos en todos ellos}
+    - regiones: {conjuntos: cuántos están exactamente en ellos}; 'ninguno' o () es la región vacía
+    - uniones: {conjuntos: cuántos están en al menos uno de ellos}
+    
+    Con el total, cada unión se pasa a la intersección de los complementos
+    (los que no están en ninguno de esos conjuntos), que es una suma de las
+    regiones contenidas en el complemento. Si se conocen todas las
+    intersecciones, o todas las uniones y el total, se usa la inversión de
+    Möbius en O(k·2^k) y se comprueban los demás datos. Si no, se despejan
+    primero las ecuaciones con una sola incógnita y el resto se resuelve por
+    eliminación gaussiana exacta (con Fraction), cuyo costo crece como 8^k:
+    con más de 'max_conjuntos_eliminacion' conjuntos se lanza DemasiadosConjuntos.
+    Lanza DatosInconsistentes o DatosInsuficientes indicando qué falla.
+    """
+    categorias = list(categorias)
+    k = len(categorias)
+    if not 1 <= k <= MAX_CONJUNTOS:
+        raise ValueError(f"Se admiten de 1 a {MAX_CONJUNTOS} conjuntos")
+    if len(set(categorias)) != k:
+        raise ValueError("Los nombres de los conjuntos deben ser distintos")
+    n = 1 << k
+    completa = n - 1
+    
+    # Cada dato es una ecuación: suma de ciertas regiones = valor
+    datos_interseccion: Dict[int, int] = {}
+    datos_region: Dict[int, int] = {}
+    datos_union: Dict[int, int] = {}
+    
+    def agregar(destino, m, valor, nombre):
+        if isinstance(valor, bool) or not isinstance(valor, int):
+            raise ValueError(f"El valor de {nombre} debe ser un entero")
+        if valor < 0:
+            raise DatosInconsistentes(f"{nombre} no puede ser negativo ({valor})")
+        if destino.get(m, valor) != valor:
+            raise DatosInconsistentes(f"{nombre} aparece con dos valores distintos: {destino[m]} y {valor}")
+        destino[m] = valor
+    
+    if total is not None:
+        agregar(datos_interseccion, 0, total, "total")
+    for clave, valor in (totales or {}).items():
+        m = _mascara_de([clave] if isinstance(clave, str) else clave, categorias)
+        agregar(datos_interseccion, m, valor, _nombre_interseccion(m, categorias))
+    for clave, valor in (intersecciones or {}).items():
+        m = _mascara_de(clave, categorias)
+        agregar(datos_interseccion, m, valor, _nombre_interseccion(m, categorias))
+    for clave, valor in (regiones or {}).items():
+        m = _mascara_de(clave, categorias)
+        agregar(datos_region, m, valor, _nombre_region(m, categorias))
+    for clave, valor in (uniones or {}).items():
+        m = _mascara_de(clave, categorias)
+        if m == 0:
+            raise ValueError("La unión necesita al menos un conjunto")
+        agregar(datos_union, m, valor, _nombre_union(m, categorias))
+    
+    # |A∪B| = total - |A'∩B'|, y A'∩B' son las regiones contenidas en el complemento
+    datos_complemento: Dict[int, int] = {}
+    if 0 in datos_interseccion:
+        total = datos_interseccion[0]
+        datos_complemento[completa] = total
+        for m, valor in datos_union.items():
+            if valor > total:
+                raise DatosInconsistentes(f"{_nombre_union(m, categorias)} = {valor} supera el total ({total})")
+            datos_complemento[completa ^ m] = total - valor
+    
+    # Caminos rápidos: con todas las intersecciones (o todas las uniones y el
+    # total) Möbius da las regiones directamente
+    resultado = None
+    if len(datos_interseccion) == n:
+        resultado = _moebius_supermascaras([datos_interseccion[m] for m in range(n)])
+    elif len(datos_complemento) == n:
+        resultado = _moebius_submascaras([datos_complemento[m] for m in range(n)])
+    elif len(datos_union) == n - 1:
+        # Sin el total las uniones fijan todas las regiones menos "ninguno"
+        # (tomando total 0 su aporte se cancela en las demás)
+        resultado = _moebius_submascaras([-datos_union.get(completa ^ m, 0) for m in range(n)])
+        if 0 not in datos_region:
+            resultado[0] = 0
+            _comprobar_datos(resultado, datos_interseccion, {}, datos_union, categorias)
+            raise DatosInsuficientes(
+                f"Falta 1 dato: no se pueden determinar 1 regiones ({_nombre_region(0, categorias)})",
+                [_nombre_region(0, categorias)], 1)
+        resultado[0] = datos_region[0]
+    if resultado is not None:
+        _comprobar_datos(resultado, datos_interseccion, datos_region, datos_union, categorias)
+        _validar_regiones(resultado, categorias)
+        return SolucionConjuntos(categorias, resultado)
+    
+    if max_conjuntos_eliminacion is not None and k > max_conjuntos_eliminacion:
+        raise DemasiadosConjuntos(
+            f"Con más de {max_conjuntos_eliminacion} conjuntos hacen falta todas las intersecciones "
+            f"o todas las uniones")
+    
+    ecuaciones: List[Tuple[List[int], int, str]] = []
+    for m, valor in datos_region.items():
+        ecuaciones.append(([m], valor, _nombre_region(m, categorias)))
+    for m, valor in datos_interseccion.items():
+        ecuaciones.append((list(_supermascaras(m, completa)), valor, _nombre_interseccion(m, categorias)))
+    for m, valor in datos_union.items():
+        nombre = _nombre_union(m, categorias)
+        if datos_complemento:
+            ecuaciones.append((list(_submascaras(completa ^ m)), datos_complemento[completa ^ m],
+                               f"total - {nombre}"))
+        else:
+            ecuaciones.append(([r for r in range(n) if r & m], valor, nombre))
+    
+    valores: List[Optional[Fraction]] = [None] * n
+    pendientes = _despejar(ecuaciones, valores, categorias)
+    desconocidas = valores.count(None)
+    pivotes = _eliminacion_gaussiana(ecuaciones, pendientes, valores, categorias) if pendientes else 0
+    
+    indeterminadas = [m for m in range(n) if valores[m] is None]
+    if indeterminadas:
+        # Cada incógnita sin pivote es un dato que falta
+        faltantes = desconocidas - pivotes
+        nombres = [_nombre_region(m, categorias) for m in indeterminadas]
+        raise DatosInsuficientes(
+            f"Faltan {faltantes} dato{'s' if faltantes != 1 else ''}: no se pueden determinar "
+            f"{len(nombres)} regiones ({', '.join(nombres[:8])}{', ...' if len(nombres) > 8 else ''})",
+            nombres, faltantes)
+    _validar_regiones(valores, categorias)
+    return SolucionConjuntos(categorias, [int(v) for v in valores])
+
+
+def _comprobar_datos(regiones: List[int], datos_interseccion: Dict[int, int], datos_region: Dict[int, int],
+                     datos_union: Dict[int, int], categorias: List[str]):
+    """Que los datos que no se usaron para despejar cuadren con las regiones obtenidas"""
+    def comprobar(nombre, dato, suma):
+        if suma != dato:
+            raise DatosInconsistentes(
+                f"{nombre} = {dato} no cuadra con los demás datos (las regiones suman {suma})")
+    
+    for m, dato in datos_region.items():
+        comprobar(_nombre_region(m, categorias), dato, regiones[m])
+    if datos_interseccion:
+        intersecciones = _suma_supermascaras(regiones)
+        for m, dato in datos_interseccion.items():
+            comprobar(_nombre_interseccion(m, categorias), dato, intersecciones[m])
+    if datos_union:
+        contenidas = _suma_submascaras(regiones)
+        completa = len(regiones) - 1
+        for m, dato in datos_union.items():
+            comprobar(_nombre_union(m, categorias), dato, contenidas[completa] - contenidas[completa ^ m])
+
+
+def _validar_regiones(regiones: List, categorias: List[str]):
+    for m, v in enumerate(regiones):
+        if v < 0:
+            raise DatosInconsistentes(f"La región '{_nombre_region(m, categorias)}' resulta negativa ({v})")
+        if Fraction(v).denominator != 1:
+            raise DatosInconsistentes(f"La región '{_nombre_region(m, categorias)}' no resulta entera ({v})")
+
+
+def _despejar(ecuaciones, valores, categorias) -> Set[int]:
+    """
+    Resuelve por sustitución: mientras haya una ecuación con una sola región
+    desconocida, la despeja y la descuenta de las demás. Devuelve el conjunto
+    de ecuaciones que quedan con dos o más incógnitas
+    """
+    pendientes = []
+    restos = []
+    apariciones: Dict[int, List[int]] = {}
+    listas = []
+    for e, (miembros, valor, _) in enumerate(ecuaciones):
+        pendientes.append(set(miembros))
+        restos.append(Fraction(valor))
+        for m in miembros:
+            apariciones.setdefault(m, []).append(e)
+        if len(miembros) == 1:
+            listas.append(e)
+    
+    while listas:
+        e = listas.pop()
+        if len(pendientes[e]) != 1:
+            continue
+        m = pendientes[e].pop()
+        valor = restos[e]
+        restos[e] = 0
+        valores[m] = valor
+        for otra in apariciones[m]:
+            if m not in pendientes[otra]:
+                continue
+            pendientes[otra].discard(m)
+            restos[otra] -= valor
+            if len(pendientes[otra]) == 1:
+                listas.append(otra)
+            elif not pendientes[otra] and restos[otra] != 0:
+                _, dato, nombre = ecuaciones[otra]
+                raise DatosInconsistentes(
+                    f"{nombre} = {dato} no cuadra con los demás datos (las regiones suman {dato - restos[otra]})")
+    
+    for e, (miembros, dato, nombre) in enumerate(ecuaciones):
+        if not pendientes[e] and restos[e] != 0:
+            raise DatosInconsistentes(
+                f"{nombre} = {dato} no cuadra con los demás datos (las regiones suman {dato - restos[e]})")
+    # Se reescriben las ecuaciones pendientes sólo con sus incógnitas
+    restantes = set()
+    for e in range(len(ecuaciones)):
+        if pendientes[e]:
+            miembros, dato, nombre = ecuaciones[e]
+            ecuaciones[e] = (sorted(pendientes[e]), restos[e], nombre)
+            restantes.add(e)
+    return restantes
+
+
+def _eliminacion_gaussiana(ecuaciones, indices, valores, categorias):
+    """
+    Eliminación gaussiana exacta sobre las ecuaciones que quedaron, con
+    filas dispersas (dict incógnita -> coeficiente). Cada fila recuerda de qué
+    datos proviene para poder decir cuáles se contradicen. Una incógnita queda
+    determinada justo cuando, despejada, no depende de ninguna columna libre
+    (su fila en la forma escalonada reducida no toca ninguna). Devuelve el rango
+    """
+    filas = []
+    for e in sorted(indices):
+        miembros, resto, _ = ecuaciones[e]
+        filas.append(({m: Fraction(1) for m in miembros}, Fraction(resto), {e}))
+    
+    resueltas = []
+    while filas:
+        # Se elige la fila más corta para que la eliminación no llene las demás
+        filas.sort(key=lambda f: len(f[0]))
+        coeficientes, resto, origen = filas.pop(0)
+        if not coeficientes:
+            if resto != 0:
+                nombres = ', '.join(ecuaciones[e][2] for e in sorted(origen))
+                raise DatosInconsistentes(f"Los datos {nombres} se contradicen entre sí")
+            continue
+        columna = min(coeficientes)
+        factor = coeficientes[columna]
+        coeficientes = {c: v / factor for c, v in coeficientes.items()}
+        resto /= factor
+        for f, (otros, otro_resto, otro_origen) in enumerate(filas):
+            if columna in otros:
+                a = otros[columna]
+                nuevos = dict(otros)
+                for c, v in coeficientes.items():
+                    valor = nuevos.get(c, 0) - a * v
+                    if valor:
+                        nuevos[c] = valor
+                    else:
+                        nuevos.pop(c, None)
+                filas[f] = (nuevos, otro_resto - a * resto, otro_origen | origen)
+        resueltas.append((columna, coeficientes, resto))
+    
+    # Sustitución hacia atrás: cada pivote se escribe como constante + combinación
+    # de las columnas libres; las filas posteriores no contienen pivotes anteriores
+    expresiones = {}
+    for columna, coeficientes, resto in reversed(resueltas):
+        libres = {}
+        constante = resto
+        for c, v in coeficientes.items():
+            if c == columna:
+                continue
+            sustitucion = expresiones.get(c)
+            if sustitucion is None:
+                sustitucion = ({c: Fraction(1)}, 0)
+            terminos, otra_constante = sustitucion
+            constante -= v * otra_constante
+            for libre, w in terminos.items():
+                valor = libres.get(libre, 0) - v * w
+                if valor:
+                    libres[libre] = valor
+                else:
+                    libres.pop(libre, None)
+        expresiones[columna] = (libres, constante)
+        if not libres:
+            valores[columna] = constante
+    return len(resueltas)
+
+
 # ============================================
 # EJEMPLOS DE USO
 # ============================================
@@ -0,0 +1,692 @@
+import heapq
+import math
+import random
+from array import array
+from bisect import bisect_left
+from typing import List, Dict, Tuple, Iterable, Iterator, Optional, Set
+
+try:
+    import numpy as np
+except ImportError:
+    # Los generadores funcionan igual con el módulo random, sólo más lento
+    np = None
+
+
+class Grafo:
+    """
+    Red social no dirigida (sin lazos ni aristas repetidas) pensada para
+    redes grandes. Las aristas se guardan en formato CSR (dos arreglos
+    compactos: inicio de cada fila y vecinos ordenados) más un delta con las
+    aristas agregadas y quitadas desde la última compactación.
+
+    Los contadores (nodos, aristas, grados, aislados) se actualizan en cada
+    evento, igual que los de la página de grafos (crearConexion, eliminarNodo,
+    eliminarArista). Las componentes se mantienen con union-find mientras sólo
+    se agregan aristas; una eliminación las marca para recalcularlas al pedirlas.
+    """
+
+    def __init__(self):
+        self.ids: List[int] = []
+        self.nombres: List[str] = []
+        self._indice: Dict[int, int] = {}
+        self._vivo = bytearray()
+        self._grado = array('i')
+        # CSR: los vecinos del índice i están en _vecinos[_inicio[i]:_inicio[i + 1]]
+        self._inicio = array('q', [0])
+        self._vecinos = array('i')
+        self._agregadas: Dict[int, Set[int]] = {}
+        self._quitadas: Set[Tuple[int, int]] = set()
+        self._n_agregadas = 0
+        self.n_nodos = 0
+        self.n_aristas = 0
+        self.aislados = 0
+        self._padre = array('i')
+        self._n_componentes = 0
+        self._componentes_validas = True
+
+    # ------------------------------------------------------------------
+    # Construcción y eventos
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def desde_listas(cls, nodos: Iterable[Tuple[int, str]], aristas: Iterable[Tuple[int, int]]) -> 'Grafo':
+        """Construye el grafo de una vez (aristas repetidas o con nodos desconocidos se ignoran)"""
+        grafo = cls()
+        for id_nodo, nombre in nodos:
+            grafo.agregar_persona(id_nodo, nombre)
+        pares = set()
+        for a, b in aristas:
+            i, j = grafo._indice.get(a), grafo._indice.get(b)
+            if i is None or j is None or i == j:
+                continue
+            pares.add((i, j) if i < j else (j, i))
+        grafo._construir_csr(pares)
+        return grafo
+
+    @classmethod
+    def desde_aristas(cls, n: int, origenes: Iterable[int], destinos: Iterable[int]) -> 'Grafo':
+        """Grafo con nodos 0..n-1 a partir de aristas ya sin repetir (las de generar_red)"""
+        grafo = cls()
+        for i in range(n):
+            grafo.agregar_persona(i, f"Persona {i + 1}")
+        grafo._construir_csr(zip(origenes, destinos))
+        return grafo
+
+    @classmethod
+    def desde_dict(cls, datos: Dict) -> 'Grafo':
+        """Lee el formato de la página: {nodos: [{id, nombre}], aristas: [{from, to}]}"""
+        nodos = [(int(n['id']), str(n.get('nombre', n['id']))) for n in datos.get('nodos', [])]
+        aristas = [(int(a['from']), int(a['to'])) for a in datos.get('aristas', [])]
+        return cls.desde_listas(nodos, aristas)
+
+    def agregar_persona(self, id_nodo: int, nombre: Optional[str] = None) -> bool:
+        """Agrega un nodo; False si el id ya existe"""
+        if id_nodo in self._indice:
+            return False
+        i = len(self.ids)
+        self._indice[id_nodo] = i
+        self.ids.append(id_nodo)
+        self.nombres.append(nombre if nombre is not None else str(id_nodo))
+        self._vivo.append(1)
+        self._grado.append(0)
+        self._inicio.append(self._inicio[-1])
+        self._padre.append(i)
+        self.n_nodos += 1
+        self.aislados += 1
+        self._n_componentes += 1
+        return True
+
+    def crear_conexion(self, id1: int, id2: int) -> bool:
+        """Conecta dos personas; False si la conexión ya existe o no es válida"""
+        i, j = self._indice_vivo(id1), self._indice_vivo(id2)
+        if i == j or self._existe(i, j):
+            return False
+        par = (i, j) if i < j else (j, i)
+        if par in self._quitadas:
+            self._quitadas.discard(par)
+        else:
+            self._agregadas.setdefault(i, set()).add(j)
+            self._agregadas.setdefault(j, set()).add(i)
+            self._n_agregadas += 1
+        self._sumar_grado(i, 1)
+        self._sumar_grado(j, 1)
+        self.n_aristas += 1
+        if self._componentes_validas and self._unir(i, j):
+            self._n_componentes -= 1
+        self._compactar_si_conviene()
+        return True
+
+    def eliminar_arista(self, id1: int, id2: int) -> bool:
+        i, j = self._indice_vivo(id1), self._indice_vivo(id2)
+        if i == j or not self._existe(i, j):
+            return False
+        self._quitar(i, j)
+        self._compactar_si_conviene()
+        return True
+
+    def eliminar_nodo(self, id_nodo: int) -> bool:
+        """Quita la persona y todas sus conexiones"""
+        i = self._indice.get(id_nodo)
+        if i is None or not self._vivo[i]:
+            return False
+        for j in list(self.vecinos_indice(i)):
+            self._quitar(i, j)
+        self._vivo[i] = 0
+        del self._indice[id_nodo]
+        self.n_nodos -= 1
+        self.aislados -= 1
+        if self._componentes_validas:
+            # Un nodo aislado era una componente por sí solo
+            self._n_componentes -= 1
+        self._compactar_si_conviene()
+        return True
+
+    def _quitar(self, i: int, j: int):
+        par = (i, j) if i < j else (j, i)
+        if j in self._agregadas.get(i, ()):
+            self._agregadas[i].discard(j)
+            self._agregadas[j].discard(i)
+            self._n_agregadas -= 1
+        else:
+            self._quitadas.add(par)
+        self._sumar_grado(i, -1)
+        self._sumar_grado(j, -1)
+        self.n_aristas -= 1
+        self._componentes_validas = False
+
+    def _sumar_grado(self, i: int, delta: int):
+        antes = self._grado[i]
+        self._grado[i] = antes + delta
+        if antes == 0:
+            self.aislados -= 1
+        elif antes + delta == 0:
+            self.aislados += 1
+
+    def _indice_vivo(self, id_nodo: int) -> int:
+        i = self._indice.get(id_nodo)
+        if i is None:
+            raise KeyError(f"No existe la persona {id_nodo}")
+        return i
+
+    # ------------------------------------------------------------------
+    # Almacenamiento CSR
+    # ------------------------------------------------------------------
+
+    def _construir_csr(self, pares: Iterable[Tuple[int, int]]):
+        """Rehace los arreglos CSR a partir de pares (i < j) y vacía el delta"""
+        n = len(self.ids)
+        listas: List[List[int]] = [[] for _ in range(n)]
+        for i, j in pares:
+            listas[i].append(j)
+            listas[j].append(i)
+        inicio = array('q', [0]) * (n + 1)
+        vecinos = array('i')
+        total = 0
+        for i, lista in enumerate(listas):
+            lista.sort()
+            vecinos.extend(lista)
+            total += len(lista)
+            inicio[i + 1] = total
+        self._inicio = inicio
+        self._vecinos = vecinos
+        self._agregadas = {}
+        self._quitadas = set()
+        self._n_agregadas = 0
+        self._grado = array('i', (len(lista) for lista in listas))
+        self.n_aristas = total // 2
+        self.aislados = sum(1 for i in range(n) if self._vivo[i] and not self._grado[i])
+        self._componentes_validas = False
+
+    def _compactar_si_conviene(self):
+        """Vuelve a CSR puro cuando el delta crece demasiado"""
+        delta = self._n_agregadas + len(self._quitadas)
+        if delta > max(1024, len(self._vecinos) // 8):
+            self.compactar()
+
+    def compactar(self):
+        self._construir_csr(self.aristas_indices())
+
+    def _en_csr(self, i: int, j: int) -> bool:
+        inicio, fin = self._inicio[i], self._inicio[i + 1]
+        k = bisect_left(self._vecinos, j, inicio, fin)
+        return k < fin and self._vecinos[k] == j
+
+    def _existe(self, i: int, j: int) -> bool:
+        if j in self._agregadas.get(i, ()):
+            return True
+        par = (i, j) if i < j else (j, i)
+        return self._vivo[i] and self._vivo[j] and par not in self._quitadas and self._en_csr(i, j)
+
+    def vecinos_indice(self, i: int) -> Iterator[int]:
+        vivo = self._vivo
+        if self._quitadas:
+            quitadas = self._quitadas
+            for j in self._vecinos[self._inicio[i]:self._inicio[i + 1]]:
+                if vivo[j] and ((i, j) if i < j else (j, i)) not in quitadas:
+                    yield j
+        else:
+            for j in self._vecinos[self._inicio[i]:self._inicio[i + 1]]:
+                if vivo[j]:
+                    yield j
+        extra = self._agregadas.get(i)
+        if extra:
+            yield from extra
+
+    def aristas_indices(self) -> Iterator[Tuple[int, int]]:
+        for i in range(len(self.ids)):
+            if self._vivo[i]:
+                for j in self.vecinos_indice(i):
+                    if i < j:
+                        yield i, j
+
+    def _adyacencia(self) -> List[List[int]]:
+        """Listas de vecinos de todos los nodos, para los recorridos repetidos (BFS, Brandes)"""
+        return [list(self.vecinos_indice(i)) if self._vivo[i] else [] for i in range(len(self.ids))]
+
+    # ------------------------------------------------------------------
+    # Consultas
+    # ------------------------------------------------------------------
+
+    def grado(self, id_nodo: int) -> int:
+        return self._grado[self._indice_vivo(id_nodo)]
+
+    def vecinos(self, id_nodo: int) -> List[int]:
+        return [self.ids[j] for j in self.vecinos_indice(self._indice_vivo(id_nodo))]
+
+    def densidad(self) -> float:
+        """Aristas presentes sobre las posibles, entre 0 y 1 (calcularDensidad lo da en %)"""
+        maximo = self.n_nodos * (self.n_nodos - 1) // 2
+        return self.n_aristas / maximo if maximo else 0.0
+
+    def _raiz(self, i: int) -> int:
+        padre = self._padre
+        while padre[i] != i:
+            padre[i] = padre[padre[i]]
+            i = padre[i]
+        return i
+
+    def _unir(self, i: int, j: int) -> bool:
+        a, b = self._raiz(i), self._raiz(j)
+        if a == b:
+            return False
+        self._padre[a] = b
+        return True
+
+    def _recalcular_componentes(self):
+        n = len(self.ids)
+        self._padre = array('i', range(n))
+        componentes = self.n_nodos
+        for i, j in self.aristas_indices():
+            if self._unir(i, j):
+                componentes -= 1
+        self._n_componentes = componentes
+        self._componentes_validas = True
+
+    def numero_componentes(self) -> int:
+        if not self._componentes_validas:
+            self._recalcular_componentes()
+        return self._n_componentes
+
+    def tamanos_componentes(self) -> List[int]:
+        if not self._componentes_validas:
+            self._recalcular_componentes()
+        tamanos: Dict[int, int] = {}
+        for i in range(len(self.ids)):
+            if self._vivo[i]:
+                raiz = self._raiz(i)
+                tamanos[raiz] = tamanos.get(raiz, 0) + 1
+        return sorted(tamanos.values(), reverse=True)
+
+    def componentes(self) -> List[List[int]]:
+        """Ids de cada componente conexa, de la más grande a la más chica"""
+        if not self._componentes_validas:
+            self._recalcular_componentes()
+        grupos: Dict[int, List[int]] = {}
+        for i in range(len(self.ids)):
+            if self._vivo[i]:
+                grupos.setdefault(self._raiz(i), []).append(self.ids[i])
+        return sorted(grupos.values(), key=len, reverse=True)
+
+    def _bfs(self, origen: int, adyacencia: Optional[List[List[int]]] = None,
+             destino: Optional[int] = None) -> Dict[int, int]:
+        """Distancias desde 'origen' (índices); se detiene al alcanzar 'destino' si se indica"""
+        distancias = {origen: 0}
+        padres = {origen: -1}
+        frontera = [origen]
+        nivel = 0
+        while frontera:
+            nivel += 1
+            siguiente = []
+            for u in frontera:
+                vecinos = adyacencia[u] if adyacencia is not None else self.vecinos_indice(u)
+                for v in vecinos:
+                    if v not in distancias:
+                        distancias[v] = nivel
+                        padres[v] = u
+                        if v == destino:
+                            self._padres_bfs = padres
+                            return distancias
+                        siguiente.append(v)
+            frontera = siguiente
+        self._padres_bfs = padres
+        return distancias
+
+    def camino_mas_corto(self, desde: int, hasta: int) -> Optional[List[int]]:
+        """Ids del camino más corto (en número de conexiones), o None si no están conectados"""
+        i, j = self._indice_vivo(desde), self._indice_vivo(hasta)
+        distancias = self._bfs(i, destino=j)
+        if j not in distancias:
+            return None
+        camino = []
+        padres = self._padres_bfs
+        while j != -1:
+            camino.append(self.ids[j])
+            j = padres[j]
+        return camino[::-1]
+
+    def distancias(self, desde: int) -> Dict[int, int]:
+        """Distancia de 'desde' a cada persona alcanzable"""
+        return {self.ids[j]: d for j, d in self._bfs(self._indice_vivo(desde)).items()}
+
+    def _fuentes(self, muestras: Optional[int], semilla: int) -> List[int]:
+        vivos = [i for i in range(len(self.ids)) if self._vivo[i]]
+        if muestras is None or muestras >= len(vivos):
+            return vivos
+        return random.Random(semilla).sample(vivos, muestras)
+
+    def centralidad_grado(self) -> Dict[int, float]:
+        divisor = self.n_nodos - 1 or 1
+        return {self.ids[i]: self._grado[i] / divisor for i in range(len(self.ids)) if self._vivo[i]}
+
+    def centralidad_intermediacion(self, muestras: Optional[int] = None, semilla: int = 0) -> Dict[int, float]:
+        """
+        Intermediación normalizada con el algoritmo de Brandes (O(n·m)). Con
+        'muestras' sólo se recorre desde ese número de fuentes al azar y se
+        extrapola, lo que la hace viable en redes grandes
+        """
+        adyacencia = self._adyacencia()
+        n = len(self.ids)
+        fuentes = self._fuentes(muestras, semilla)
+        acumulado = [0.0] * n
+        distancia = [-1] * n
+        sigma = [0] * n
+        dependencia = [0.0] * n
+        for s in fuentes:
+            pila = [s]
+            predecesores: Dict[int, List[int]] = {s: []}
+            distancia[s] = 0
+            sigma[s] = 1
+            # La pila en orden de visita sirve también de cola del BFS
+            k = 0
+            while k < len(pila):
+                v = pila[k]
+                k += 1
+                dv = distancia[v] + 1
+                sv = sigma[v]
+                for w in adyacencia[v]:
+                    if distancia[w] < 0:
+                        distancia[w] = dv
+                        pila.append(w)
+                        predecesores[w] = [v]
+                        sigma[w] = sv
+                    elif distancia[w] == dv:
+                        sigma[w] += sv
+                        predecesores[w].append(v)
+            for w in reversed(pila):
+                coeficiente = (1 + dependencia[w]) / sigma[w]
+                for v in predecesores[w]:
+                    dependencia[v] += sigma[v] * coeficiente
+                if w != s:
+                    acumulado[w] += dependencia[w]
+            # Sólo se limpia lo visitado, así cada fuente cuesta O(alcanzados) y no O(n)
+            for w in pila:
+                distancia[w] = -1
+                sigma[w] = 0
+                dependencia[w] = 0.0
+        vivos = self.n_nodos
+        # Cada par se cuenta dos veces (grafo no dirigido) y se normaliza por los pares posibles
+        escala = (vivos / len(fuentes) if fuentes else 0) / ((vivos - 1) * (vivos - 2) or 1)
+        return {self.ids[i]: acumulado[i] * escala for i in range(n) if self._vivo[i]}
+
+    def centralidad_cercania(self, muestras: Optional[int] = None, semilla: int = 0) -> Dict[int, float]:
+        """
+        Cercanía de Wasserman-Faust (válida con varias componentes). Con
+        'muestras' la suma de distancias de cada nodo se estima desde ese
+        número de pivotes al azar (Eppstein-Wang) en lugar de un BFS por nodo
+        """
+        adyacencia = self._adyacencia()
+        n = len(self.ids)
+        vivos = self.n_nodos
+        if vivos < 2:
+            return {self.ids[i]: 0.0 for i in range(n) if self._vivo[i]}
+        if muestras is None or muestras >= vivos:
+            resultado = {}
+            for i in range(n):
+                if self._vivo[i]:
+                    distancias = self._bfs(i, adyacencia)
+                    alcanzables = len(distancias) - 1
+                    suma = sum(distancias.values())
+                    resultado[self.ids[i]] = (alcanzables / suma) * (alcanzables / (vivos - 1)) if suma else 0.0
+            return resultado
+        pivotes = self._fuentes(muestras, semilla)
+        sumas = [0] * n
+        alcances = [0] * n
+        for p in pivotes:
+            for v, d in self._bfs(p, adyacencia).items():
+                sumas[v] += d
+                alcances[v] += 1
+        resultado = {}
+        for i in range(n):
+            if self._vivo[i]:
+                # Fracción de pivotes alcanzados ~ tamaño relativo de la componente
+                alcanzables = alcances[i] / len(pivotes) * (vivos - 1)
+                suma = sumas[i] / alcances[i] * alcanzables if alcances[i] else 0
+                resultado[self.ids[i]] = (alcanzables / suma) * (alcanzables / (vivos - 1)) if suma else 0.0
+        return resultado
+
+    def estadisticas(self) -> Dict:
+        grados = [self._grado[i] for i in range(len(self.ids)) if self._vivo[i]]
+        tamanos = self.tamanos_componentes()
+        return {
+            'nodos': self.n_nodos,
+            'aristas': self.n_aristas,
+            'densidad': round(self.densidad() * 100, 4),
+            'grado_promedio': round(2 * self.n_aristas / self.n_nodos, 3) if self.n_nodos else 0,
+            'grado_maximo': max(grados, default=0),
+            'aislados': self.aislados,
+            'componentes': len(tamanos),
+            'componente_mayor': tamanos[0] if tamanos else 0,
+        }
+
+    def a_dict(self) -> Dict:
+        """Formato de la página: nodos con su número de conexiones y aristas from/to"""
+        return {
+            'nodos': [{'id': self.ids[i], 'nombre': self.nombres[i], 'conexiones': self._grado[i]}
+                      for i in range(len(self.ids)) if self._vivo[i]],
+            'aristas': [{'from': self.ids[i], 'to': self.ids[j]} for i, j in self.aristas_indices()],
+        }
+
+
+# ----------------------------------------------------------------------
+# Generadores de redes aleatorias
+# ----------------------------------------------------------------------
+
+MODELOS = ('erdos_renyi', 'barabasi_albert', 'mundo_pequeno')
+
+def _pares_de_indices(indices) -> Tuple[array, array]:
+    """
+    Pares (v, w), w < v, de índices en orden creciente; el par de índice k es
+    el que ocupa la posición k al recorrer los pares fila por fila
+    """
+    if np is not None:
+        k = np.asarray(indices, dtype=np.int64)
+        v = ((1 + np.sqrt(8 * k.astype(np.float64) + 1)) // 2).astype(np.int64)
+        # Corrige los redondeos de la raíz en coma flotante
+        v -= (v * (v - 1) // 2 > k)
+        v += ((v + 1) * v // 2 <= k)
+        w = k - v * (v - 1) // 2
+        return array('i', v.astype(np.int32).tobytes()), array('i', w.astype(np.int32).tobytes())
+    # Los índices llegan ordenados: basta avanzar fila por fila
+    origenes, destinos = array('i'), array('i')
+    v, inicio, fin = 1, 0, 1
+    for k in indices:
+        while k >= fin:
+            v += 1
+            inicio, fin = fin, fin + v
+        origenes.append(v)
+        destinos.append(k - inicio)
+    return origenes, destinos
+
+def _erdos_renyi_p(n: int, p: float, semilla: int) -> Tuple[array, array]:
+    """
+    G(n, p) saltando directo a la siguiente arista con un salto geométrico
+    (Batagelj-Brandes): O(n + m) en lugar de tirar un dado por cada par
+    """
+    total = n * (n - 1) // 2
+    if p <= 0 or total == 0:
+        return array('i'), array('i')
+    if p >= 1:
+        return _pares_de_indices(range(total))
+    if np is not None:
+        rng = np.random.default_rng(semilla)
+        partes = []
+        ultimo = -1
+        while True:
+            # Saltos suficientes para cubrir lo que falta, con un 10 % de margen
+            tamano = int((total - ultimo) * p * 1.1) + 1024
+            indices = ultimo + np.cumsum(rng.geometric(p, tamano))
+            if indices[-1] >= total:
+                partes.append(indices[indices < total])
+                break
+            partes.append(indices)
+            ultimo = int(indices[-1])
+        return _pares_de_indices(np.concatenate(partes))
+
+    aleatorio = random.Random(semilla).random
+    log = math.log
+    log_q = log(1 - p)
+    origenes, destinos = array('i'), array('i')
+    v, w = 1, -1
+    while v < n:
+        w += 1 + int(log(1 - aleatorio()) / log_q)
+        while w >= v and v < n:
+            w -= v
+            v += 1
+        if v < n:
+            origenes.append(v)
+            destinos.append(w)
+    return origenes, destinos
+
+def _erdos_renyi_m(n: int, m: int, semilla: int) -> Tuple[array, array]:
+    """G(n, m): exactamente m pares distintos, sorteados sin reemplazo"""
+    total = n * (n - 1) // 2
+    m = min(m, total)
+    if np is not None:
+        indices = np.random.default_rng(semilla).choice(total, m, replace=False, shuffle=False)
+        indices.sort()
+        return _pares_de_indices(indices)
+    return _pares_de_indices(sorted(random.Random(semilla).sample(range(total), m)))
+
+def _barabasi_albert(n: int, m: int, semilla: int) -> Tuple[array, array]:
+    """
+    Enlace preferencial: cada nodo nuevo se une a m nodos elegidos con
+    probabilidad proporcional a su grado, sorteando sobre la lista de
+    extremos de todas las aristas (un nodo aparece tantas veces como su grado)
+    """
+    aleatorio = random.Random(semilla).random
+    origenes, destinos = array('i'), array('i')
+    extremos = array('i')
+    objetivos = list(range(m))
+    for nuevo in range(m, n):
+        for objetivo in objetivos:
+            origenes.append(nuevo)
+            destinos.append(objetivo)
+        extremos.extend(objetivos)
+        extremos.extend([nuevo] * m)
+        largo = len(extremos)
+        elegidos = set()
+        while len(elegidos) < m:
+            elegidos.add(extremos[int(aleatorio() * largo)])
+        objetivos = sorted(elegidos)
+    return origenes, destinos
+
+def _mundo_pequeno(n: int, k: int, beta: float, semilla: int) -> Tuple[array, array]:
+    """
+    Watts-Strogatz: anillo donde cada nodo se une a sus k/2 vecinos de cada
+    lado, y cada arista se reconecta a un destino al azar con probabilidad
+    beta. Las aristas del anillo no se guardan: se reconocen por la distancia
+    en el anillo, y sólo se guardan las quitadas y las nuevas
+    """
+    rnd = random.Random(semilla)
+    mitad = k // 2
+    quitadas: Set[Tuple[int, int]] = set()
+    nuevas: Set[Tuple[int, int]] = set()
+    grado = [2 * mitad] * n
+
+    def existe(u, v):
+        par = (u, v) if u < v else (v, u)
+        if par in nuevas:
+            return True
+        distancia = abs(u - v)
+        return min(distancia, n - distancia) <= mitad and par not in quitadas
+
+    if 0 < beta:
+        log_q = math.log(1 - beta) if beta < 1 else None
+        total = n * mitad
+        e = -1
+        while True:
+            # Salto geométrico hasta la siguiente arista a reconectar (orden: salto j, nodo i)
+            e += 1 if log_q is None else 1 + int(math.log(1 - rnd.random()) / log_q)
+            if e >= total:
+                break
+            j, u = divmod(e, n)
+            v = (u + j + 1) % n
+            if grado[u] >= n - 1 or not existe(u, v):
+                continue
+            w = rnd.randrange(n)
+            while w == u or existe(u, w):
+                w = rnd.randrange(n)
+            par = (u, v) if u < v else (v, u)
+            if par in nuevas:
+                nuevas.discard(par)
+            else:
+                quitadas.add(par)
+            nuevas.add((u, w) if u < w else (w, u))
+            grado[v] -= 1
+            grado[w] += 1
+
+    origenes, destinos = array('i'), array('i')
+    for j in range(1, mitad + 1):
+        for u in range(n):
+            v = (u + j) % n
+            par = (u, v) if u < v else (v, u)
+            if par not in quitadas and par not in nuevas:
+                origenes.append(u)
+                destinos.append(v)
+    for u, v in sorted(nuevas):
+        origenes.append(u)
+        destinos.append(v)
+    return origenes, destinos
+
+def generar_red(modelo: str, nodos: int, semilla: int = 0, p: Optional[float] = None,
+                aristas: Optional[int] = None, m: Optional[int] = None, k: Optional[int] = None,
+                beta: Optional[float] = None) -> Tuple[array, array]:
+    """
+    Genera una red aleatoria reproducible y devuelve sus aristas como dos
+    arreglos (origen, destino), sin lazos ni repetidas:
+      erdos_renyi      con 'p' (cada par con probabilidad p) o 'aristas' (exactamente esas)
+      barabasi_albert  con 'm' (conexiones de cada nodo nuevo)
+      mundo_pequeno    con 'k' (vecinos en el anillo, par) y 'beta' (probabilidad de reconectar)
+    La misma semilla da la misma red (con o sin numpy, pero no entre ambos)
+    """
+    if nodos < 0:
+        raise ValueError("El número de nodos no puede ser negativo")
+    if modelo == 'erdos_renyi':
+        if (p is None) == (aristas is None):
+            raise ValueError("Indica 'p' o 'aristas' (sólo uno)")
+        if aristas is not None:
+            if aristas < 0:
+                raise ValueError("'aristas' no puede ser negativo")
+            return _erdos_renyi_m(nodos, aristas, semilla)
+        if not 0 <= p <= 1:
+            raise ValueError("'p' debe estar entre 0 y 1")
+        return _erdos_renyi_p(nodos, p, semilla)
+    if modelo == 'barabasi_albert':
+        if m is None or not 1 <= m < max(nodos, 2):
+            raise ValueError("'m' debe estar entre 1 y el número de nodos - 1")
+        return _barabasi_albert(nodos, m, semilla)
+    if modelo == 'mundo_pequeno':
+        if k is None or k < 2 or k % 2 or k >= nodos:
+            raise ValueError("'k' debe ser par, al menos 2 y menor que el número de nodos")
+        if beta is None or not 0 <= beta <= 1:
+            raise ValueError("'beta' debe estar entre 0 y 1")
+        return _mundo_pequeno(nodos, k, beta, semilla)
+    raise ValueError(f"Modelo desconocido '{modelo}'; use {', '.join(MODELOS)}")
+
+def aristas_esperadas(modelo: str, nodos: int, p: Optional[float] = None, aristas: Optional[int] = None,
+                      m: Optional[int] = None, k: Optional[int] = None) -> float:
+    """Número de aristas (esperado en G(n, p)) antes de generar, para validar límites"""
+    if modelo == 'erdos_renyi':
+        total = nodos * (nodos - 1) // 2
+        return min(aristas, total) if aristas is not None else total * (p or 0)
+    if modelo == 'barabasi_albert':
+        return max(nodos - (m or 0), 0) * (m or 0)
+    return nodos * ((k or 0) // 2)
+
+
+def mas_centrales(centralidad: Dict[int, float], cantidad: int = 10) -> List[Tuple[int, float]]:
+    return heapq.nlargest(cantidad, centralidad.items(), key=lambda par: par[1])
+
+
+if __name__ == "__main__":
+    grafo = Grafo.desde_listas(
+        [(0, "Ana"), (1, "Luis"), (2, "Carla"), (3, "Pedro"), (4, "Sofía"), (5, "Diego")],
+        [(0, 1), (1, 2), (2, 0), (2, 3), (4, 5)],
+    )
+    print("Estadísticas:", grafo.estadisticas())
+    print("Camino de Ana a Pedro:", [grafo.nombres[grafo._indice[i]] for i in grafo.camino_mas_corto(0, 3)])
+    grafo.crear_conexion(3, 4)
+    print("Tras conectar Pedro y Sofía:", grafo.estadisticas())
+    grafo.eliminar_nodo(2)
+    print("Tras eliminar a Carla:", grafo.estadisticas())
+    print("Más intermediarios:", mas_centrales(grafo.centralidad_intermediacion(), 3))
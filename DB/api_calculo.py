@@ -0,0 +1,227 @@
+import time
+from concurrent.futures import TimeoutError as TiempoAgotado
+from metricas import REGISTRO
+import motores
+
+# Límites de tamaño y complejidad de las peticiones
+MAX_CUERPO_API = 64 * 1024
+MAX_EXPRESION = 2000
+MAX_VARIABLES = 22
+MAX_VARIABLES_MINIMIZAR = 12
+MAX_VARIABLES_MINTERMINOS = 16
+MAX_VARIABLES_MAPA = 8
+MAX_DIGITOS = 10_000
+MAX_PRECISION = 1000
+MAX_VALOR_CONJUNTOS = 10 ** 12
+MAX_CONJUNTOS = 12
+# Sin todas las intersecciones o uniones hace falta la eliminación gaussiana (~1 s con 8)
+MAX_CONJUNTOS_ELIMINACION = 8
+TIEMPO_MAXIMO = 30
+
+TIEMPO_MOTOR = REGISTRO.histograma('proyecto_md_motor_segundos',
+                                   'Duración de los cálculos de /api por ruta (incluye la ida y vuelta al proceso)',
+                                   ('ruta', 'resultado'))
+
+class LimiteExcedido(ValueError):
+    """La petición es válida pero supera los límites de complejidad del servidor"""
+
+def _entero(datos, clave, defecto=None, minimo=None, maximo=None):
+    valor = datos.get(clave, defecto)
+    if valor is None:
+        return None
+    if isinstance(valor, bool) or not isinstance(valor, (int, str)):
+        raise ValueError(f"'{clave}' debe ser un entero")
+    try:
+        valor = int(valor)
+    except ValueError:
+        raise ValueError(f"'{clave}' debe ser un entero") from None
+    if minimo is not None and valor < minimo or maximo is not None and valor > maximo:
+        raise LimiteExcedido(f"'{clave}' debe estar entre {minimo} y {maximo}")
+    return valor
+
+_cache_booleana = None
+
+def calcular_booleana(datos, progreso=None):
+    """
+    Tabla de verdad (como máscara de bits en hexadecimal, fila 0 en el bit 0),
+    mintérminos, suma de productos mínima y mapa de Karnaugh, cada parte
+    limitada según el número de variables. Si se da 'progreso', las tablas
+    grandes se evalúan por bloques llamando a progreso(filas_hechas, filas_totales)
+    """
+    global _cache_booleana
+    booleana = motores.cargar('logica_booleana')
+    expresion = datos.get('expresion')
+    if not isinstance(expresion, str) or not expresion.strip():
+        raise ValueError("Falta la expresión")
+    if len(expresion) > MAX_EXPRESION:
+        raise LimiteExcedido(f"La expresión supera los {MAX_EXPRESION} caracteres")
+
+    calc = booleana.CalculadoraBooleana(expresion)
+    n_vars = calc.n_vars
+    if n_vars > MAX_VARIABLES:
+        raise LimiteExcedido(f"La expresión tiene {n_vars} variables; el máximo es {MAX_VARIABLES}")
+    variables = calc.variables
+
+    if n_vars <= MAX_VARIABLES_MINIMIZAR:
+        # Caché por proceso: las expresiones equivalentes salvo nombres se calculan una vez
+        if _cache_booleana is None:
+            _cache_booleana = booleana.CacheBooleana(capacidad=128)
+        analisis = _cache_booleana.analizar(expresion)
+        resultados = analisis['resultados']
+        simplificada = analisis['simplificada']
+        mapa = analisis['mapa_karnaugh']
+    elif progreso is not None:
+        resultados = 0
+        total = 1 << n_vars
+        for inicio, cantidad, bits in calc.iterar_bloques():
+            resultados |= bits << inicio
+            progreso(inicio + cantidad, total)
+        simplificada = None
+        mapa = None
+    else:
+        resultados = calc.evaluar_bits()
+        simplificada = None
+        mapa = None
+
+    respuesta = {
+        'expresion': expresion,
+        'variables': variables,
+        'n_vars': n_vars,
+        'filas': 1 << n_vars,
+        'resultados': format(resultados, 'x'),
+        'verdaderas': bin(resultados).count('1'),
+        'simplificada': simplificada,
+    }
+    if n_vars <= MAX_VARIABLES_MINTERMINOS:
+        respuesta['minterminos'] = [i for i, c in enumerate(reversed(bin(resultados)[2:])) if c == '1']
+    if mapa is not None and n_vars <= MAX_VARIABLES_MAPA:
+        respuesta['mapa_karnaugh'] = mapa.a_dict(variables)
+    return respuesta
+
+def calcular_binaria(datos):
+    """Convierte un número a una o varias bases; con 'pasos' incluye la traza de divisiones"""
+    binaria = motores.cargar('logica_binaria')
+    numero = datos.get('numero')
+    if isinstance(numero, bool) or not isinstance(numero, (int, str)):
+        raise ValueError("'numero' debe ser un texto o un entero")
+    numero = str(numero).strip()
+    if len(numero) > MAX_DIGITOS:
+        raise LimiteExcedido(f"El número supera los {MAX_DIGITOS} dígitos")
+    base_origen = _entero(datos, 'base_origen', 10, 2, 36)
+    precision = _entero(datos, 'precision', 20, 0, MAX_PRECISION)
+    ancho = _entero(datos, 'ancho', None, 1, 4 * MAX_DIGITOS)
+    destinos = datos.get('bases', datos.get('base_destino', [2, 8, 16]))
+    if not isinstance(destinos, list):
+        destinos = [destinos]
+    if not destinos or len(destinos) > 35:
+        raise ValueError("Indica entre 1 y 35 bases de destino")
+    bases = [_entero({'base': b}, 'base', None, 2, 36) for b in destinos]
+
+    respuesta = {
+        'numero': numero,
+        'base_origen': base_origen,
+        'resultados': {
+            str(base): binaria.convertir_numero(numero, base, base_origen, precision, ancho)
+            for base in bases
+        },
+    }
+    if datos.get('pasos'):
+        valor = binaria.base_a_entero(numero, base_origen) if '.' not in numero else None
+        if valor is None or valor < 0:
+            raise ValueError("Los pasos sólo se muestran para enteros no negativos")
+        if valor.bit_length() > 256:
+            raise LimiteExcedido("Los pasos sólo se muestran para números de hasta 256 bits")
+        respuesta['pasos'] = {str(base): binaria.traza_dict(valor, base) for base in bases}
+    return respuesta
+
+# Parámetros que acepta cada tipo de problema de conjuntos
+PROBLEMAS_CONJUNTOS = {
+    'dos': ('problema_dos_conjuntos', ('total', 'solo_a', 'solo_b', 'ninguno'), ('cat_a', 'cat_b')),
+    'dos_con_ambos': ('problema_dos_conjuntos_con_ambos', ('total', 'solo_a', 'solo_b', 'ambos'), ('cat_a', 'cat_b')),
+    'tres': ('problema_tres_conjuntos',
+             ('total', 'solo_a', 'solo_b', 'solo_c', 'a_y_b', 'a_y_c', 'b_y_c', 'todos', 'ninguno'),
+             ('cat_a', 'cat_b', 'cat_c')),
+}
+
+def _calcular_conjuntos_general(conjuntos, datos):
+    """Problema de k conjuntos con cualquier mezcla de regiones, totales, intersecciones y uniones"""
+    categorias = datos.get('categorias')
+    if not isinstance(categorias, list) or not all(isinstance(c, str) and c for c in categorias):
+        raise ValueError("'categorias' debe ser una lista de nombres")
+    if len(categorias) > MAX_CONJUNTOS:
+        raise LimiteExcedido(f"Se admiten hasta {MAX_CONJUNTOS} conjuntos")
+    argumentos = {'total': _entero(datos, 'total', None, 0, MAX_VALOR_CONJUNTOS)}
+    for clave in ('totales', 'intersecciones', 'regiones', 'uniones'):
+        valores = datos.get(clave) or {}
+        if not isinstance(valores, dict) or len(valores) > 1 << len(categorias):
+            raise ValueError(f"'{clave}' debe ser un objeto con a lo sumo {1 << len(categorias)} datos")
+        argumentos[clave] = {nombre: _entero(valores, nombre, None, 0, MAX_VALOR_CONJUNTOS)
+                             for nombre in valores}
+    try:
+        solucion = conjuntos.resolver_conjuntos(categorias, max_conjuntos_eliminacion=MAX_CONJUNTOS_ELIMINACION,
+                                                **argumentos)
+    except conjuntos.DemasiadosConjuntos as e:
+        raise LimiteExcedido(str(e)) from None
+    return solucion.a_dict()
+
+def calcular_conjuntos(datos):
+    """Resuelve un problema de 2 o 3 conjuntos y devuelve el reporte con su diagrama"""
+    conjuntos = motores.cargar('logica_conjuntos')
+    problema = datos.get('problema', 'dos')
+    if problema == 'general':
+        return _calcular_conjuntos_general(conjuntos, datos)
+    if problema not in PROBLEMAS_CONJUNTOS:
+        raise ValueError(f"Problema desconocido '{problema}'; use {', '.join(PROBLEMAS_CONJUNTOS)} o general")
+    metodo, numericos, categorias = PROBLEMAS_CONJUNTOS[problema]
+    argumentos = {}
+    for clave in numericos:
+        valor = _entero(datos, clave, None, 0, MAX_VALOR_CONJUNTOS)
+        if valor is not None:
+            argumentos[clave] = valor
+    if 'total' not in argumentos:
+        raise ValueError("Falta el total")
+    if argumentos['total'] == 0:
+        raise ValueError("El total debe ser mayor que cero")
+    for clave in categorias:
+        if clave in datos:
+            nombre = str(datos[clave]).strip()
+            if not nombre or len(nombre) > 40:
+                raise ValueError(f"'{clave}' debe tener entre 1 y 40 caracteres")
+            argumentos[clave] = nombre
+
+    solucionador = conjuntos.SolucionadorConjuntos()
+    reporte = getattr(solucionador, metodo)(**argumentos)
+    reporte['diagrama'] = solucionador.diagrama_venn_ascii()
+    return reporte
+
+# Ruta -> (función, tipo de trabajo con el que se envía al grupo de procesos o None)
+RUTAS = {
+    '/api/booleana': (calcular_booleana, 'booleana'),
+    '/api/binaria': (calcular_binaria, None),
+    '/api/conjuntos': (calcular_conjuntos, 'conjuntos'),
+}
+
+def calcular(ruta, datos, trabajos=None, tiempo_maximo=TIEMPO_MAXIMO):
+    """
+    Ejecuta el cálculo de la ruta. Los motores pesados van al grupo de
+    procesos de la cola de trabajos (si hay una) para no ocupar el GIL de los
+    hilos HTTP; cuentan como pendientes y se cancelan al agotar el tiempo.
+    Lanza KeyError si la ruta no existe, ValueError/LimiteExcedido si los
+    datos no son válidos, ColaLlena si hay demasiados cálculos pendientes,
+    ColaNoDisponible si murió un proceso y TiempoAgotado si el cálculo tarda
+    demasiado
+    """
+    funcion, tipo = RUTAS[ruta]
+    if not isinstance(datos, dict):
+        raise ValueError("El cuerpo debe ser un objeto JSON")
+    inicio = time.perf_counter()
+    resultado = 'error'
+    try:
+        if tipo is not None and trabajos is not None:
+            respuesta = trabajos.ejecutar(tipo, datos, tiempo_maximo)
+        else:
+            respuesta = funcion(datos)
+        resultado = 'ok'
+        return respuesta
+    finally:
+        TIEMPO_MOTOR.observar(time.perf_counter() - inicio, ruta, resultado)
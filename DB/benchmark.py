@@ -0,0 +1,413 @@
+import argparse
+import http.client
+import itertools
+import json
+import math
+import os
+import platform
+import random
+import shutil
+import statistics
+import string
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import timeit
+import urllib.parse
+from datetime import datetime, timezone
+import motores
+
+RAIZ = os.path.dirname(os.path.abspath(__file__))
+# Carpeta de resultados (ignorada por git)
+RUTA_RESULTADOS = os.path.join(RAIZ, 'resultados_benchmark')
+VERSION_FORMATO = 1
+
+# Variables de las expresiones booleanas: mayúsculas, porque 'y' y 'v' son operadores
+LETRAS = string.ascii_uppercase
+
+# ----------------------------------------------------------------------
+# Micro-benchmarks de los motores
+# ----------------------------------------------------------------------
+
+def expresion_booleana(n_vars):
+    """Expresión fija de n variables: cada una aparece en dos términos"""
+    letras = LETRAS[:n_vars]
+    siguientes = letras[1:] + letras[:1]
+    terminos = [f'({a} y ~{b})' if i % 2 == 0 else f'({a} <--> {b})'
+                for i, (a, b) in enumerate(zip(letras, siguientes))]
+    return ' v '.join(terminos)
+
+def _casos_binaria():
+    binaria = motores.cargar('logica_binaria')
+    rnd = random.Random(1)
+    decimal_grande = ''.join(rnd.choice(string.digits) for _ in range(1000)).lstrip('0')
+    entero_enorme = rnd.getrandbits(100_000)
+    lote = [rnd.randrange(1 << 32) for _ in range(100_000)]
+    return {
+        'binaria/convertir_numero_pequeno': lambda: binaria.convertir_numero('1234567', 2),
+        'binaria/convertir_numero_1000_digitos_b2': lambda: binaria.convertir_numero(decimal_grande, 2),
+        'binaria/convertir_numero_1000_digitos_b36': lambda: binaria.convertir_numero(decimal_grande, 36),
+        'binaria/convertir_fraccion_b3_precision_200': lambda: binaria.convertir_numero('0.1', 3, precision=200),
+        'binaria/entero_a_base_100000_bits_b7': lambda: binaria.entero_a_base(entero_enorme, 7),
+        'binaria/convertir_lote_100000': lambda: binaria.convertir_lote(lote),
+        'binaria/traza_dict': lambda: binaria.traza_dict(987654321, 2),
+    }
+
+def _casos_booleana(max_variables):
+    booleana = motores.cargar('logica_booleana')
+    casos = {}
+    for n in (4, 8, 12, 16, 20, 22):
+        if n > max_variables:
+            continue
+        expresion = expresion_booleana(n)
+        casos[f'booleana/compilar_{n}'] = lambda e=expresion: booleana.CalculadoraBooleana(e)
+        calc = booleana.CalculadoraBooleana(expresion)
+        casos[f'booleana/tabla_bits_{n}'] = calc.evaluar_bits
+        casos[f'booleana/bloques_{n}'] = lambda c=calc: sum(bits.bit_count() for _, _, bits in c.iterar_bloques())
+        # La tabla como listas ocupa memoria proporcional a 2^n: sólo hasta 16 variables
+        if n <= 16:
+            casos[f'booleana/tabla_listas_{n}'] = calc.generar_tabla_verdad
+            filas = booleana.CalculadoraBooleana(expresion, motor='filas')
+            casos[f'booleana/tabla_filas_{n}'] = filas.generar_tabla_verdad
+    return casos
+
+def _casos_simplificador(max_variables):
+    booleana = motores.cargar('logica_booleana')
+    casos = {}
+    for n in (4, 6, 8, 10, 12, 16):
+        if n > max_variables:
+            continue
+        calc = booleana.CalculadoraBooleana(expresion_booleana(n))
+        resultados = calc.evaluar_bits()
+        casos[f'simplificador/expresion_{n}'] = lambda c=calc, r=resultados: c.simplificar_quine_mccluskey(r)
+    # Funciones aleatorias (con semilla): el peor caso habitual de Quine-McCluskey
+    rnd = random.Random(2)
+    for n in (4, 6, 8):
+        calc = booleana.CalculadoraBooleana(expresion_booleana(n))
+        resultados = rnd.getrandbits(1 << n)
+        casos[f'simplificador/aleatoria_{n}'] = lambda c=calc, r=resultados: c.simplificar_quine_mccluskey(r)
+    return casos
+
+def _intersecciones(regiones, k):
+    """|intersección| de cada subconjunto no vacío, a partir de las regiones exactas"""
+    return {m: sum(regiones[s] for s in range(m, 1 << k) if s & m == m) for m in range(1, 1 << k)}
+
+def _casos_conjuntos():
+    conjuntos = motores.cargar('logica_conjuntos')
+    casos = {
+        'conjuntos/dos_conjuntos': lambda: conjuntos.SolucionadorConjuntos().problema_dos_conjuntos(100, 30, 25, 10),
+        'conjuntos/tres_conjuntos': lambda: conjuntos.SolucionadorConjuntos().problema_tres_conjuntos(
+            100, 10, 12, 8, 5, 6, 7, 3, 49),
+    }
+    rnd = random.Random(3)
+    n = 100_000
+    columnas = [[rnd.randrange(50) for _ in range(n)] for _ in range(7)]
+    total = [sum(fila) + 10 for fila in zip(*columnas)]
+    casos['conjuntos/lote_tres_100000'] = lambda: conjuntos.resolver_lote_tres_conjuntos(total, *columnas)
+    for k in (3, 6, 10):
+        categorias = list(LETRAS[:k])
+        regiones = [rnd.randrange(100) for _ in range(1 << k)]
+        intersecciones = _intersecciones(regiones, k)
+        casos[f'conjuntos/general_{k}'] = lambda c=categorias, t=sum(regiones), i=intersecciones: \
+            conjuntos.resolver_conjuntos(c, total=t, intersecciones=i)
+    return casos
+
+def casos_micro(max_variables=22):
+    """{nombre: función sin argumentos}; la preparación de los datos queda fuera de la medición"""
+    casos = {}
+    casos.update(_casos_binaria())
+    casos.update(_casos_booleana(max_variables))
+    casos.update(_casos_simplificador(max_variables))
+    casos.update(_casos_conjuntos())
+    return casos
+
+def medir(funcion, repeticiones=5):
+    """
+    Como timeit: calibra cuántas llamadas llenan al menos 0,2 s y repite la
+    medición; la mediana de las repeticiones es el valor a comparar
+    """
+    temporizador = timeit.Timer(funcion)
+    llamadas, _ = temporizador.autorange()
+    tiempos = [t / llamadas for t in temporizador.repeat(repeticiones, llamadas)]
+    return {
+        'mediana': statistics.median(tiempos),
+        'minimo': min(tiempos),
+        'llamadas': llamadas,
+        'repeticiones': repeticiones,
+    }
+
+def correr_micro(filtro=None, repeticiones=5, max_variables=22, mostrar=True):
+    resultados = {}
+    for nombre, funcion in casos_micro(max_variables).items():
+        if filtro and filtro not in nombre:
+            continue
+        resultados[nombre] = medir(funcion, repeticiones)
+        if mostrar:
+            print(f"{nombre:50} {_tiempo(resultados[nombre]['mediana']):>12}", flush=True)
+    return resultados
+
+# ----------------------------------------------------------------------
+# Generador de carga contra el Servidor, en el mismo proceso
+# ----------------------------------------------------------------------
+
+_correos = itertools.count()
+
+def _peticion_registro():
+    n = next(_correos)
+    cuerpo = urllib.parse.urlencode({'nombre': f'Carga {n}', 'correo': f'carga{n}-{os.getpid()}@ejemplo.com',
+                                     'contraseña': f'clave-de-carga-{n}'})
+    return 'POST', '/registro', cuerpo.encode(), {'Content-Type': 'application/x-www-form-urlencoded'}
+
+# Ruta -> función que arma (método, ruta, cuerpo, cabeceras) de cada petición
+PETICIONES = {
+    '/': lambda: ('GET', '/', None, {}),
+    '/registro': _peticion_registro,
+}
+
+def percentil(ordenados, p):
+    """Percentil por rango más cercano de una lista ya ordenada"""
+    if not ordenados:
+        return 0.0
+    return ordenados[min(len(ordenados) - 1, max(0, math.ceil(p / 100 * len(ordenados)) - 1))]
+
+def _cliente(puerto, armar, pendientes, latencias, errores):
+    conexion = http.client.HTTPConnection('127.0.0.1', puerto, timeout=60)
+    propias = []
+    fallidas = 0
+    try:
+        while next(pendientes, None) is not None:
+            metodo, ruta, cuerpo, cabeceras = armar()
+            inicio = time.perf_counter()
+            try:
+                conexion.request(metodo, ruta, cuerpo, cabeceras)
+                respuesta = conexion.getresponse()
+                respuesta.read()
+            except (OSError, http.client.HTTPException):
+                fallidas += 1
+                conexion.close()
+                continue
+            propias.append(time.perf_counter() - inicio)
+            if respuesta.status >= 400:
+                fallidas += 1
+    finally:
+        conexion.close()
+        latencias.extend(propias)
+        errores.append(fallidas)
+
+def generar_carga(puerto, ruta, concurrencia=8, peticiones=1000):
+    """Lanza 'peticiones' contra una ruta con 'concurrencia' conexiones keep-alive"""
+    armar = PETICIONES[ruta]
+    pendientes = iter(range(peticiones))
+    latencias = []
+    errores = []
+    hilos = [threading.Thread(target=_cliente, args=(puerto, armar, pendientes, latencias, errores))
+             for _ in range(concurrencia)]
+    inicio = time.perf_counter()
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    duracion = time.perf_counter() - inicio
+    latencias.sort()
+    return {
+        'peticiones': len(latencias),
+        'errores': sum(errores),
+        'concurrencia': concurrencia,
+        'segundos': duracion,
+        'por_segundo': len(latencias) / duracion if duracion else 0.0,
+        'p50': percentil(latencias, 50),
+        'p90': percentil(latencias, 90),
+        'p99': percentil(latencias, 99),
+        'maximo': latencias[-1] if latencias else 0.0,
+    }
+
+def correr_carga(rutas=('/', '/registro'), concurrencia=8, peticiones=1000, trabajadores=16,
+                 calentamiento=50, mostrar=True):
+    """
+    Levanta el Servidor en un puerto libre con una copia temporal de la base
+    (las altas de /registro no tocan la real) y mide cada ruta por separado
+    """
+    carpeta = tempfile.mkdtemp(prefix='proyecto_md_carga_')
+    base = os.path.join(RAIZ, 'DBusuariosSqlite.db')
+    copia = os.path.join(carpeta, 'carga.db')
+    if os.path.exists(base):
+        shutil.copyfile(base, copia)
+    # conecion lee la ruta al importarse: debe fijarse antes de importar el servidor
+    os.environ['PROYECTO_MD_DB'] = copia
+    import servidor
+    from conecion import obtener_pool
+
+    server = servidor.ServidorConcurrente(('127.0.0.1', 0), servidor.Servidor, trabajadores=trabajadores,
+                                          cola=max(64, concurrencia))
+    puerto = server.server_address[1]
+    obtener_pool()
+    servidor.CACHE_ESTATICOS.precargar()
+    hilo = threading.Thread(target=server.serve_forever, daemon=True)
+    hilo.start()
+    resultados = {}
+    try:
+        for ruta in rutas:
+            if calentamiento:
+                generar_carga(puerto, ruta, min(concurrencia, calentamiento), calentamiento)
+            resultados[ruta] = generar_carga(puerto, ruta, concurrencia, peticiones)
+            if mostrar:
+                r = resultados[ruta]
+                print(f"{ruta:12} {r['por_segundo']:10.1f} pet/s  p50 {_tiempo(r['p50']):>10}  "
+                      f"p99 {_tiempo(r['p99']):>10}  errores {r['errores']}", flush=True)
+    finally:
+        server.apagar()
+        obtener_pool().cerrar()
+        shutil.rmtree(carpeta, ignore_errors=True)
+    return resultados
+
+# ----------------------------------------------------------------------
+# Resultados y comparación
+# ----------------------------------------------------------------------
+
+def _tiempo(segundos):
+    for unidad, escala in (('s', 1), ('ms', 1e-3), ('µs', 1e-6)):
+        if segundos >= escala:
+            return f'{segundos / escala:.3f} {unidad}'
+    return f'{segundos / 1e-9:.1f} ns'
+
+def _commit():
+    try:
+        salida = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=RAIZ,
+                                capture_output=True, text=True, timeout=10)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return salida.stdout.strip() or None
+
+def entorno():
+    try:
+        import numpy
+        version_numpy = numpy.__version__
+    except ImportError:
+        version_numpy = None
+    return {
+        'fecha': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'commit': _commit(),
+        'python': platform.python_version(),
+        'implementacion': platform.python_implementation(),
+        'plataforma': platform.platform(),
+        'nucleos': os.cpu_count(),
+        'numpy': version_numpy,
+    }
+
+def guardar(resultados, destino=None):
+    if destino is None:
+        os.makedirs(RUTA_RESULTADOS, exist_ok=True)
+        sello = datetime.now().strftime('%Y%m%d-%H%M%S')
+        commit = resultados['entorno'].get('commit')
+        destino = os.path.join(RUTA_RESULTADOS, f"{sello}{'-' + commit if commit else ''}.json")
+    with open(destino, 'w', encoding='utf-8') as f:
+        json.dump(resultados, f, ensure_ascii=False, indent=2)
+    return destino
+
+def _leer(ruta):
+    with open(ruta, encoding='utf-8') as f:
+        datos = json.load(f)
+    if datos.get('version') != VERSION_FORMATO:
+        raise ValueError(f"{ruta}: versión de formato {datos.get('version')} no soportada")
+    return datos
+
+# Métricas comparadas: (sección, campo, True si más alto es mejor)
+METRICAS_COMPARADAS = (
+    ('micro', 'mediana', False),
+    ('carga', 'p50', False),
+    ('carga', 'p99', False),
+    ('carga', 'por_segundo', True),
+)
+
+def comparar(ruta_base, ruta_nueva, tolerancia=0.10):
+    """
+    Compara dos resultados caso por caso. Devuelve las filas
+    (caso, métrica, base, nuevo, cambio, estado) con estado 'regresion',
+    'mejora' o 'igual' según la tolerancia relativa
+    """
+    base = _leer(ruta_base)
+    nuevo = _leer(ruta_nueva)
+    filas = []
+    for seccion, campo, mas_es_mejor in METRICAS_COMPARADAS:
+        casos_base = base.get(seccion) or {}
+        casos_nuevos = nuevo.get(seccion) or {}
+        for caso in sorted(casos_base.keys() & casos_nuevos.keys()):
+            anterior = casos_base[caso][campo]
+            actual = casos_nuevos[caso][campo]
+            if not anterior:
+                continue
+            cambio = actual / anterior - 1
+            peor = -cambio if mas_es_mejor else cambio
+            estado = 'regresion' if peor > tolerancia else 'mejora' if peor < -tolerancia else 'igual'
+            filas.append((caso, campo, anterior, actual, cambio, estado))
+    return filas
+
+def mostrar_comparacion(filas):
+    for caso, campo, anterior, actual, cambio, estado in filas:
+        if campo == 'por_segundo':
+            valores = f'{anterior:10.1f} -> {actual:10.1f} pet/s'
+        else:
+            valores = f'{_tiempo(anterior):>12} -> {_tiempo(actual):>12}'
+        marca = {'regresion': 'PEOR', 'mejora': 'MEJOR', 'igual': ''}[estado]
+        print(f'{caso:50} {campo:12} {valores} {cambio:+8.1%} {marca}')
+
+# ----------------------------------------------------------------------
+
+def argumentos(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks del Proyecto MD")
+    sub = parser.add_subparsers(dest='comando', required=True)
+
+    def opciones_salida(p):
+        p.add_argument('--salida', help=f"Archivo JSON de resultados (por defecto, en {RUTA_RESULTADOS})")
+
+    def opciones_micro(p):
+        p.add_argument('--filtro', help="Sólo los casos cuyo nombre contiene este texto")
+        p.add_argument('--repeticiones', type=int, default=5)
+        p.add_argument('--max-variables', type=int, default=22,
+                       help="Variables máximas de las tablas de verdad (4 a 22)")
+
+    def opciones_carga(p):
+        p.add_argument('--rutas', nargs='+', default=['/', '/registro'], choices=sorted(PETICIONES))
+        p.add_argument('--concurrencia', type=int, default=8, help="Conexiones simultáneas")
+        p.add_argument('--peticiones', type=int, default=1000, help="Peticiones por ruta")
+        p.add_argument('--trabajadores', type=int, default=16, help="Hilos del servidor")
+        p.add_argument('--calentamiento', type=int, default=50, help="Peticiones previas sin medir")
+
+    micro = sub.add_parser('micro', help="Micro-benchmarks de los motores")
+    opciones_micro(micro)
+    opciones_salida(micro)
+    carga = sub.add_parser('carga', help="Carga HTTP contra el servidor en este proceso")
+    opciones_carga(carga)
+    opciones_salida(carga)
+    todo = sub.add_parser('todo', help="Micro-benchmarks y carga")
+    opciones_micro(todo)
+    opciones_carga(todo)
+    opciones_salida(todo)
+    comparacion = sub.add_parser('comparar', help="Compara dos archivos de resultados")
+    comparacion.add_argument('base')
+    comparacion.add_argument('nuevo')
+    comparacion.add_argument('--tolerancia', type=float, default=0.10,
+                             help="Cambio relativo a partir del cual se marca una diferencia")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = argumentos(argv)
+    if args.comando == 'comparar':
+        filas = comparar(args.base, args.nuevo, args.tolerancia)
+        mostrar_comparacion(filas)
+        # Código de salida distinto de cero si hubo regresiones, para usarlo en scripts
+        return 1 if any(fila[5] == 'regresion' for fila in filas) else 0
+
+    resultados = {'version': VERSION_FORMATO, 'entorno': entorno()}
+    if args.comando in ('micro', 'todo'):
+        resultados['micro'] = correr_micro(args.filtro, args.repeticiones, args.max_variables)
+    if args.comando in ('carga', 'todo'):
+        resultados['carga'] = correr_carga(args.rutas, args.concurrencia, args.peticiones,
+                                           args.trabajadores, args.calentamiento)
+    print(f"Resultados guardados en {guardar(resultados, args.salida)}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,19 +1,126 @@
 import sqlite3
+import logging
 import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from metricas import REGISTRO
+
+registro = logging.getLogger('proyecto_md.db')
+
+ESPERA_CONEXION = REGISTRO.histograma('proyecto_md_db_espera_segundos',
+                                      'Tiempo esperando una conexión libre del pool')
+USO_CONEXION = REGISTRO.histograma('proyecto_md_db_uso_segundos',
+                                   'Tiempo que cada préstamo retiene la conexión (consultas y commit)')
+CONEXIONES_EN_USO = REGISTRO.medidor('proyecto_md_db_conexiones_en_uso', 'Conexiones prestadas en este momento')
+CONEXIONES_ABIERTAS = REGISTRO.medidor('proyecto_md_db_conexiones_abiertas', 'Conexiones SQLite abiertas por el pool')
+
+# Se puede cambiar la base con la variable de entorno PROYECTO_MD_DB (por ejemplo, para pruebas)
+RUTA_DB = os.environ.get('PROYECTO_MD_DB', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'DBusuariosSqlite.db'))
 
 class CConexion:
     @staticmethod
     def ConexionBaseDeDatos():
         try:
             # Aseguramos que la base de datos se cree en la carpeta DB
-            db_path = os.path.join(os.path.dirname(__file__), 'DBusuariosSqlite.db')
-            conexion = sqlite3.connect(db_path)
-            print("Conexión exitosa a la base de datos")
+            conexion = sqlite3.connect(RUTA_DB)
+            registro.debug("Conexión exitosa a la base de datos")
             return conexion
         except sqlite3.Error as error:
-            print("Error en la conexión:", error)
+            registro.error("Error en la conexión: %s", error)
             return None
 
+class PoolConexiones:
+    """
+    Pool de conexiones SQLite reutilizables basado en una cola.
+    Cada conexión se abre una sola vez con WAL (lectores y escritor no se
+    bloquean entre sí), busy_timeout para esperar al escritor en lugar de
+    fallar, synchronous=NORMAL y una caché de páginas más grande.
+    """
+
+    def __init__(self, ruta=RUTA_DB, tamano=8, busy_timeout_ms=5000, cache_kib=8192):
+        self.ruta = ruta
+        self.tamano = tamano
+        self.busy_timeout_ms = busy_timeout_ms
+        self.cache_kib = cache_kib
+        self._libres = queue.LifoQueue()
+        self._creadas = 0
+        self._lock = threading.Lock()
+
+    def _nueva(self):
+        conexion = sqlite3.connect(self.ruta, timeout=self.busy_timeout_ms / 1000, check_same_thread=False)
+        conexion.execute('PRAGMA journal_mode=WAL')
+        conexion.execute(f'PRAGMA busy_timeout={int(self.busy_timeout_ms)}')
+        conexion.execute('PRAGMA synchronous=NORMAL')
+        conexion.execute(f'PRAGMA cache_size=-{int(self.cache_kib)}')
+        conexion.execute('PRAGMA temp_store=MEMORY')
+        return conexion
+
+    def _tomar(self, espera):
+        try:
+            return self._libres.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._creadas < self.tamano:
+                self._creadas += 1
+                crear = True
+            else:
+                crear = False
+        if crear:
+            try:
+                conexion = self._nueva()
+            except sqlite3.Error:
+                with self._lock:
+                    self._creadas -= 1
+                raise
+            CONEXIONES_ABIERTAS.sumar()
+            return conexion
+        try:
+            return self._libres.get(timeout=espera)
+        except queue.Empty:
+            raise sqlite3.OperationalError("No hay conexiones libres en el pool") from None
+
+    @contextmanager
+    def conexion(self, espera=10):
+        """Presta una conexión; al devolverla se deshace cualquier transacción que quedara abierta"""
+        inicio = time.perf_counter()
+        conexion = self._tomar(espera)
+        prestada = time.perf_counter()
+        ESPERA_CONEXION.observar(prestada - inicio)
+        CONEXIONES_EN_USO.sumar()
+        try:
+            yield conexion
+        finally:
+            if conexion.in_transaction:
+                conexion.rollback()
+            self._libres.put(conexion)
+            CONEXIONES_EN_USO.sumar(valor=-1)
+            USO_CONEXION.observar(time.perf_counter() - prestada)
 
+    def cerrar(self):
+        while True:
+            try:
+                self._libres.get_nowait().close()
+                CONEXIONES_ABIERTAS.sumar(valor=-1)
+            except queue.Empty:
+                break
+        with self._lock:
+            self._creadas = 0
 
+_pool = None
+_pool_lock = threading.Lock()
 
+def obtener_pool():
+    """Pool compartido; la primera llamada aplica las migraciones pendientes"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                from migraciones import migrar
+                pool = PoolConexiones()
+                with pool.conexion() as conexion:
+                    migrar(conexion)
+                _pool = pool
+    return _pool
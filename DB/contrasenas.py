@@ -0,0 +1,154 @@
+import argparse
+import base64
+import hashlib
+import hmac
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Formatos guardados en la columna contraseña:
+#   scrypt$n=16384,r=8,p=1$<sal>$<hash>
+#   pbkdf2_sha256$i=600000$<sal>$<hash>
+#   64 caracteres hexadecimales: sha256 sin sal de las versiones anteriores
+ALGORITMOS = ('scrypt', 'pbkdf2_sha256')
+LONGITUD_SAL = 16
+LONGITUD_HASH = 32
+PATRON_SHA256 = re.compile(r'^[0-9a-f]{64}$')
+
+# Parámetros con los que se generan los hashes nuevos; se pueden ajustar con calibrar()
+PARAMETROS = {
+    'algoritmo': os.environ.get('PROYECTO_MD_KDF', 'scrypt'),
+    'n': int(os.environ.get('PROYECTO_MD_SCRYPT_N', 1 << 14)),
+    'r': 8,
+    'p': 1,
+    'i': int(os.environ.get('PROYECTO_MD_PBKDF2_I', 600_000)),
+}
+
+# hashlib.scrypt y pbkdf2_hmac liberan el GIL: un hilo por núcleo basta para
+# aprovechar la CPU sin que el costo del KDF acapare los hilos del servidor
+HILOS_KDF = os.cpu_count() or 1
+_ejecutor = ThreadPoolExecutor(max_workers=HILOS_KDF, thread_name_prefix='kdf')
+
+def _b64(datos):
+    return base64.b64encode(datos).decode().rstrip('=')
+
+def _de_b64(texto):
+    return base64.b64decode(texto + '=' * (-len(texto) % 4))
+
+def _derivar(algoritmo, parametros, contraseña, sal):
+    if algoritmo == 'scrypt':
+        n, r, p = parametros['n'], parametros['r'], parametros['p']
+        return hashlib.scrypt(contraseña.encode(), salt=sal, n=n, r=r, p=p,
+                              maxmem=256 * n * r + (1 << 20), dklen=LONGITUD_HASH)
+    if algoritmo == 'pbkdf2_sha256':
+        return hashlib.pbkdf2_hmac('sha256', contraseña.encode(), sal, parametros['i'], LONGITUD_HASH)
+    raise ValueError(f"Algoritmo de contraseña desconocido: {algoritmo}")
+
+def _parametros_de(algoritmo, parametros):
+    if algoritmo == 'scrypt':
+        return {'n': parametros['n'], 'r': parametros['r'], 'p': parametros['p']}
+    return {'i': parametros['i']}
+
+def _leer(almacenado):
+    """Separa un hash guardado en (algoritmo, parámetros, sal, hash)"""
+    algoritmo, texto_parametros, sal, hash_guardado = almacenado.split('$')
+    parametros = {}
+    for parte in texto_parametros.split(','):
+        clave, _, valor = parte.partition('=')
+        parametros[clave] = int(valor)
+    return algoritmo, parametros, _de_b64(sal), _de_b64(hash_guardado)
+
+def hashear(contraseña, parametros=None):
+    """Hash con sal aleatoria; el algoritmo y el factor de trabajo quedan dentro del texto"""
+    parametros = parametros or PARAMETROS
+    algoritmo = parametros['algoritmo']
+    propios = _parametros_de(algoritmo, parametros)
+    sal = os.urandom(LONGITUD_SAL)
+    derivado = _derivar(algoritmo, propios, contraseña, sal)
+    texto_parametros = ','.join(f'{clave}={valor}' for clave, valor in propios.items())
+    return f'{algoritmo}${texto_parametros}${_b64(sal)}${_b64(derivado)}'
+
+def verificar(contraseña, almacenado):
+    """Compara en tiempo constante; acepta también los sha256 sin sal antiguos"""
+    if not almacenado:
+        return False
+    if PATRON_SHA256.match(almacenado):
+        return hmac.compare_digest(hashlib.sha256(contraseña.encode()).hexdigest(), almacenado)
+    try:
+        algoritmo, parametros, sal, hash_guardado = _leer(almacenado)
+        derivado = _derivar(algoritmo, parametros, contraseña, sal)
+    except (ValueError, KeyError):
+        return False
+    return hmac.compare_digest(derivado, hash_guardado)
+
+def necesita_rehash(almacenado, parametros=None):
+    """True si el hash no usa el algoritmo o el factor de trabajo actuales"""
+    parametros = parametros or PARAMETROS
+    try:
+        algoritmo, guardados, _, _ = _leer(almacenado)
+    except (ValueError, KeyError):
+        return True
+    return algoritmo != parametros['algoritmo'] or guardados != _parametros_de(algoritmo, parametros)
+
+def hashear_en_pool(contraseña):
+    return _ejecutor.submit(hashear, contraseña).result()
+
+def verificar_en_pool(contraseña, almacenado):
+    return _ejecutor.submit(verificar, contraseña, almacenado).result()
+
+def hashear_varias_en_pool(contraseñas):
+    """
+    Hashes de muchas contraseñas en el mismo grupo de hilos, de a una tanda
+    por hilo para que los inicios de sesión no esperen a que termine un lote
+    """
+    hashes = []
+    for i in range(0, len(contraseñas), HILOS_KDF):
+        hashes.extend(_ejecutor.map(hashear, contraseñas[i:i + HILOS_KDF]))
+    return hashes
+
+def _medir(parametros, repeticiones):
+    hashear('calibración', parametros)
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        hashear('calibración', parametros)
+    return (time.perf_counter() - inicio) / repeticiones * 1000
+
+def calibrar(objetivo_ms=100, algoritmo='scrypt', repeticiones=3, mostrar=False):
+    """
+    Busca el mayor factor de trabajo cuyo hash tarda como mucho 'objetivo_ms'
+    en esta máquina (n potencia de 2 para scrypt, iteraciones para PBKDF2)
+    """
+    if algoritmo == 'scrypt':
+        parametros = dict(PARAMETROS, algoritmo='scrypt', n=1 << 10)
+        clave = 'n'
+    else:
+        parametros = dict(PARAMETROS, algoritmo='pbkdf2_sha256', i=50_000)
+        clave = 'i'
+    elegido = dict(parametros)
+    while True:
+        duracion = _medir(parametros, repeticiones)
+        if mostrar:
+            print(f"  {clave}={parametros[clave]:>9}: {duracion:8.1f} ms")
+        if duracion > objetivo_ms:
+            break
+        elegido = dict(parametros)
+        parametros[clave] *= 2
+    if algoritmo == 'pbkdf2_sha256' and duracion > objetivo_ms:
+        # Las iteraciones escalan linealmente: se ajusta entre la última medida y la anterior
+        elegido['i'] = max(elegido['i'], int(parametros['i'] * objetivo_ms / duracion))
+    return elegido
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Calibra el factor de trabajo del hash de contraseñas")
+    parser.add_argument('--objetivo-ms', type=float, default=100, help="Tiempo deseado por hash")
+    parser.add_argument('--algoritmo', choices=ALGORITMOS, default='scrypt')
+    parser.add_argument('--repeticiones', type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"Calibrando {args.algoritmo} para {args.objetivo_ms:.0f} ms por hash:")
+    elegido = calibrar(args.objetivo_ms, args.algoritmo, args.repeticiones, mostrar=True)
+    if args.algoritmo == 'scrypt':
+        print(f"Factor recomendado: PROYECTO_MD_SCRYPT_N={elegido['n']}")
+    else:
+        print(f"Factor recomendado: PROYECTO_MD_KDF=pbkdf2_sha256 PROYECTO_MD_PBKDF2_I={elegido['i']}")
@@ -0,0 +1,306 @@
+import email.utils
+import gzip
+import mimetypes
+import os
+import re
+import threading
+import urllib.parse
+from collections import OrderedDict
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+RAIZ_VISTA = os.path.realpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Vista'))
+
+# Rutas cortas que apuntan a páginas concretas de la Vista
+ALIAS = {
+    '/': 'ACCESO WEB/Pg.Registro.html',
+}
+
+# Tipos que vale la pena comprimir (los videos, PDF e imágenes ya vienen comprimidos)
+TIPOS_COMPRIMIBLES = ('text/', 'application/json', 'application/javascript', 'image/svg+xml')
+# Tipos que siempre se envían desde el disco, sin ocupar la caché
+TIPOS_SIN_CACHE = ('video/', 'audio/')
+# Cada codificación es otra representación y lleva su propio ETag
+SUFIJOS_ETAG = {'gzip': '-gz', 'br': '-br'}
+PATRON_RANGO = re.compile(r'bytes=(\d*)-(\d*)')
+
+
+class ArchivoEstatico:
+    """Contenido de un archivo en memoria junto con sus variantes comprimidas y validadores HTTP"""
+    __slots__ = ('ruta', 'tipo', 'contenido', 'gzip', 'brotli', 'etag', 'ultima_modificacion',
+                 'mtime', 'tamano')
+
+    def __init__(self, ruta, tipo, contenido, mtime_ns, tamano):
+        self.ruta = ruta
+        self.tipo = tipo
+        self.contenido = contenido
+        self.mtime = mtime_ns
+        self.tamano = tamano
+        self.etag = f'"{mtime_ns:x}-{tamano:x}"'
+        self.ultima_modificacion = email.utils.formatdate(mtime_ns / 1e9, usegmt=True)
+        self.gzip = None
+        self.brotli = None
+        if contenido is not None and tipo.startswith(TIPOS_COMPRIMIBLES) and tamano > 1024:
+            self.gzip = gzip.compress(contenido, compresslevel=9, mtime=0)
+            if brotli is not None:
+                self.brotli = brotli.compress(contenido)
+
+    def bytes_ocupados(self):
+        return sum(len(x) for x in (self.contenido, self.gzip, self.brotli) if x)
+
+
+class CacheEstaticos:
+    """
+    Sirve archivos de Vista/ con una caché LRU en memoria acotada por bytes.
+    Cada entrada se invalida cuando cambia el mtime o el tamaño del archivo;
+    los videos y los archivos mayores que 'max_archivo' no se guardan y se
+    envían con sendfile directamente desde el disco.
+    """
+
+    def __init__(self, raiz=RAIZ_VISTA, capacidad_bytes=32 * 1024 * 1024, max_archivo=2 * 1024 * 1024):
+        self.raiz = os.path.realpath(raiz)
+        self.capacidad_bytes = capacidad_bytes
+        self.max_archivo = max_archivo
+        self._entradas = OrderedDict()
+        self._ocupados = 0
+        self._lock = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+
+    def resolver(self, ruta_url):
+        """Traduce la ruta de la URL a un archivo dentro de la raíz, o None si no es válida"""
+        ruta = urllib.parse.urlsplit(ruta_url).path
+        ruta = ALIAS.get(ruta, ruta)
+        ruta = urllib.parse.unquote(ruta).lstrip('/')
+        if '\x00' in ruta:
+            return None
+        completa = os.path.realpath(os.path.join(self.raiz, ruta))
+        # Impide salir de la raíz con '..' o enlaces simbólicos
+        if not completa.startswith(self.raiz + os.sep) or not os.path.isfile(completa):
+            return None
+        return completa
+
+    def obtener(self, ruta):
+        """Devuelve el ArchivoEstatico actualizado (sin contenido si el archivo es muy grande)"""
+        info = os.stat(ruta)
+        with self._lock:
+            entrada = self._entradas.get(ruta)
+            if entrada is not None and entrada.mtime == info.st_mtime_ns and entrada.tamano == info.st_size:
+                self._entradas.move_to_end(ruta)
+                self.aciertos += 1
+                return entrada
+            self.fallos += 1
+
+        tipo = mimetypes.guess_type(ruta)[0] or 'application/octet-stream'
+        if tipo.startswith('text/'):
+            tipo += '; charset=utf-8'
+        if info.st_size > self.max_archivo or tipo.startswith(TIPOS_SIN_CACHE):
+            return ArchivoEstatico(ruta, tipo, None, info.st_mtime_ns, info.st_size)
+        with open(ruta, 'rb') as f:
+            contenido = f.read()
+        entrada = ArchivoEstatico(ruta, tipo, contenido, info.st_mtime_ns, len(contenido))
+
+        with self._lock:
+            anterior = self._entradas.pop(ruta, None)
+            if anterior is not None:
+                self._ocupados -= anterior.bytes_ocupados()
+            self._entradas[ruta] = entrada
+            self._ocupados += entrada.bytes_ocupados()
+            while self._ocupados > self.capacidad_bytes and len(self._entradas) > 1:
+                _, descartada = self._entradas.popitem(last=False)
+                self._ocupados -= descartada.bytes_ocupados()
+        return entrada
+
+    def precargar(self, extensiones=('.html',)):
+        """Lee y comprime de antemano las páginas para que la primera visita no pague el disco"""
+        for carpeta, _, archivos in os.walk(self.raiz):
+            for nombre in archivos:
+                if nombre.endswith(extensiones):
+                    self.obtener(os.path.join(carpeta, nombre))
+
+    def estadisticas(self):
+        with self._lock:
+            consultas = self.aciertos + self.fallos
+            return {
+                'aciertos': self.aciertos,
+                'fallos': self.fallos,
+                'archivos': len(self._entradas),
+                'bytes': self._ocupados,
+                'capacidad_bytes': self.capacidad_bytes,
+                'tasa_aciertos': round(self.aciertos / consultas, 4) if consultas else 0.0,
+            }
+
+
+def _codificaciones_aceptadas(cabecera):
+    """Codificaciones de Accept-Encoding con q > 0"""
+    aceptadas = set()
+    for parte in (cabecera or '').split(','):
+        nombre, _, parametros = parte.strip().partition(';')
+        parametros = parametros.replace(' ', '')
+        if parametros.startswith('q='):
+            try:
+                if float(parametros[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        if nombre:
+            aceptadas.add(nombre.lower())
+    return aceptadas
+
+
+def _etag(entrada, codificacion):
+    if codificacion is None:
+        return entrada.etag
+    return entrada.etag[:-1] + SUFIJOS_ETAG[codificacion] + '"'
+
+
+def _codificacion_elegida(handler, entrada):
+    """'br', 'gzip' o None (sin comprimir) según Accept-Encoding y las variantes del archivo"""
+    if entrada.gzip is None:
+        return None
+    aceptadas = _codificaciones_aceptadas(handler.headers.get('Accept-Encoding'))
+    if entrada.brotli is not None and 'br' in aceptadas:
+        return 'br'
+    if 'gzip' in aceptadas:
+        return 'gzip'
+    return None
+
+
+def _no_modificado(handler, entrada, etag):
+    """Evalúa If-None-Match (comparación débil) / If-Modified-Since"""
+    etiquetas = handler.headers.get('If-None-Match')
+    if etiquetas is not None:
+        etiquetas = [e.strip() for e in etiquetas.split(',')]
+        return '*' in etiquetas or etag in [e[2:] if e.startswith('W/') else e for e in etiquetas]
+    fecha = handler.headers.get('If-Modified-Since')
+    if fecha:
+        try:
+            limite = email.utils.parsedate_to_datetime(fecha).timestamp()
+        except (TypeError, ValueError):
+            return False
+        return int(entrada.mtime / 1e9) <= limite
+    return False
+
+
+def _cabeceras_comunes(handler, entrada, etag):
+    handler.send_header('ETag', etag)
+    handler.send_header('Last-Modified', entrada.ultima_modificacion)
+    handler.send_header('Cache-Control', 'no-cache')
+    handler.send_header('Access-Control-Allow-Origin', '*')
+    if entrada.gzip is not None:
+        handler.send_header('Vary', 'Accept-Encoding')
+
+
+def _rango_solicitado(handler, entrada):
+    """
+    Interpreta una cabecera Range de un solo intervalo ('bytes=a-b', 'bytes=a-',
+    'bytes=-n'). Devuelve None si se debe enviar el archivo completo (también
+    si la cabecera no es válida, como 'bytes=5-3'), (inicio, fin) inclusivo
+    si el rango es válido, o False si no se puede satisfacer
+    """
+    cabecera = handler.headers.get('Range')
+    if not cabecera:
+        return None
+    coincidencia = PATRON_RANGO.fullmatch(cabecera.strip())
+    if coincidencia is None:
+        return None
+    condicion = handler.headers.get('If-Range')
+    # Los tramos salen siempre sin comprimir: If-Range se compara con el ETag de esa representación
+    if condicion and condicion.strip() not in (entrada.etag, entrada.ultima_modificacion):
+        return None
+    inicio, fin = coincidencia.groups()
+    if not inicio:
+        if not fin:
+            return None
+        sufijo = int(fin)
+        if sufijo == 0:
+            return False
+        inicio, fin = max(entrada.tamano - sufijo, 0), entrada.tamano - 1
+    else:
+        inicio = int(inicio)
+        if fin:
+            if int(fin) < inicio:
+                return None
+            fin = min(int(fin), entrada.tamano - 1)
+        else:
+            fin = entrada.tamano - 1
+    if inicio >= entrada.tamano:
+        return False
+    return inicio, fin
+
+
+def _enviar_archivo(handler, ruta, inicio, longitud):
+    """
+    Envía un tramo del archivo sin copiarlo a memoria: socket.sendfile usa
+    os.sendfile (copia en el núcleo) y sólo si no existe recurre a bloques
+    """
+    handler.wfile.flush()
+    with open(ruta, 'rb') as f:
+        handler.connection.sendfile(f, inicio, longitud)
+
+
+def servir_estatico(handler, cache, enviar_cuerpo=True):
+    """
+    Atiende GET/HEAD de un archivo de la Vista. Devuelve False si la ruta
+    no corresponde a ningún archivo (el llamador decide el 404)
+    """
+    ruta = cache.resolver(handler.path)
+    if ruta is None:
+        return False
+    entrada = cache.obtener(ruta)
+    codificacion = _codificacion_elegida(handler, entrada)
+    etag = _etag(entrada, codificacion)
+
+    if _no_modificado(handler, entrada, etag):
+        handler.send_response(304)
+        _cabeceras_comunes(handler, entrada, etag)
+        handler.end_headers()
+        return True
+
+    rango = _rango_solicitado(handler, entrada)
+    if rango is not None:
+        # Los tramos son de la representación sin comprimir
+        codificacion, etag = None, entrada.etag
+    if rango is False:
+        handler.send_response(416)
+        handler.send_header('Content-Range', f'bytes */{entrada.tamano}')
+        handler.send_header('Content-Length', '0')
+        _cabeceras_comunes(handler, entrada, etag)
+        handler.end_headers()
+        return True
+
+    if rango is not None:
+        inicio, fin = rango
+        handler.send_response(206)
+        handler.send_header('Content-Range', f'bytes {inicio}-{fin}/{entrada.tamano}')
+    else:
+        inicio, fin = 0, entrada.tamano - 1
+        handler.send_response(200)
+    handler.send_header('Content-Type', entrada.tipo)
+    handler.send_header('Accept-Ranges', 'bytes')
+    _cabeceras_comunes(handler, entrada, etag)
+
+    if entrada.contenido is None or rango is not None:
+        # Archivos grandes o tramos: siempre sin comprimir, directo del archivo o de la caché
+        longitud = fin - inicio + 1
+        handler.send_header('Content-Length', str(longitud))
+        handler.end_headers()
+        if enviar_cuerpo and longitud > 0:
+            if entrada.contenido is None:
+                _enviar_archivo(handler, ruta, inicio, longitud)
+            else:
+                handler.wfile.write(entrada.contenido[inicio:fin + 1])
+        return True
+
+    cuerpo = entrada.contenido
+    if codificacion is not None:
+        handler.send_header('Content-Encoding', codificacion)
+        cuerpo = entrada.brotli if codificacion == 'br' else entrada.gzip
+    handler.send_header('Content-Length', str(len(cuerpo)))
+    handler.end_headers()
+    if enviar_cuerpo:
+        handler.wfile.write(cuerpo)
+    return True
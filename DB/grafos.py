@@ -0,0 +1,290 @@
+import json
+import secrets
+import sys
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from api_calculo import LimiteExcedido, TIEMPO_MAXIMO, _entero
+import motores
+
+# Límites de los grafos guardados en el servidor
+MAX_CUERPO_GRAFO = 16 * 1024 * 1024
+MAX_NODOS = 200_000
+MAX_ARISTAS = 2_000_000
+MAX_EVENTOS = 10_000
+MAX_MUESTRAS = 64
+# Componentes con hasta este número de nodos se listan con sus ids
+MAX_NODOS_EXACTO = 2000
+MUESTRAS_DEFECTO = 16
+# Cada fuente de la centralidad recorre el grafo entero (nodos + aristas): la
+# exacta usa todas las fuentes si cabe en este presupuesto, si no se muestrea
+PRESUPUESTO_CENTRALIDAD = 10_000_000
+# Páginas de aristas de /grafos/generar y redes generadas que se guardan para paginarlas
+PAGINA_DEFECTO = 100_000
+MAX_PAGINA = 1_000_000
+MAX_REDES_GENERADAS = 4
+
+def _real(datos, clave, minimo, maximo):
+    valor = datos.get(clave)
+    if valor is None:
+        return None
+    if isinstance(valor, bool):
+        raise ValueError(f"'{clave}' debe ser un número")
+    try:
+        valor = float(valor)
+    except (TypeError, ValueError):
+        raise ValueError(f"'{clave}' debe ser un número") from None
+    if not minimo <= valor <= maximo:
+        raise ValueError(f"'{clave}' debe estar entre {minimo} y {maximo}")
+    return valor
+
+def parametros_red(datos):
+    """Valida los parámetros de generar_red y que la red no supere los límites"""
+    grafos = motores.cargar('logica_grafos')
+    parametros = {
+        'modelo': datos.get('modelo', 'erdos_renyi'),
+        'nodos': _entero(datos, 'nodos', None, 1, MAX_NODOS),
+        'semilla': _entero(datos, 'semilla', 0, 0, 2 ** 63 - 1),
+        'p': _real(datos, 'p', 0, 1),
+        'aristas': _entero(datos, 'aristas', None, 0, MAX_ARISTAS),
+        'm': _entero(datos, 'm', None, 1, MAX_NODOS),
+        'k': _entero(datos, 'k', None, 2, MAX_NODOS),
+        'beta': _real(datos, 'beta', 0, 1),
+    }
+    if parametros['nodos'] is None:
+        raise ValueError("Falta el número de nodos")
+    if parametros['modelo'] not in grafos.MODELOS:
+        raise ValueError(f"Modelo desconocido '{parametros['modelo']}'; use {', '.join(grafos.MODELOS)}")
+    esperadas = grafos.aristas_esperadas(parametros['modelo'], parametros['nodos'], parametros['p'],
+                                         parametros['aristas'], parametros['m'], parametros['k'])
+    if esperadas > MAX_ARISTAS:
+        raise LimiteExcedido(f"La red tendría unas {int(esperadas)} aristas; el máximo es {MAX_ARISTAS}")
+    return parametros
+
+_redes_generadas = OrderedDict()
+_lock_redes = threading.Lock()
+
+def generar_red(parametros):
+    """generar_red del motor con los parámetros ya validados (lo corre un proceso de trabajo)"""
+    return motores.cargar('logica_grafos').generar_red(**parametros)
+
+def generar(parametros, trabajos=None):
+    """
+    (origenes, destinos) de la red. Las últimas redes generadas quedan en
+    memoria, así que pedir las páginas siguientes con la misma semilla no
+    vuelve a generarla. Sin numpy generar un millón de aristas lleva
+    segundos, así que con una cola de trabajos se genera en sus procesos
+    (con su límite de pendientes y de tiempo) y no en el hilo HTTP
+    """
+    clave = tuple(sorted(parametros.items()))
+    with _lock_redes:
+        red = _redes_generadas.get(clave)
+        if red is not None:
+            _redes_generadas.move_to_end(clave)
+            return red
+    if trabajos is not None:
+        red = trabajos.ejecutar('red', parametros, TIEMPO_MAXIMO)
+    else:
+        red = generar_red(parametros)
+    with _lock_redes:
+        _redes_generadas[clave] = red
+        while len(_redes_generadas) > MAX_REDES_GENERADAS:
+            _redes_generadas.popitem(last=False)
+    return red
+
+def pagina_ndjson(origenes, destinos, desde, hasta, cabecera, tamano_trozo=10_000):
+    """Trozos de bytes: una línea con la cabecera y una línea [origen, destino] por arista"""
+    yield (json.dumps(cabecera, ensure_ascii=False) + '\n').encode()
+    for inicio in range(desde, hasta, tamano_trozo):
+        fin = min(inicio + tamano_trozo, hasta)
+        yield ''.join(f'[{u},{v}]\n' for u, v in zip(origenes[inicio:fin], destinos[inicio:fin])).encode()
+
+def pagina_binaria(origenes, destinos, desde, hasta):
+    """Pares (origen, destino) como enteros int32 little-endian intercalados"""
+    pares = array('i', bytes(8 * (hasta - desde)))
+    pares[0::2] = origenes[desde:hasta]
+    pares[1::2] = destinos[desde:hasta]
+    if sys.byteorder == 'big':
+        pares.byteswap()
+    return pares.tobytes()
+
+def crear_grafo(datos, trabajos=None):
+    """
+    Grafo a partir del formato de la página: {nodos: [{id, nombre}], aristas:
+    [{from, to}]}, o generado al azar con {generar: {modelo, nodos, ...}}
+    (en los procesos de 'trabajos' si se da)
+    """
+    grafos = motores.cargar('logica_grafos')
+    if not isinstance(datos, dict):
+        raise ValueError("El cuerpo debe ser un objeto JSON")
+    if 'generar' in datos:
+        if not isinstance(datos['generar'], dict):
+            raise ValueError("'generar' debe ser un objeto con los parámetros de la red")
+        parametros = parametros_red(datos['generar'])
+        return grafos.Grafo.desde_aristas(parametros['nodos'], *generar(parametros, trabajos))
+    nodos = datos.get('nodos', [])
+    aristas = datos.get('aristas', [])
+    if not isinstance(nodos, list) or not isinstance(aristas, list):
+        raise ValueError("'nodos' y 'aristas' deben ser listas")
+    if len(nodos) > MAX_NODOS or len(aristas) > MAX_ARISTAS:
+        raise LimiteExcedido(f"Se admiten hasta {MAX_NODOS} nodos y {MAX_ARISTAS} aristas")
+    try:
+        return grafos.Grafo.desde_dict(datos)
+    except (KeyError, TypeError) as e:
+        raise ValueError(f"Nodo o arista sin el campo {e}") from None
+
+def _par_de_arista(evento):
+    """(id1, id2) de un evento; acepta también 'arista': 'from-to' como el id de arista de la página"""
+    if 'arista' in evento:
+        desde, _, hasta = str(evento['arista']).partition('-')
+        evento = {'id1': desde, 'id2': hasta}
+    return _entero(evento, 'id1'), _entero(evento, 'id2')
+
+def aplicar_eventos(grafo, eventos):
+    """
+    Aplica los eventos de la página en orden y actualiza los contadores del
+    grafo sin recalcularlo: agregarPersona {id, nombre}, crearConexion
+    {id1, id2}, eliminarArista {id1, id2} y eliminarNodo {id}
+    """
+    if not isinstance(eventos, list):
+        raise ValueError("'eventos' debe ser una lista")
+    if len(eventos) > MAX_EVENTOS:
+        raise LimiteExcedido(f"Se admiten hasta {MAX_EVENTOS} eventos por petición")
+    aplicados = 0
+    ignorados = []
+    for indice, evento in enumerate(eventos):
+        try:
+            if not isinstance(evento, dict):
+                raise ValueError("El evento debe ser un objeto")
+            tipo = evento.get('tipo')
+            if tipo == 'agregarPersona':
+                if grafo.n_nodos >= MAX_NODOS:
+                    raise LimiteExcedido(f"El grafo ya tiene {MAX_NODOS} nodos")
+                hecho = grafo.agregar_persona(_entero(evento, 'id'), evento.get('nombre'))
+            elif tipo == 'crearConexion':
+                if grafo.n_aristas >= MAX_ARISTAS:
+                    raise LimiteExcedido(f"El grafo ya tiene {MAX_ARISTAS} aristas")
+                hecho = grafo.crear_conexion(*_par_de_arista(evento))
+            elif tipo == 'eliminarArista':
+                hecho = grafo.eliminar_arista(*_par_de_arista(evento))
+            elif tipo == 'eliminarNodo':
+                hecho = grafo.eliminar_nodo(_entero(evento, 'id'))
+            else:
+                raise ValueError(f"Evento desconocido '{tipo}'")
+            if not hecho:
+                raise ValueError("No cambió el grafo (ya existía o no existe)")
+            aplicados += 1
+        except KeyError as e:
+            ignorados.append({'evento': indice, 'motivo': str(e.args[0])})
+        except ValueError as e:
+            ignorados.append({'evento': indice, 'motivo': str(e)})
+    return {'aplicados': aplicados, 'ignorados': ignorados}
+
+def centralidad(grafo, parametros):
+    """Las 'cantidad' personas más centrales según 'tipo' (grado, intermediacion o cercania)"""
+    grafos = motores.cargar('logica_grafos')
+    tipo = parametros.get('tipo', 'grado')
+    cantidad = _entero(parametros, 'cantidad', 10, 1, 1000)
+    semilla = _entero(parametros, 'semilla', 0)
+    recorrido = grafo.n_nodos + grafo.n_aristas
+    permitidas = min(MAX_MUESTRAS, max(1, PRESUPUESTO_CENTRALIDAD // max(recorrido, 1)))
+    exacta = grafo.n_nodos * recorrido <= PRESUPUESTO_CENTRALIDAD
+    defecto = None if exacta else min(MUESTRAS_DEFECTO, permitidas)
+    muestras = _entero(parametros, 'muestras', defecto, 1, MAX_MUESTRAS)
+    if tipo != 'grado' and muestras is not None and muestras > permitidas:
+        raise LimiteExcedido(f"Con {grafo.n_nodos} nodos y {grafo.n_aristas} aristas se admiten "
+                             f"hasta {permitidas} muestras")
+    if tipo != 'grado' and muestras is None and not exacta:
+        raise LimiteExcedido(f"El grafo es demasiado grande para la centralidad exacta; usa hasta "
+                             f"{permitidas} muestras")
+    if tipo == 'grado':
+        valores, muestras = grafo.centralidad_grado(), None
+    elif tipo == 'intermediacion':
+        valores = grafo.centralidad_intermediacion(muestras, semilla)
+    elif tipo == 'cercania':
+        valores = grafo.centralidad_cercania(muestras, semilla)
+    else:
+        raise ValueError(f"Centralidad desconocida '{tipo}'; use grado, intermediacion o cercania")
+    return {
+        'tipo': tipo,
+        'muestras': muestras,
+        'nodos': [{'id': id_nodo, 'valor': round(valor, 6)}
+                  for id_nodo, valor in grafos.mas_centrales(valores, cantidad)],
+    }
+
+def camino(grafo, parametros):
+    desde = _entero(parametros, 'desde')
+    hasta = _entero(parametros, 'hasta')
+    if desde is None or hasta is None:
+        raise ValueError("Indica 'desde' y 'hasta'")
+    recorrido = grafo.camino_mas_corto(desde, hasta)
+    return {'desde': desde, 'hasta': hasta, 'camino': recorrido,
+            'distancia': len(recorrido) - 1 if recorrido else None}
+
+def componentes(grafo, parametros):
+    cantidad = _entero(parametros, 'cantidad', 10, 1, 1000)
+    grupos = grafo.componentes()
+    respuesta = {'componentes': len(grupos), 'tamanos': [len(g) for g in grupos[:cantidad]]}
+    # Los ids sólo se listan si las componentes son chicas
+    if not grupos or len(grupos[0]) <= MAX_NODOS_EXACTO:
+        respuesta['mayores'] = grupos[:cantidad]
+    return respuesta
+
+# Consulta de GET /grafos/<id>/<consulta> -> función
+CONSULTAS = {
+    'camino': camino,
+    'centralidad': centralidad,
+    'componentes': componentes,
+}
+
+class AlmacenGrafos:
+    """
+    Grafos en memoria por id, cada uno con su propio lock para que los
+    eventos y las consultas de un grafo no se mezclen. Los grafos sin uso
+    durante 'ttl' segundos, o los más viejos si hay más de 'capacidad',
+    se descartan.
+    """
+
+    def __init__(self, capacidad=32, ttl=3600):
+        self.capacidad = capacidad
+        self.ttl = ttl
+        self._grafos = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _purgar(self, ahora):
+        while self._grafos:
+            _, (_, _, usado) = next(iter(self._grafos.items()))
+            if ahora - usado <= self.ttl and len(self._grafos) <= self.capacidad:
+                break
+            self._grafos.popitem(last=False)
+
+    def crear(self, datos, trabajos=None):
+        grafo = crear_grafo(datos, trabajos)
+        id_grafo = secrets.token_urlsafe(12)
+        with self._lock:
+            self._grafos[id_grafo] = (grafo, threading.Lock(), time.time())
+            self._purgar(time.time())
+        return id_grafo, grafo
+
+    def obtener(self, id_grafo):
+        """(grafo, lock) o None; cada uso renueva su vencimiento"""
+        ahora = time.time()
+        with self._lock:
+            self._purgar(ahora)
+            entrada = self._grafos.get(id_grafo)
+            if entrada is None:
+                return None
+            grafo, lock, _ = entrada
+            self._grafos[id_grafo] = (grafo, lock, ahora)
+            self._grafos.move_to_end(id_grafo)
+            return grafo, lock
+
+    def eliminar(self, id_grafo):
+        with self._lock:
+            return self._grafos.pop(id_grafo, None) is not None
+
+    def estadisticas(self):
+        with self._lock:
+            self._purgar(time.time())
+            return {'grafos': len(self._grafos), 'capacidad': self.capacidad, 'ttl': self.ttl}
@@ -0,0 +1,186 @@
+import argparse
+import csv
+import io
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from conecion import obtener_pool
+from usuairo_controlador import validar_usuario, hash_contraseña
+import contrasenas
+
+TAMANO_LOTE = 5000
+# Filas aceptadas en una sola petición a /registro/lote
+MAX_FILAS_LOTE = 1000
+# SQLite admite como mínimo 999 parámetros por sentencia
+MAX_PARAMETROS = 900
+
+def _formato_de(ruta):
+    extension = os.path.splitext(ruta)[1].lower()
+    if extension == '.csv':
+        return 'csv'
+    if extension in ('.ndjson', '.jsonl'):
+        return 'ndjson'
+    return 'json'
+
+def leer_usuarios(archivo, formato):
+    """
+    Recorre los usuarios de un archivo abierto en modo texto sin cargarlo entero
+    (salvo un arreglo JSON). Cada elemento es un dict con nombre, correo y contraseña
+    """
+    if formato == 'csv':
+        yield from csv.DictReader(archivo)
+    elif formato == 'ndjson':
+        for linea in archivo:
+            linea = linea.strip()
+            if linea:
+                try:
+                    yield json.loads(linea)
+                except ValueError:
+                    # Se reporta como fila no válida sin detener la importación
+                    yield None
+    else:
+        datos = json.load(archivo)
+        yield from (datos.get('usuarios', []) if isinstance(datos, dict) else datos)
+
+def leer_cuerpo(cuerpo, tipo):
+    """Usuarios de un cuerpo HTTP: JSON (arreglo u objeto con 'usuarios'), NDJSON o CSV"""
+    if 'csv' in tipo:
+        formato = 'csv'
+    elif 'ndjson' in tipo or 'jsonl' in tipo:
+        formato = 'ndjson'
+    else:
+        formato = 'json'
+    return leer_usuarios(io.StringIO(cuerpo.decode('utf-8-sig')), formato)
+
+def _hashear_tramo(contraseñas):
+    return [hash_contraseña(c) for c in contraseñas]
+
+def _hashear(ejecutor, contraseñas, trabajadores):
+    """
+    Reparte el lote en un tramo por trabajador para no crear una tarea por
+    contraseña. Sin trabajadores propios se usa el grupo de hilos del KDF
+    """
+    if trabajadores is None:
+        return contrasenas.hashear_varias_en_pool(contraseñas)
+    if ejecutor is None or len(contraseñas) < 2 * trabajadores:
+        return _hashear_tramo(contraseñas)
+    paso = -(-len(contraseñas) // trabajadores)
+    tramos = [contraseñas[i:i + paso] for i in range(0, len(contraseñas), paso)]
+    return [h for tramo in ejecutor.map(_hashear_tramo, tramos) for h in tramo]
+
+def _correos_existentes(cursor, correos):
+    existentes = set()
+    for i in range(0, len(correos), MAX_PARAMETROS):
+        tramo = correos[i:i + MAX_PARAMETROS]
+        marcas = ','.join('?' * len(tramo))
+        cursor.execute(f'SELECT correo FROM usuarios WHERE correo IN ({marcas})', tramo)
+        existentes.update(fila[0] for fila in cursor)
+    return existentes
+
+def importar_usuarios(usuarios, tamano_lote=TAMANO_LOTE, trabajadores=None, pool=None):
+    """
+    Registra muchos usuarios a la vez. Valida cada fila con las mismas reglas
+    que registrar_usuario, calcula los hashes (en el grupo de hilos del KDF, o
+    en uno propio de `trabajadores` hilos) e inserta con executemany, una
+    transacción por lote; la conexión sólo se pide para esa transacción.
+    Devuelve un informe con los insertados y, por fila (contando desde 1),
+    los rechazados y el motivo
+    """
+    pool = pool or obtener_pool()
+    informe = {'leidos': 0, 'insertados': 0, 'rechazados': []}
+    vistos = set()
+    ejecutor = ThreadPoolExecutor(max_workers=trabajadores) if trabajadores and trabajadores > 1 else None
+    numerados = enumerate(usuarios, 1)
+    try:
+        while True:
+            lote = list(islice(numerados, tamano_lote))
+            if not lote:
+                break
+            informe['leidos'] += len(lote)
+
+            validos = []
+            for numero, usuario in lote:
+                if not isinstance(usuario, dict):
+                    informe['rechazados'].append({'fila': numero, 'correo': None, 'motivo': "Formato de fila no válido"})
+                    continue
+                nombre = str(usuario.get('nombre') or '').strip()
+                correo = str(usuario.get('correo') or '').strip()
+                contraseña = str(usuario.get('contraseña') or '')
+                error = validar_usuario(nombre, correo, contraseña)
+                if error is None and correo in vistos:
+                    error = "Correo repetido en el archivo"
+                if error:
+                    informe['rechazados'].append({'fila': numero, 'correo': correo or None, 'motivo': error})
+                    continue
+                vistos.add(correo)
+                validos.append((numero, nombre, correo, contraseña))
+            if not validos:
+                continue
+
+            hashes = _hashear(ejecutor, [v[3] for v in validos], trabajadores)
+
+            with pool.conexion() as conn:
+                cursor = conn.cursor()
+                # La consulta de existentes y la inserción van en la misma transacción de escritura
+                cursor.execute('BEGIN IMMEDIATE')
+                try:
+                    existentes = _correos_existentes(cursor, [v[2] for v in validos])
+                    filas = []
+                    for (numero, nombre, correo, _), hash_usuario in zip(validos, hashes):
+                        if correo in existentes:
+                            informe['rechazados'].append({'fila': numero, 'correo': correo, 'motivo': "Error: El correo ya está registrado"})
+                        else:
+                            filas.append((nombre, correo, hash_usuario))
+                    cursor.executemany('INSERT INTO usuarios (nombre, correo, contraseña) VALUES (?, ?, ?)', filas)
+                    conn.commit()
+                except Exception:
+                    conn.rollback()
+                    raise
+                finally:
+                    cursor.close()
+            informe['insertados'] += len(filas)
+    finally:
+        if ejecutor is not None:
+            ejecutor.shutdown()
+    informe['rechazados'].sort(key=lambda r: r['fila'])
+    return informe
+
+def argumentos():
+    parser = argparse.ArgumentParser(description="Importa usuarios en bloque desde CSV, NDJSON o JSON")
+    parser.add_argument('archivo', help="Archivo de usuarios ('-' para la entrada estándar)")
+    parser.add_argument('--formato', choices=('csv', 'ndjson', 'json'),
+                        help="Por defecto se deduce de la extensión")
+    parser.add_argument('--lote', type=int, default=TAMANO_LOTE, help="Filas por transacción")
+    parser.add_argument('--trabajadores', type=int, default=None, help="Hilos propios para calcular los hashes (por defecto los del KDF)")
+    parser.add_argument('--reporte', help="Guarda las filas rechazadas en este archivo CSV")
+    return parser.parse_args()
+
+if __name__ == '__main__':
+    args = argumentos()
+    formato = args.formato or ('ndjson' if args.archivo == '-' else _formato_de(args.archivo))
+    inicio = time.perf_counter()
+    if args.archivo == '-':
+        informe = importar_usuarios(leer_usuarios(sys.stdin, formato), args.lote, args.trabajadores)
+    else:
+        with open(args.archivo, encoding='utf-8-sig', newline='') as archivo:
+            informe = importar_usuarios(leer_usuarios(archivo, formato), args.lote, args.trabajadores)
+    duracion = time.perf_counter() - inicio
+
+    print(f"Filas leídas: {informe['leidos']}")
+    print(f"Usuarios registrados: {informe['insertados']}")
+    print(f"Filas rechazadas: {len(informe['rechazados'])}")
+    print(f"Tiempo: {duracion:.2f} s")
+    if args.reporte:
+        with open(args.reporte, 'w', encoding='utf-8', newline='') as salida:
+            escritor = csv.DictWriter(salida, fieldnames=('fila', 'correo', 'motivo'))
+            escritor.writeheader()
+            escritor.writerows(informe['rechazados'])
+        print(f"Reporte de rechazos guardado en {args.reporte}")
+    else:
+        for rechazo in informe['rechazados'][:20]:
+            print(f"  Fila {rechazo['fila']}: {rechazo['correo']} - {rechazo['motivo']}")
+        if len(informe['rechazados']) > 20:
+            print(f"  ... y {len(informe['rechazados']) - 20} más (use --reporte)")
@@ -0,0 +1,290 @@
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter
+from contextlib import contextmanager
+
+# Límites (en segundos) de los histogramas de latencia
+LIMITES_SEGUNDOS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+def _escapar(valor):
+    return str(valor).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+
+def _etiquetas(nombres, valores, extra=''):
+    pares = [f'{n}="{_escapar(v)}"' for n, v in zip(nombres, valores)]
+    if extra:
+        pares.append(extra)
+    return '{' + ','.join(pares) + '}' if pares else ''
+
+def _numero(valor):
+    if valor == float('inf'):
+        return '+Inf'
+    return repr(float(valor)) if isinstance(valor, float) else str(valor)
+
+class _Metrica:
+    """Métrica con etiquetas; los valores de las etiquetas se pasan en el orden de 'etiquetas'"""
+    tipo = 'untyped'
+
+    def __init__(self, nombre, ayuda, etiquetas=()):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.etiquetas = tuple(etiquetas)
+        self._valores = {}
+        self._lock = threading.Lock()
+
+    def exportar(self):
+        lineas = [f'# HELP {self.nombre} {self.ayuda}', f'# TYPE {self.nombre} {self.tipo}']
+        with self._lock:
+            valores = list(self._valores.items())
+        for clave, valor in valores:
+            lineas.extend(self._lineas(clave, valor))
+        return lineas
+
+    def _lineas(self, clave, valor):
+        return [f'{self.nombre}{_etiquetas(self.etiquetas, clave)} {_numero(valor)}']
+
+class Contador(_Metrica):
+    tipo = 'counter'
+
+    def sumar(self, *etiquetas, valor=1):
+        with self._lock:
+            self._valores[etiquetas] = self._valores.get(etiquetas, 0) + valor
+
+class Medidor(_Metrica):
+    tipo = 'gauge'
+
+    def sumar(self, *etiquetas, valor=1):
+        with self._lock:
+            self._valores[etiquetas] = self._valores.get(etiquetas, 0) + valor
+
+    def fijar(self, *etiquetas, valor):
+        with self._lock:
+            self._valores[etiquetas] = valor
+
+class Histograma(_Metrica):
+    """Cada observación cuesta una búsqueda binaria en los límites y una suma bajo el lock"""
+    tipo = 'histogram'
+
+    def __init__(self, nombre, ayuda, etiquetas=(), limites=LIMITES_SEGUNDOS):
+        super().__init__(nombre, ayuda, etiquetas)
+        self.limites = tuple(limites)
+
+    def observar(self, valor, *etiquetas):
+        posicion = bisect_left(self.limites, valor)
+        with self._lock:
+            datos = self._valores.get(etiquetas)
+            if datos is None:
+                # [conteo por cubeta..., +Inf], suma
+                datos = self._valores[etiquetas] = [[0] * (len(self.limites) + 1), 0.0]
+            datos[0][posicion] += 1
+            datos[1] += valor
+
+    @contextmanager
+    def medir(self, *etiquetas):
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observar(time.perf_counter() - inicio, *etiquetas)
+
+    def _lineas(self, clave, valor):
+        cubetas, suma = valor
+        lineas = []
+        acumulado = 0
+        for limite, cantidad in zip(self.limites + (float('inf'),), cubetas):
+            acumulado += cantidad
+            le = 'le="' + _numero(limite) + '"'
+            lineas.append(f'{self.nombre}_bucket{_etiquetas(self.etiquetas, clave, le)} {acumulado}')
+        etiquetas = _etiquetas(self.etiquetas, clave)
+        lineas.append(f'{self.nombre}_sum{etiquetas} {_numero(suma)}')
+        lineas.append(f'{self.nombre}_count{etiquetas} {acumulado}')
+        return lineas
+
+class Registro:
+    """
+    Métricas del proceso. Además de las métricas propias acepta colectores:
+    funciones que se llaman al exportar y devuelven métricas ya armadas, para
+    leer contadores que otros objetos llevan por su cuenta (cachés, colas)
+    """
+
+    def __init__(self):
+        self._metricas = {}
+        self._colectores = []
+        self._lock = threading.Lock()
+
+    def _registrar(self, metrica):
+        with self._lock:
+            # Registrar dos veces el mismo nombre (p. ej. al recargar un módulo) devuelve la existente
+            return self._metricas.setdefault(metrica.nombre, metrica)
+
+    def contador(self, nombre, ayuda, etiquetas=()):
+        return self._registrar(Contador(nombre, ayuda, etiquetas))
+
+    def medidor(self, nombre, ayuda, etiquetas=()):
+        return self._registrar(Medidor(nombre, ayuda, etiquetas))
+
+    def histograma(self, nombre, ayuda, etiquetas=(), limites=LIMITES_SEGUNDOS):
+        return self._registrar(Histograma(nombre, ayuda, etiquetas, limites))
+
+    def colector(self, funcion):
+        """funcion() -> lista de métricas (Contador/Medidor) con sus valores del momento"""
+        with self._lock:
+            self._colectores.append(funcion)
+
+    def exportar(self):
+        """Texto en el formato de exposición de Prometheus (versión 0.0.4)"""
+        with self._lock:
+            metricas = list(self._metricas.values())
+            colectores = list(self._colectores)
+        lineas = []
+        for metrica in metricas:
+            lineas.extend(metrica.exportar())
+        for colector in colectores:
+            try:
+                for metrica in colector():
+                    lineas.extend(metrica.exportar())
+            except Exception:
+                registro.exception("Falló un colector de métricas")
+        return '\n'.join(lineas) + '\n'
+
+REGISTRO = Registro()
+TIPO_CONTENIDO = 'text/plain; version=0.0.4; charset=utf-8'
+
+def valores(clase, nombre, ayuda, etiquetas, muestras):
+    """Métrica armada al vuelo para un colector: muestras es {(valores de etiquetas): valor}"""
+    metrica = clase(nombre, ayuda, etiquetas)
+    metrica._valores = dict(muestras)
+    return metrica
+
+# ----------------------------------------------------------------------
+# Registro estructurado y asíncrono
+# ----------------------------------------------------------------------
+
+registro = logging.getLogger('proyecto_md')
+
+# Atributos propios de LogRecord; el resto son los campos pasados en 'extra'
+_ATRIBUTOS_REGISTRO = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+class FormatoJSON(logging.Formatter):
+    """Una línea JSON por registro, con los campos de 'extra' al mismo nivel"""
+
+    def format(self, record):
+        datos = {
+            'ts': round(record.created, 3),
+            'nivel': record.levelname,
+            'origen': record.name,
+            'mensaje': record.getMessage(),
+        }
+        for clave, valor in vars(record).items():
+            if clave not in _ATRIBUTOS_REGISTRO:
+                datos[clave] = valor
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            datos['error'] = record.exc_text
+        return json.dumps(datos, ensure_ascii=False, default=str)
+
+class _ManejadorCola(logging.handlers.QueueHandler):
+    """
+    Encola el registro con el mensaje ya interpolado (los argumentos pueden
+    cambiar después) y la traza como texto, pero sin pegarla al mensaje
+    como hace QueueHandler, para que quede en su propio campo
+    """
+
+    def prepare(self, record):
+        record = logging.makeLogRecord(vars(record))
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+def configurar_registro(nivel=logging.INFO, destino=None):
+    """
+    Envía los registros de 'proyecto_md' a una cola que vacía un hilo aparte:
+    el hilo de la petición sólo encola, y el formateo a JSON y la escritura
+    ocurren fuera del camino de la petición. Devuelve el QueueListener para
+    detenerlo (y vaciar la cola) al apagar
+    """
+    cola = queue.SimpleQueue()
+    manejador = logging.StreamHandler(destino or sys.stderr)
+    manejador.setFormatter(FormatoJSON())
+    oyente = logging.handlers.QueueListener(cola, manejador, respect_handler_level=True)
+    oyente.start()
+    registro.handlers = [_ManejadorCola(cola)]
+    registro.setLevel(nivel)
+    registro.propagate = False
+    return oyente
+
+# ----------------------------------------------------------------------
+# Perfilador por muestreo
+# ----------------------------------------------------------------------
+
+class Perfilador:
+    """
+    Perfilador por muestreo para un servidor en marcha: cada 'intervalo'
+    segundos toma la pila de todos los hilos (sys._current_frames) y cuenta
+    cuántas veces aparece cada una. El reporte usa el formato de pilas
+    plegadas ("a;b;c cantidad") que entienden las herramientas de flame graphs
+    """
+
+    def __init__(self, intervalo=0.005, profundidad=64):
+        self.intervalo = intervalo
+        self.profundidad = profundidad
+        self._pilas = Counter()
+        self._muestras = 0
+        self._hilo = None
+        self._detener = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def activo(self):
+        return self._hilo is not None and self._hilo.is_alive()
+
+    def iniciar(self, intervalo=None):
+        if self.activo:
+            return
+        if intervalo:
+            self.intervalo = intervalo
+        with self._lock:
+            self._pilas.clear()
+        self._muestras = 0
+        self._detener.clear()
+        self._hilo = threading.Thread(target=self._muestrear, name='perfilador', daemon=True)
+        self._hilo.start()
+
+    def detener(self):
+        self._detener.set()
+        if self._hilo is not None:
+            self._hilo.join()
+
+    def _muestrear(self):
+        propio = threading.get_ident()
+        while not self._detener.wait(self.intervalo):
+            for id_hilo, marco in sys._current_frames().items():
+                if id_hilo == propio:
+                    continue
+                pila = []
+                while marco is not None and len(pila) < self.profundidad:
+                    codigo = marco.f_code
+                    pila.append(f'{codigo.co_name} ({os.path.basename(codigo.co_filename)}:{marco.f_lineno})')
+                    marco = marco.f_back
+                with self._lock:
+                    self._pilas[';'.join(reversed(pila))] += 1
+            self._muestras += 1
+
+    def reporte(self):
+        with self._lock:
+            pilas = self._pilas.most_common()
+        return ''.join(f'{pila} {cantidad}\n' for pila, cantidad in pilas)
+
+    def estado(self):
+        return {'activo': self.activo, 'intervalo_ms': self.intervalo * 1000,
+                'muestras': self._muestras, 'pilas': len(self._pilas)}
@@ -0,0 +1,128 @@
+import logging
+import sqlite3
+
+registro = logging.getLogger('proyecto_md.migraciones')
+
+# Cada migración se aplica una sola vez; la versión aplicada se guarda en PRAGMA user_version
+
+def _crear_usuarios(cursor):
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS usuarios (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            nombre TEXT NOT NULL,
+            correo TEXT UNIQUE NOT NULL,
+            contraseña TEXT NOT NULL
+        )
+    ''')
+
+def _columnas(cursor, tabla):
+    return {fila[1] for fila in cursor.execute(f'PRAGMA table_info("{tabla}")')}
+
+def _reconciliar_usiarios(cursor):
+    """
+    La base traía una tabla 'Usiarios' (con tipo de usuario y nombre de usuario)
+    que el registro nunca usó. Se agregan esas columnas a 'usuarios', se copian
+    las filas con un correo nuevo y se elimina la tabla vieja. Las filas que no
+    se pueden copiar (sin correo, o con un correo que ya está en 'usuarios' o
+    repetido) quedan en 'usiarios_sin_migrar' con el motivo.
+    """
+    columnas = _columnas(cursor, 'usuarios')
+    if 'tipo_usuario' not in columnas:
+        cursor.execute('ALTER TABLE usuarios ADD COLUMN tipo_usuario INTEGER')
+    if 'usuario' not in columnas:
+        cursor.execute('ALTER TABLE usuarios ADD COLUMN usuario TEXT')
+
+    existe = cursor.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'Usiarios'"
+    ).fetchone()
+    if not existe:
+        return
+    # Se copia la primera fila de cada correo que todavía no está en usuarios
+    copiables = '''
+        correo IS NOT NULL
+        AND correo NOT IN (SELECT correo FROM usuarios)
+        AND rowid = (SELECT MIN(rowid) FROM Usiarios AS otra WHERE otra.correo = Usiarios.correo)
+    '''
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS usiarios_sin_migrar AS
+        SELECT *, '' AS motivo FROM Usiarios WHERE 0
+    ''')
+    cursor.execute(f'''
+        INSERT INTO usiarios_sin_migrar
+        SELECT *, CASE
+            WHEN correo IS NULL THEN 'sin correo'
+            WHEN correo IN (SELECT correo FROM usuarios) THEN 'el correo ya estaba en usuarios'
+            ELSE 'correo repetido en Usiarios'
+        END
+        FROM Usiarios
+        WHERE NOT ({copiables})
+    ''')
+    sin_migrar = cursor.rowcount
+    cursor.execute(f'''
+        INSERT INTO usuarios (nombre, correo, contraseña, tipo_usuario, usuario)
+        SELECT COALESCE(nombre, ''), correo, COALESCE(contraseña, ''), tipoUsuario, usuario
+        FROM Usiarios
+        WHERE {copiables}
+    ''')
+    cursor.execute('DROP TABLE Usiarios')
+    if sin_migrar:
+        registro.warning("%d filas de Usiarios no se copiaron a usuarios; quedaron en usiarios_sin_migrar",
+                         sin_migrar)
+
+def _crear_sesiones(cursor):
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS sesiones (
+            id TEXT PRIMARY KEY,
+            usuario TEXT NOT NULL,
+            expira REAL NOT NULL
+        )
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_sesiones_expira ON sesiones (expira)')
+
+def _crear_cache_ia(cursor):
+    # Respuestas de Gemini (JSON en 'contenido') y audios de ElevenLabs (en disco;
+    # 'contenido' guarda el tipo MIME). La clave es el SHA-256 de la petición
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS cache_ia (
+            clave TEXT PRIMARY KEY,
+            tipo TEXT NOT NULL,
+            contenido TEXT,
+            tamano INTEGER NOT NULL,
+            usado REAL NOT NULL
+        )
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_cache_ia_usado ON cache_ia (tipo, usado)')
+
+MIGRACIONES = [
+    (1, "Crear tabla usuarios", _crear_usuarios),
+    (2, "Reconciliar la tabla Usiarios con usuarios", _reconciliar_usiarios),
+    (3, "Crear tabla sesiones", _crear_sesiones),
+    (4, "Crear tabla cache_ia", _crear_cache_ia),
+]
+
+def version_actual(conexion):
+    return conexion.execute('PRAGMA user_version').fetchone()[0]
+
+def migrar(conexion):
+    """Aplica en orden las migraciones pendientes, cada una en su propia transacción"""
+    aplicadas = []
+    for version, descripcion, funcion in MIGRACIONES:
+        if version <= version_actual(conexion):
+            continue
+        cursor = conexion.cursor()
+        try:
+            cursor.execute('BEGIN IMMEDIATE')
+            # Otro proceso pudo aplicarla mientras esperábamos el bloqueo
+            if version <= version_actual(conexion):
+                conexion.rollback()
+                continue
+            funcion(cursor)
+            cursor.execute(f'PRAGMA user_version = {version}')
+            conexion.commit()
+            aplicadas.append(descripcion)
+        except sqlite3.Error:
+            conexion.rollback()
+            raise
+        finally:
+            cursor.close()
+    return aplicadas
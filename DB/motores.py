@@ -0,0 +1,47 @@
+import importlib.util
+import os
+import sys
+import threading
+
+RAIZ_CODIGOS = os.path.realpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Controlador', 'Códigos'))
+
+# Nombre ASCII con el que se registra cada módulo -> archivo en Controlador/Códigos.
+# Los archivos tienen espacios y acentos, así que no se pueden importar con 'import'
+MODULOS = {
+    'logica_booleana': 'Lógica Booleana.py',
+    'logica_binaria': 'Lógica Binaria.py',
+    'logica_conjuntos': 'Lógica Conjuntos.py',
+    'logica_grafos': 'Lógica Grafos.py',
+}
+
+_lock = threading.Lock()
+
+def cargar(nombre):
+    """
+    Importa un módulo de Controlador/Códigos por su nombre ASCII. Queda en
+    sys.modules, de modo que las cargas siguientes (y pickle en los procesos
+    de trabajo) lo encuentran como un módulo normal
+    """
+    modulo = sys.modules.get(nombre)
+    if modulo is not None:
+        return modulo
+    if nombre not in MODULOS:
+        raise ImportError(f"Motor desconocido: {nombre}")
+    with _lock:
+        modulo = sys.modules.get(nombre)
+        if modulo is not None:
+            return modulo
+        spec = importlib.util.spec_from_file_location(nombre, os.path.join(RAIZ_CODIGOS, MODULOS[nombre]))
+        modulo = importlib.util.module_from_spec(spec)
+        sys.modules[nombre] = modulo
+        try:
+            spec.loader.exec_module(modulo)
+        except BaseException:
+            del sys.modules[nombre]
+            raise
+    return modulo
+
+def precargar():
+    """Carga todos los motores; se usa como inicializador de los procesos de trabajo"""
+    for nombre in MODULOS:
+        cargar(nombre)
@@ -0,0 +1,356 @@
+import hashlib
+import http.client
+import json
+import os
+import queue
+import re
+import threading
+import time
+import urllib.parse
+from concurrent.futures import Future
+from metricas import REGISTRO
+
+# Servicios de IA que usa 1-Center Web.html. Las URLs se pueden cambiar (por
+# ejemplo, para apuntar a un servidor de prueba local) y las claves viven en el servidor
+GEMINI_URL = os.environ.get('PROYECTO_MD_GEMINI_URL', 'https://generativelanguage.googleapis.com')
+ELEVENLABS_URL = os.environ.get('PROYECTO_MD_ELEVENLABS_URL', 'https://api.elevenlabs.io')
+MODELO_GEMINI = os.environ.get('PROYECTO_MD_GEMINI_MODELO', 'gemini-2.5-flash')
+VOZ_ELEVENLABS = os.environ.get('PROYECTO_MD_ELEVENLABS_VOZ', '')
+RUTA_AUDIO = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache_audio')
+
+MAX_CUERPO_IA = 256 * 1024
+MAX_TEXTO_VOZ = 5000
+PATRON_NOMBRE = re.compile(r'^[\w.-]{1,64}$')
+
+LLAMADAS_SERVICIO = REGISTRO.histograma('proyecto_md_ia_servicio_segundos',
+                                        'Duración de las llamadas a Gemini y ElevenLabs', ('servicio', 'estado'))
+
+class ErrorServicio(Exception):
+    """El servicio respondió con error; se reenvía tal cual al cliente y no se guarda"""
+
+    def __init__(self, codigo, cuerpo, tipo):
+        super().__init__(f"El servicio respondió {codigo}")
+        self.codigo = codigo
+        self.cuerpo = cuerpo
+        self.tipo = tipo
+
+class Saturado(Exception):
+    """Hay demasiadas llamadas en curso a los servicios"""
+
+class LimiteTasa:
+    """
+    Cubeta de fichas por usuario: 'por_minuto' consultas sostenidas con
+    ráfagas de hasta 'rafaga'. Las cubetas que ya se llenaron de nuevo se
+    descartan, para que la tabla no crezca con los usuarios inactivos
+    """
+
+    def __init__(self, por_minuto=20, rafaga=10, max_usuarios=4096):
+        self.por_minuto = por_minuto
+        self.rafaga = rafaga
+        self.max_usuarios = max_usuarios
+        self._ritmo = por_minuto / 60
+        self._cubetas = {}
+        self._lock = threading.Lock()
+
+    def consumir(self, usuario):
+        """Gasta una ficha del usuario: devuelve 0 si puede seguir o los segundos que debe esperar"""
+        ahora = time.monotonic()
+        with self._lock:
+            fichas, antes = self._cubetas.get(usuario, (self.rafaga, ahora))
+            fichas = min(self.rafaga, fichas + (ahora - antes) * self._ritmo)
+            if fichas < 1:
+                self._cubetas[usuario] = (fichas, ahora)
+                return (1 - fichas) / self._ritmo
+            self._cubetas[usuario] = (fichas - 1, ahora)
+            if len(self._cubetas) > self.max_usuarios:
+                self._purgar(ahora)
+            return 0
+
+    def _purgar(self, ahora):
+        llenas = [usuario for usuario, (fichas, antes) in self._cubetas.items()
+                  if fichas + (ahora - antes) * self._ritmo >= self.rafaga]
+        for usuario in llenas:
+            del self._cubetas[usuario]
+
+class PoolHTTP:
+    """
+    Conexiones keep-alive a un servicio, reutilizadas entre peticiones para
+    no repetir el saludo TCP/TLS. Si una conexión guardada resultó cerrada
+    por el otro lado, la petición se repite una vez con una nueva
+    """
+
+    def __init__(self, url_base, tamano=4, tiempo_espera=60, nombre=''):
+        partes = urllib.parse.urlsplit(url_base)
+        self.nombre = nombre
+        self.seguro = partes.scheme == 'https'
+        self.host = partes.hostname
+        self.puerto = partes.port
+        self.prefijo = partes.path.rstrip('/')
+        self.tiempo_espera = tiempo_espera
+        self._libres = queue.LifoQueue(maxsize=tamano)
+
+    def _nueva(self):
+        clase = http.client.HTTPSConnection if self.seguro else http.client.HTTPConnection
+        return clase(self.host, self.puerto, timeout=self.tiempo_espera)
+
+    def solicitar(self, metodo, ruta, cuerpo=None, cabeceras=None):
+        """(estado, tipo de contenido, cuerpo) de la respuesta"""
+        inicio = time.perf_counter()
+        for intento in range(2):
+            try:
+                conexion, reutilizada = self._libres.get_nowait(), True
+            except queue.Empty:
+                conexion, reutilizada = self._nueva(), False
+            try:
+                conexion.request(metodo, self.prefijo + ruta, body=cuerpo, headers=cabeceras or {})
+                respuesta = conexion.getresponse()
+                datos = respuesta.read()
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                conexion.close()
+                if reutilizada and intento == 0:
+                    continue
+                raise
+            except BaseException:
+                conexion.close()
+                raise
+            if respuesta.will_close:
+                conexion.close()
+            else:
+                try:
+                    self._libres.put_nowait(conexion)
+                except queue.Full:
+                    conexion.close()
+            LLAMADAS_SERVICIO.observar(time.perf_counter() - inicio, self.nombre, str(respuesta.status))
+            return respuesta.status, respuesta.getheader('Content-Type', ''), datos
+
+    def cerrar(self):
+        while True:
+            try:
+                self._libres.get_nowait().close()
+            except queue.Empty:
+                return
+
+class CacheIA:
+    """
+    Caché por contenido de las respuestas: el texto (JSON de Gemini) en la
+    tabla cache_ia y los audios en archivos de 'ruta_audio', cada tipo con
+    su propio límite de bytes. Al pasarse se borran los menos usados
+    recientemente (LRU por tamaño)
+    """
+
+    def __init__(self, pool, ruta_audio=RUTA_AUDIO, max_texto=64 * 1024 * 1024, max_audio=512 * 1024 * 1024):
+        self._pool = pool
+        self.ruta_audio = ruta_audio
+        self.limites = {'texto': max_texto, 'audio': max_audio}
+        self._lock = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+        os.makedirs(ruta_audio, exist_ok=True)
+        with pool.conexion() as conn:
+            filas = conn.execute('SELECT tipo, COALESCE(SUM(tamano), 0) FROM cache_ia GROUP BY tipo').fetchall()
+        self._tamanos = {'texto': 0, 'audio': 0}
+        self._tamanos.update(dict(filas))
+
+    def _archivo(self, clave):
+        return os.path.join(self.ruta_audio, clave + '.bin')
+
+    def obtener(self, clave, tipo):
+        """(contenido en bytes, tipo MIME) o None"""
+        with self._pool.conexion() as conn:
+            fila = conn.execute('SELECT contenido, tamano FROM cache_ia WHERE clave = ? AND tipo = ?',
+                                (clave, tipo)).fetchone()
+            if fila is None:
+                self.fallos += 1
+                return None
+            contenido, tamano = fila
+            if tipo == 'texto':
+                datos, mime = contenido.encode(), 'application/json; charset=utf-8'
+            else:
+                try:
+                    with open(self._archivo(clave), 'rb') as f:
+                        datos = f.read()
+                except FileNotFoundError:
+                    # Alguien borró el archivo: la fila ya no sirve
+                    conn.execute('DELETE FROM cache_ia WHERE clave = ?', (clave,))
+                    conn.commit()
+                    with self._lock:
+                        self._tamanos[tipo] -= tamano
+                    self.fallos += 1
+                    return None
+                mime = contenido
+            conn.execute('UPDATE cache_ia SET usado = ? WHERE clave = ?', (time.time(), clave))
+            conn.commit()
+        self.aciertos += 1
+        return datos, mime
+
+    def guardar(self, clave, tipo, datos, mime):
+        if len(datos) > self.limites[tipo]:
+            return
+        if tipo == 'audio':
+            temporal = self._archivo(clave) + '.tmp'
+            with open(temporal, 'wb') as f:
+                f.write(datos)
+            os.replace(temporal, self._archivo(clave))
+            contenido = mime
+        else:
+            contenido = datos.decode()
+        with self._pool.conexion() as conn:
+            anterior = conn.execute('SELECT tamano FROM cache_ia WHERE clave = ?', (clave,)).fetchone()
+            conn.execute('INSERT OR REPLACE INTO cache_ia (clave, tipo, contenido, tamano, usado) VALUES (?, ?, ?, ?, ?)',
+                         (clave, tipo, contenido, len(datos), time.time()))
+            conn.commit()
+        with self._lock:
+            self._tamanos[tipo] += len(datos) - (anterior[0] if anterior else 0)
+            sobra = self._tamanos[tipo] - self.limites[tipo]
+        if sobra > 0:
+            self._desalojar(tipo, sobra)
+
+    def _desalojar(self, tipo, sobra):
+        """Borra las entradas menos usadas hasta liberar 'sobra' bytes"""
+        borradas = []
+        liberado = 0
+        with self._pool.conexion() as conn:
+            for clave, tamano in conn.execute('SELECT clave, tamano FROM cache_ia WHERE tipo = ? ORDER BY usado',
+                                              (tipo,)):
+                if liberado >= sobra:
+                    break
+                borradas.append(clave)
+                liberado += tamano
+            conn.executemany('DELETE FROM cache_ia WHERE clave = ?', [(c,) for c in borradas])
+            conn.commit()
+        with self._lock:
+            self._tamanos[tipo] -= liberado
+        if tipo == 'audio':
+            for clave in borradas:
+                try:
+                    os.remove(self._archivo(clave))
+                except FileNotFoundError:
+                    pass
+
+    def estadisticas(self):
+        with self._lock:
+            return {'aciertos': self.aciertos, 'fallos': self.fallos,
+                    'bytes': dict(self._tamanos), 'limites': dict(self.limites)}
+
+def clave_de(servicio, *partes):
+    """SHA-256 de la petición en JSON canónico: peticiones iguales dan la misma clave"""
+    texto = json.dumps([servicio, *partes], sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha256(texto.encode()).hexdigest()
+
+class ProxyIA:
+    """
+    Reenvía las llamadas de Gemini y ElevenLabs con las claves del servidor.
+    Las respuestas correctas quedan en la caché, y si llegan varias peticiones
+    idénticas mientras la primera sigue en curso, todas esperan esa misma
+    llamada en lugar de repetirla. Como mucho 'max_simultaneas' llamadas
+    salen a la vez; las que esperen más de 'espera' segundos reciben Saturado.
+    'limite' reparte las consultas por usuario, porque gastan las claves del servidor
+    """
+
+    def __init__(self, cache, gemini_url=GEMINI_URL, elevenlabs_url=ELEVENLABS_URL,
+                 clave_gemini=None, clave_elevenlabs=None, voz=VOZ_ELEVENLABS,
+                 max_simultaneas=8, espera=30, tiempo_espera=60, por_minuto=20, rafaga=10):
+        self.cache = cache
+        self.limite = LimiteTasa(por_minuto, rafaga)
+        self.clave_gemini = clave_gemini or os.environ.get('PROYECTO_MD_GEMINI_KEY', '')
+        self.clave_elevenlabs = clave_elevenlabs or os.environ.get('PROYECTO_MD_ELEVENLABS_KEY', '')
+        self.voz_defecto = voz
+        self.espera = espera
+        self._gemini = PoolHTTP(gemini_url, max_simultaneas, tiempo_espera, 'gemini')
+        self._elevenlabs = PoolHTTP(elevenlabs_url, max_simultaneas, tiempo_espera, 'elevenlabs')
+        self._cupos = threading.BoundedSemaphore(max_simultaneas)
+        self._en_curso = {}
+        self._lock = threading.Lock()
+        self.llamadas = 0
+        self.agrupadas = 0
+
+    def _una_vez(self, clave, tipo, llamar):
+        """
+        Resultado (datos, mime) y su origen: 'cache', 'servicio' o 'agrupada'
+        si otra petición idéntica ya lo estaba pidiendo
+        """
+        encontrado = self.cache.obtener(clave, tipo)
+        if encontrado is not None:
+            return encontrado, 'cache'
+        with self._lock:
+            futuro = self._en_curso.get(clave)
+            propio = futuro is None
+            if propio:
+                futuro = Future()
+                self._en_curso[clave] = futuro
+            else:
+                self.agrupadas += 1
+        if not propio:
+            return futuro.result(), 'agrupada'
+        try:
+            if not self._cupos.acquire(timeout=self.espera):
+                raise Saturado("Hay demasiadas consultas a la IA en curso; intenta más tarde")
+            try:
+                self.llamadas += 1
+                estado, mime, datos = llamar()
+            finally:
+                self._cupos.release()
+            if estado != 200:
+                raise ErrorServicio(estado, datos, mime)
+            self.cache.guardar(clave, tipo, datos, mime)
+            futuro.set_result((datos, mime))
+        except BaseException as error:
+            futuro.set_exception(error)
+            raise
+        finally:
+            with self._lock:
+                del self._en_curso[clave]
+        return (datos, mime), 'servicio'
+
+    def gemini(self, cuerpo, modelo=None, clave_cliente=None):
+        """Reenvía un generateContent (el requestBody de la página)"""
+        modelo = modelo or MODELO_GEMINI
+        if not PATRON_NOMBRE.match(modelo):
+            raise ValueError("Nombre de modelo no válido")
+        if not isinstance(cuerpo, dict) or not isinstance(cuerpo.get('contents'), list) or not cuerpo['contents']:
+            raise ValueError("El cuerpo debe tener la lista 'contents'")
+        clave_api = self.clave_gemini or clave_cliente
+        if not clave_api:
+            raise PermissionError("El servidor no tiene una clave de Gemini configurada")
+        datos = json.dumps(cuerpo, ensure_ascii=False).encode()
+
+        def llamar():
+            return self._gemini.solicitar('POST', f'/v1/models/{modelo}:generateContent', datos, {
+                'Content-Type': 'application/json', 'x-goog-api-key': clave_api,
+            })
+        return self._una_vez(clave_de('gemini', modelo, cuerpo), 'texto', llamar)
+
+    def voz(self, cuerpo, clave_cliente=None):
+        """Texto a voz: {text, voice_id?, model_id?, voice_settings?} -> audio"""
+        if not isinstance(cuerpo, dict) or not isinstance(cuerpo.get('text'), str) or not cuerpo['text'].strip():
+            raise ValueError("Falta el texto")
+        if len(cuerpo['text']) > MAX_TEXTO_VOZ:
+            raise ValueError(f"El texto supera los {MAX_TEXTO_VOZ} caracteres")
+        voz = cuerpo.pop('voice_id', None) or self.voz_defecto
+        if not voz or not PATRON_NOMBRE.match(voz):
+            raise ValueError("Falta una voz válida (voice_id)")
+        clave_api = self.clave_elevenlabs or clave_cliente
+        if not clave_api:
+            raise PermissionError("El servidor no tiene una clave de ElevenLabs configurada")
+        cuerpo.setdefault('model_id', 'eleven_multilingual_v2')
+        datos = json.dumps(cuerpo, ensure_ascii=False).encode()
+
+        def llamar():
+            return self._elevenlabs.solicitar('POST', f'/v1/text-to-speech/{voz}', datos, {
+                'Content-Type': 'application/json', 'Accept': 'audio/mpeg', 'xi-api-key': clave_api,
+            })
+        return self._una_vez(clave_de('voz', voz, cuerpo), 'audio', llamar)
+
+    def estado(self):
+        return {
+            'gemini': bool(self.clave_gemini),
+            'voz': bool(self.clave_elevenlabs and self.voz_defecto),
+            'llamadas': self.llamadas,
+            'agrupadas': self.agrupadas,
+            'por_minuto': self.limite.por_minuto,
+            'cache': self.cache.estadisticas(),
+        }
+
+    def cerrar(self):
+        self._gemini.cerrar()
+        self._elevenlabs.cerrar()
@@ -1,25 +1,303 @@
-from http.server import BaseHTTPRequestHandler, HTTPServer
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from concurrent.futures import ThreadPoolExecutor
+import argparse
+import logging
+import math
+import socket
+import signal
+import threading
+import time
 import urllib.parse
-import os
 import json
-from conecion import CConexion
-from usuairo_controlador import registrar_usuario
+from itertools import islice
+import api_calculo
+import metricas
+import grafos
+import proxy_ia
+from trabajos import ColaTrabajos, ColaLlena, ColaNoDisponible
+from conecion import obtener_pool
+from estaticos import CacheEstaticos, servir_estatico
+from importar_usuarios import importar_usuarios, leer_cuerpo, MAX_FILAS_LOTE
+from sesiones import AlmacenSesiones, token_de_peticion, cookie_de_sesion, cookie_vencida
+from usuairo_controlador import registrar_usuario, autenticar_usuario
+
+# Archivos de Vista/ servidos desde memoria
+CACHE_ESTATICOS = CacheEstaticos()
+# Tamaño máximo del cuerpo de /registro/lote
+MAX_CUERPO_LOTE = 16 * 1024 * 1024
+
+registro = logging.getLogger('proyecto_md.servidor')
+registro_http = logging.getLogger('proyecto_md.http')
+
+LATENCIA_HTTP = metricas.REGISTRO.histograma('proyecto_md_http_segundos', 'Latencia de las peticiones HTTP',
+                                             ('ruta', 'metodo', 'codigo'))
+HTTP_EN_CURSO = metricas.REGISTRO.medidor('proyecto_md_http_en_curso', 'Peticiones HTTP atendiéndose ahora')
+TIEMPO_GRAFOS = metricas.REGISTRO.histograma('proyecto_md_grafos_segundos',
+                                             'Duración de las consultas y eventos de grafos', ('operacion',))
+PERFILADOR = metricas.Perfilador()
+
+# Rutas con nombre propio en las métricas; las demás se agrupan para no crear una serie por URL
+RUTAS_METRICAS = {'/registro', '/registro/lote', '/login', '/logout', '/sesion', '/trabajos', '/grafos',
+                  '/grafos/generar', '/ia/gemini', '/ia/voz', '/ia/estado', '/metrics', '/metrics/perfil',
+                  *api_calculo.RUTAS}
+SUBRUTAS_METRICAS = {'progreso', 'eventos', *grafos.CONSULTAS}
+
+def ruta_metrica(ruta):
+    """Etiqueta de la ruta: /trabajos/<id> y /grafos/<id> se agrupan, y el resto son archivos estáticos"""
+    ruta = urllib.parse.urlsplit(ruta).path
+    if ruta in RUTAS_METRICAS:
+        return ruta
+    partes = ruta.split('/')
+    if len(partes) >= 3 and partes[1] in ('trabajos', 'grafos'):
+        sub = partes[3] if len(partes) == 4 and partes[3] in SUBRUTAS_METRICAS else None
+        return f'/{partes[1]}/:id' + (f'/{sub}' if sub else '')
+    return 'estatico'
+
+def destino_local(siguiente):
+    """
+    Ruta a la que redirigir tras el login, o None si no es una página propia.
+    Las páginas envían el valor ya codificado ('/ACCESO%20WEB/...'): se
+    codifica sólo lo que falte, sin volver a codificar los '%'
+    """
+    if not siguiente.startswith('/') or siguiente.startswith('//') or '\\' in siguiente:
+        return None
+    siguiente = urllib.parse.quote(siguiente, safe="/?=&%")
+    partes = urllib.parse.urlsplit(siguiente)
+    if partes.scheme or partes.netloc or CACHE_ESTATICOS.resolver(siguiente) is None:
+        return None
+    return siguiente
+
+def colector_servidor():
+    """Métricas que leen los contadores propios de las cachés, sesiones, trabajos y grafos"""
+    estaticos = CACHE_ESTATICOS.estadisticas()
+    aciertos = {('estaticos',): estaticos['aciertos']}
+    fallos = {('estaticos',): estaticos['fallos']}
+    ocupados = {('estaticos',): estaticos['bytes']}
+    if Servidor.proxy_ia is not None:
+        cache_ia = Servidor.proxy_ia.cache.estadisticas()
+        aciertos[('ia',)] = cache_ia['aciertos']
+        fallos[('ia',)] = cache_ia['fallos']
+        for tipo, cantidad in cache_ia['bytes'].items():
+            ocupados[(f'ia_{tipo}',)] = cantidad
+    objetos = {}
+    if Servidor.sesiones is not None:
+        objetos[('sesiones',)] = Servidor.sesiones.estadisticas()['sesiones']
+    if Servidor.trabajos is not None:
+        objetos[('trabajos_activos',)] = Servidor.trabajos.estadisticas()['activos']
+    if Servidor.grafos is not None:
+        objetos[('grafos',)] = Servidor.grafos.estadisticas()['grafos']
+    return [
+        metricas.valores(metricas.Contador, 'proyecto_md_cache_aciertos_total', 'Aciertos de cada caché',
+                         ('cache',), aciertos),
+        metricas.valores(metricas.Contador, 'proyecto_md_cache_fallos_total', 'Fallos de cada caché',
+                         ('cache',), fallos),
+        metricas.valores(metricas.Medidor, 'proyecto_md_cache_bytes', 'Bytes ocupados por cada caché',
+                         ('cache',), ocupados),
+        metricas.valores(metricas.Medidor, 'proyecto_md_objetos', 'Sesiones, trabajos activos y grafos en memoria',
+                         ('tipo',), objetos),
+    ]
+
+metricas.REGISTRO.colector(colector_servidor)
+
+class ServidorConcurrente(ThreadingHTTPServer):
+    """
+    Servidor HTTP con un grupo acotado de hilos de trabajo.
+    Cuando todos los hilos y la cola están ocupados deja de aceptar
+    conexiones (las nuevas esperan en el backlog del socket) y al apagarse
+    termina las peticiones en curso antes de cerrar.
+    """
+    daemon_threads = True
+
+    def __init__(self, direccion, manejador, trabajadores=16, cola=64, backlog=128, tiempo_espera=15):
+        # request_queue_size es el backlog de listen(); debe fijarse antes de activar el socket
+        self.request_queue_size = backlog
+        self.tiempo_espera = tiempo_espera
+        self.apagando = False
+        self._pool = ThreadPoolExecutor(max_workers=trabajadores, thread_name_prefix='http')
+        self._cupos = threading.BoundedSemaphore(trabajadores + cola)
+        self._inactivas = set()
+        self._lock = threading.Lock()
+        super().__init__(direccion, manejador)
+
+    def process_request(self, request, client_address):
+        self._cupos.acquire()
+        try:
+            self._pool.submit(self._atender, request, client_address)
+        except RuntimeError:
+            # El pool ya se cerró: estamos apagando
+            self._cupos.release()
+            self.shutdown_request(request)
+
+    def _atender(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+            self._cupos.release()
+
+    def marcar_inactiva(self, conexion, inactiva):
+        """Registra las conexiones keep-alive que esperan su siguiente petición"""
+        with self._lock:
+            if inactiva:
+                self._inactivas.add(conexion)
+            else:
+                self._inactivas.discard(conexion)
+
+    def apagar(self):
+        """Deja de aceptar conexiones, despierta las inactivas y espera a las peticiones en curso"""
+        self.apagando = True
+        self.shutdown()
+        with self._lock:
+            for conexion in self._inactivas:
+                try:
+                    conexion.shutdown(socket.SHUT_RD)
+                except OSError:
+                    pass
+        self._pool.shutdown(wait=True)
+        self.server_close()
 
 class Servidor(BaseHTTPRequestHandler):
+    # HTTP/1.1 mantiene la conexión abierta entre peticiones (keep-alive)
+    protocol_version = 'HTTP/1.1'
+    # Almacén de sesiones, cola de trabajos de cálculo, grafos y proxy de IA; se crean al arrancar el servidor
+    sesiones = None
+    trabajos = None
+    grafos = None
+    proxy_ia = None
+
+    def setup(self):
+        self.timeout = getattr(self.server, 'tiempo_espera', None)
+        super().setup()
+
+    def handle_one_request(self):
+        marcar = getattr(self.server, 'marcar_inactiva', None)
+        if marcar:
+            marcar(self.connection, True)
+        self._inicio = None
+        try:
+            super().handle_one_request()
+        finally:
+            if marcar:
+                marcar(self.connection, False)
+            if self._inicio is not None:
+                self.registrar_peticion()
+        if getattr(self.server, 'apagando', False):
+            self.close_connection = True
+
+    def parse_request(self):
+        # La petición ya llegó: la conexión deja de estar inactiva
+        marcar = getattr(self.server, 'marcar_inactiva', None)
+        if marcar:
+            marcar(self.connection, False)
+        self._inicio = time.perf_counter()
+        self._codigo = None
+        HTTP_EN_CURSO.sumar()
+        return super().parse_request()
+
+    def send_response(self, code, message=None):
+        self._codigo = code
+        super().send_response(code, message)
+
+    def registrar_peticion(self):
+        """Al terminar cada petición: latencia por ruta y una línea de acceso estructurada"""
+        duracion = time.perf_counter() - self._inicio
+        HTTP_EN_CURSO.sumar(valor=-1)
+        metodo = getattr(self, 'command', None) or '-'
+        ruta = getattr(self, 'path', '')
+        codigo = str(self._codigo or 0)
+        LATENCIA_HTTP.observar(duracion, ruta_metrica(ruta), metodo, codigo)
+        if registro_http.isEnabledFor(logging.INFO):
+            registro_http.info('%s %s %s', metodo, ruta, codigo, extra={
+                'cliente': self.client_address[0], 'metodo': metodo, 'ruta': ruta,
+                'codigo': int(codigo), 'ms': round(duracion * 1000, 3),
+            })
+
+    def log_request(self, code='-', size='-'):
+        # registrar_peticion ya deja la línea de acceso
+        pass
+
+    def log_message(self, format, *args):
+        registro_http.warning(format, *args, extra={'cliente': self.client_address[0]})
+
+    def responder_json(self, codigo, datos, cabeceras=()):
+        cuerpo = json.dumps(datos, ensure_ascii=False).encode()
+        self.send_response(codigo)
+        self.send_header('Content-type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(cuerpo)))
+        # /ia/* gasta las claves del servidor: sólo para la propia página
+        if not self.path.startswith('/ia/'):
+            self.send_header('Access-Control-Allow-Origin', '*')
+        for nombre, valor in cabeceras:
+            self.send_header(nombre, valor)
+        self.end_headers()
+        self.wfile.write(cuerpo)
+
+    def redirigir(self, destino, cabeceras=()):
+        self.send_response(303)
+        self.send_header('Location', destino)
+        self.send_header('Content-Length', '0')
+        for nombre, valor in cabeceras:
+            self.send_header(nombre, valor)
+        self.end_headers()
+
+    def leer_formulario(self):
+        """Campos del cuerpo, enviado como formulario o como objeto JSON"""
+        length = int(self.headers.get('Content-Length', 0))
+        post_data = self.rfile.read(length).decode('utf-8')
+        if 'json' in self.headers.get('Content-Type', ''):
+            datos = json.loads(post_data or '{}')
+            return {clave: str(valor) for clave, valor in datos.items()} if isinstance(datos, dict) else {}
+        return {clave: valores[0] for clave, valores in urllib.parse.parse_qs(post_data).items()}
+
+    def usuario_actual(self):
+        """Usuario de la sesión de la petición (cookie o Bearer), sin consultar la base"""
+        if self.sesiones is None:
+            return None
+        return self.sesiones.validar(token_de_peticion(self.headers))
+
     def do_GET(self):
-        if self.path == '/':
-            try:
-                # Ajustamos la ruta al archivo HTML
-                html_path = os.path.join(os.path.dirname(__file__), '..', 'Vista', 'ACCESO WEB', 'Pg.Registro.html')
-                with open(html_path, 'rb') as f:
-                    self.send_response(200)
-                    self.send_header('Content-type', 'text/html')
-                    self.send_header('Access-Control-Allow-Origin', '*')
-                    self.end_headers()
-                    self.wfile.write(f.read())
-            except Exception as e:
-                print(f"Error al servir HTML: {e}")
+        if self.path == '/metrics':
+            cuerpo = metricas.REGISTRO.exportar().encode()
+            self.send_response(200)
+            self.send_header('Content-type', metricas.TIPO_CONTENIDO)
+            self.send_header('Content-Length', str(len(cuerpo)))
+            self.end_headers()
+            self.wfile.write(cuerpo)
+            return
+        if self.path == '/metrics/perfil':
+            self.reporte_perfil()
+            return
+        if self.path.startswith('/trabajos/'):
+            self.consultar_trabajo()
+            return
+        if self.path.startswith('/grafos/generar'):
+            self.generar_red()
+            return
+        if self.path.startswith('/grafos/'):
+            self.consultar_grafo()
+            return
+        if self.path == '/ia/estado' and self.proxy_ia is not None:
+            self.responder_json(200, self.proxy_ia.estado())
+            return
+        if self.path == '/sesion':
+            usuario = self.usuario_actual()
+            if usuario is None:
+                self.responder_json(401, {"mensaje": "No hay una sesión activa"})
+            else:
+                self.responder_json(200, {"usuario": usuario})
+            return
+        try:
+            if not servir_estatico(self, CACHE_ESTATICOS):
                 self.send_error(404, "Página no encontrada")
+        except OSError:
+            registro.exception("Error al servir archivo")
+            self.send_error(404, "Página no encontrada")
+
+    def do_HEAD(self):
+        if not servir_estatico(self, CACHE_ESTATICOS, enviar_cuerpo=False):
+            self.send_error(404, "Página no encontrada")
 
     def do_POST(self):
         if self.path == '/registro':
@@ -33,27 +311,544 @@ class Servidor(BaseHTTPRequestHandler):
                 contraseña = datos.get('contraseña', [''])[0]
 
                 mensaje = registrar_usuario(nombre, correo, contraseña)
-
-                self.send_response(200)
-                self.send_header('Content-type', 'application/json')
-                self.send_header('Access-Control-Allow-Origin', '*')
-                self.end_headers()
-                self.wfile.write(json.dumps({"mensaje": mensaje}).encode())
+                self.responder_json(200, {"mensaje": mensaje})
             except Exception as e:
-                print(f"Error en POST: {e}")
+                registro.exception("Error en POST /registro")
                 self.send_error(500, str(e))
+        elif self.path == '/registro/lote':
+            self.registrar_lote()
+        elif self.path.startswith('/api/'):
+            self.atender_api()
+        elif self.path == '/trabajos':
+            self.enviar_trabajo()
+        elif self.path == '/grafos':
+            self.crear_grafo()
+        elif self.path.startswith('/grafos/'):
+            self.eventos_grafo()
+        elif self.path.startswith('/ia/'):
+            self.consultar_ia()
+        elif self.path == '/metrics/perfil':
+            self.cambiar_perfil()
+        elif self.path == '/login':
+            self.iniciar_sesion()
+        elif self.path == '/logout':
+            self.cerrar_sesion()
+        else:
+            self.send_error(404, "Ruta no encontrada")
 
-    def do_OPTIONS(self):
+    def registrar_lote(self):
+        """
+        Registra un lote de usuarios en JSON, NDJSON o CSV y responde con el
+        informe por fila. Pide una sesión y admite hasta MAX_FILAS_LOTE filas
+        """
+        # El cuerpo no se lee si se rechaza antes: la conexión no se reutiliza
+        if self.usuario_actual() is None:
+            self.close_connection = True
+            self.responder_json(401, {"mensaje": "Inicia sesión para registrar usuarios en lote"})
+            return
+        length = int(self.headers.get('Content-Length', 0))
+        if length > MAX_CUERPO_LOTE:
+            self.close_connection = True
+            self.send_error(413, "El lote es demasiado grande")
+            return
+        try:
+            post_data = self.rfile.read(length)
+            filas = list(islice(leer_cuerpo(post_data, self.headers.get('Content-Type', '')), MAX_FILAS_LOTE + 1))
+            if len(filas) > MAX_FILAS_LOTE:
+                self.send_error(413, f"El lote admite como máximo {MAX_FILAS_LOTE} filas")
+                return
+            informe = importar_usuarios(filas)
+        except ValueError as e:
+            self.send_error(400, f"Lote no válido: {e}")
+            return
+        except Exception as e:
+            registro.exception("Error en POST /registro/lote")
+            self.send_error(500, str(e))
+            return
+        self.responder_json(200, informe)
+
+    def atender_api(self):
+        """Endpoints JSON de cálculo (/api/booleana, /api/binaria, /api/conjuntos)"""
+        ruta = urllib.parse.urlsplit(self.path).path
+        if ruta not in api_calculo.RUTAS:
+            self.send_error(404, "Ruta no encontrada")
+            return
+        length = int(self.headers.get('Content-Length', 0))
+        if length > api_calculo.MAX_CUERPO_API:
+            self.send_error(413, "La petición es demasiado grande")
+            return
+        try:
+            datos = json.loads(self.rfile.read(length).decode('utf-8') or '{}')
+            respuesta = api_calculo.calcular(ruta, datos, self.trabajos)
+        except ColaLlena as e:
+            self.responder_json(429, {"error": str(e)}, [('Retry-After', '5')])
+        except ColaNoDisponible as e:
+            self.responder_json(503, {"error": str(e)}, [('Retry-After', '1')])
+        except api_calculo.LimiteExcedido as e:
+            self.responder_json(422, {"error": str(e)})
+        except api_calculo.TiempoAgotado:
+            self.responder_json(504, {"error": "El cálculo tardó demasiado"})
+        except (ValueError, TypeError) as e:
+            self.responder_json(400, {"error": str(e)})
+        except Exception:
+            registro.exception("Error en %s", ruta)
+            self.responder_json(500, {"error": "Error interno al calcular"})
+        else:
+            self.responder_json(200, respuesta)
+
+    def es_local(self):
+        return self.client_address[0] in ('127.0.0.1', '::1')
+
+    def reporte_perfil(self):
+        """Pilas plegadas del perfilador (sólo desde la propia máquina)"""
+        if not self.es_local():
+            self.send_error(403, "Sólo disponible desde el servidor")
+            return
+        cuerpo = PERFILADOR.reporte().encode()
+        self.send_response(200)
+        self.send_header('Content-type', 'text/plain; charset=utf-8')
+        self.send_header('Content-Length', str(len(cuerpo)))
+        for clave, valor in PERFILADOR.estado().items():
+            self.send_header(f'X-Perfil-{clave.replace("_", "-")}', str(valor))
+        self.end_headers()
+        self.wfile.write(cuerpo)
+
+    def cambiar_perfil(self):
+        """POST /metrics/perfil {"activo": true, "intervalo_ms": 5} enciende o apaga el perfilador"""
+        if not self.es_local():
+            self.send_error(403, "Sólo disponible desde el servidor")
+            return
+        try:
+            datos = self.leer_json(api_calculo.MAX_CUERPO_API)
+            if datos is None:
+                return
+            if not isinstance(datos, dict):
+                raise ValueError("El cuerpo debe ser un objeto JSON")
+            intervalo = datos.get('intervalo_ms', 5)
+            if isinstance(intervalo, bool) or not isinstance(intervalo, (int, float)) or not 1 <= intervalo <= 1000:
+                raise ValueError("'intervalo_ms' debe estar entre 1 y 1000")
+        except ValueError as e:
+            self.responder_json(400, {"error": str(e)})
+            return
+        if datos.get('activo'):
+            PERFILADOR.iniciar(intervalo / 1000)
+        else:
+            PERFILADOR.detener()
+        self.responder_json(200, PERFILADOR.estado())
+
+    def consultar_ia(self):
+        """
+        POST /ia/gemini (el requestBody de generateContent, ?modelo= opcional)
+        y POST /ia/voz ({text, voice_id?, ...}) pasan por el proxy con caché.
+        La cabecera X-Cache indica si vino de la caché, del servicio o de una
+        llamada idéntica que ya estaba en curso. Como usan las claves del
+        servidor, piden una sesión y tienen un límite de consultas por usuario
+        """
+        url = urllib.parse.urlsplit(self.path)
+        if self.proxy_ia is None or url.path not in ('/ia/gemini', '/ia/voz'):
+            self.send_error(404, "Ruta no encontrada")
+            return
+        try:
+            cuerpo = self.leer_json(proxy_ia.MAX_CUERPO_IA)
+            if cuerpo is None:
+                return
+            usuario = self.usuario_actual()
+            if usuario is None:
+                self.responder_json(401, {"error": "Inicia sesión para usar el asistente"})
+                return
+            espera = self.proxy_ia.limite.consumir(usuario['id'])
+            if espera:
+                self.responder_json(429, {"error": "Demasiadas consultas al asistente; espera un momento"},
+                                    [('Retry-After', str(math.ceil(espera)))])
+                return
+            if url.path == '/ia/gemini':
+                modelo = urllib.parse.parse_qs(url.query).get('modelo', [None])[0]
+                (datos, tipo), origen = self.proxy_ia.gemini(cuerpo, modelo, self.headers.get('X-Gemini-Key'))
+            else:
+                (datos, tipo), origen = self.proxy_ia.voz(cuerpo, self.headers.get('X-Elevenlabs-Key'))
+        except proxy_ia.ErrorServicio as e:
+            datos, tipo, origen = e.cuerpo, e.tipo or 'application/octet-stream', 'error'
+            codigo = e.codigo
+        except proxy_ia.Saturado as e:
+            self.responder_json(503, {"error": str(e)}, [('Retry-After', '5')])
+            return
+        except PermissionError as e:
+            self.responder_json(503, {"error": str(e)})
+            return
+        except ValueError as e:
+            self.responder_json(400, {"error": str(e)})
+            return
+        except OSError as e:
+            registro.warning("Error al llamar al servicio de IA: %s", e)
+            self.responder_json(502, {"error": "No se pudo contactar al servicio de IA"})
+            return
+        else:
+            codigo = 200
+        self.send_response(codigo)
+        self.send_header('Content-type', tipo)
+        self.send_header('Content-Length', str(len(datos)))
+        self.send_header('X-Cache', origen)
+        self.end_headers()
+        self.wfile.write(datos)
+
+    def enviar_trabajo(self):
+        """Encola un cálculo largo: {"tipo": "booleana", "datos": {...}} -> 202 con el id"""
+        length = int(self.headers.get('Content-Length', 0))
+        if length > api_calculo.MAX_CUERPO_API:
+            self.send_error(413, "La petición es demasiado grande")
+            return
+        try:
+            peticion = json.loads(self.rfile.read(length).decode('utf-8') or '{}')
+            if not isinstance(peticion, dict):
+                raise ValueError("El cuerpo debe ser un objeto JSON")
+            id_trabajo = self.trabajos.enviar(peticion.get('tipo'), peticion.get('datos', {}))
+        except ColaLlena as e:
+            self.responder_json(429, {"error": str(e)}, [('Retry-After', '5')])
+            return
+        except ColaNoDisponible as e:
+            self.responder_json(503, {"error": str(e)}, [('Retry-After', '1')])
+            return
+        except ValueError as e:
+            self.responder_json(400, {"error": str(e)})
+            return
+        url = f'/trabajos/{id_trabajo}'
+        self.responder_json(202, {"id": id_trabajo, "estado": "en_cola", "url": url,
+                                  "progreso": url + '/progreso'}, [('Location', url)])
+
+    def consultar_trabajo(self):
+        """GET /trabajos/<id> devuelve el estado; /trabajos/<id>/progreso lo transmite hasta que termina"""
+        partes = urllib.parse.urlsplit(self.path).path.split('/')[2:]
+        if self.trabajos is None or not partes or len(partes) > 2 or len(partes) == 2 and partes[1] != 'progreso':
+            self.send_error(404, "Ruta no encontrada")
+            return
+        if len(partes) == 1:
+            estado = self.trabajos.consultar(partes[0])
+            if estado is None:
+                self.responder_json(404, {"error": "El trabajo no existe o ya expiró"})
+            else:
+                self.responder_json(200, estado)
+            return
+        self.transmitir_progreso(partes[0])
+
+    def transmitir_progreso(self, id_trabajo):
+        """Una línea JSON por cada cambio del trabajo, con Transfer-Encoding: chunked"""
+        cambio = self.trabajos.esperar_cambio(id_trabajo, -1, 0)
+        if cambio is None:
+            self.responder_json(404, {"error": "El trabajo no existe o ya expiró"})
+            return
+        self.send_response(200)
+        self.send_header('Content-type', 'application/x-ndjson; charset=utf-8')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.end_headers()
+        while cambio is not None:
+            version, estado = cambio
+            linea = (json.dumps(estado, ensure_ascii=False) + '\n').encode()
+            self.wfile.write(f'{len(linea):x}\r\n'.encode() + linea + b'\r\n')
+            self.wfile.flush()
+            if estado['estado'] in ('terminado', 'error', 'cancelado', 'tiempo_agotado'):
+                break
+            cambio = self.trabajos.esperar_cambio(id_trabajo, version, self.timeout or 15)
+        self.wfile.write(b'0\r\n\r\n')
+
+    def leer_json(self, maximo):
+        """Cuerpo JSON de la petición; None (y ya respondió 413) si supera 'maximo' bytes"""
+        length = int(self.headers.get('Content-Length', 0))
+        if length > maximo:
+            self.send_error(413, "La petición es demasiado grande")
+            return None
+        return json.loads(self.rfile.read(length).decode('utf-8') or '{}')
+
+    def grafo_de_ruta(self, partes):
+        """(grafo, lock) del id de la ruta, o None tras responder 404"""
+        entrada = self.grafos.obtener(partes[0]) if self.grafos is not None and partes else None
+        if entrada is None:
+            self.responder_json(404, {"error": "El grafo no existe o ya expiró"})
+        return entrada
+
+    def crear_grafo(self):
+        """POST /grafos con {nodos: [{id, nombre}], aristas: [{from, to}]} -> 201 con el id y las estadísticas"""
+        try:
+            datos = self.leer_json(grafos.MAX_CUERPO_GRAFO)
+            if datos is None:
+                return
+            id_grafo, grafo = self.grafos.crear(datos, self.trabajos)
+        except ColaLlena as e:
+            self.responder_json(429, {"error": str(e)}, [('Retry-After', '5')])
+            return
+        except ColaNoDisponible as e:
+            self.responder_json(503, {"error": str(e)}, [('Retry-After', '1')])
+            return
+        except api_calculo.TiempoAgotado:
+            self.responder_json(504, {"error": "Generar la red tardó demasiado"})
+            return
+        except api_calculo.LimiteExcedido as e:
+            self.responder_json(422, {"error": str(e)})
+            return
+        except ValueError as e:
+            self.responder_json(400, {"error": str(e)})
+            return
+        url = f'/grafos/{id_grafo}'
+        self.responder_json(201, {"id": id_grafo, "url": url, "estadisticas": grafo.estadisticas()},
+                            [('Location', url)])
+
+    def eventos_grafo(self):
+        """POST /grafos/<id>/eventos con {"eventos": [...]} aplica los cambios de la página"""
+        partes = urllib.parse.urlsplit(self.path).path.split('/')[2:]
+        if len(partes) != 2 or partes[1] != 'eventos':
+            self.send_error(404, "Ruta no encontrada")
+            return
+        try:
+            datos = self.leer_json(api_calculo.MAX_CUERPO_API * 16)
+            if datos is None:
+                return
+            if not isinstance(datos, dict):
+                raise ValueError("El cuerpo debe ser un objeto JSON")
+        except ValueError as e:
+            self.responder_json(400, {"error": str(e)})
+            return
+        entrada = self.grafo_de_ruta(partes)
+        if entrada is None:
+            return
+        grafo, lock = entrada
+        try:
+            with lock, TIEMPO_GRAFOS.medir('eventos'):
+                informe = grafos.aplicar_eventos(grafo, datos.get('eventos'))
+                informe['estadisticas'] = grafo.estadisticas()
+        except api_calculo.LimiteExcedido as e:
+            self.responder_json(422, {"error": str(e)})
+        except ValueError as e:
+            self.responder_json(400, {"error": str(e)})
+        else:
+            self.responder_json(200, informe)
+
+    def generar_red(self):
+        """
+        GET /grafos/generar?modelo=...&nodos=...&semilla=... devuelve una
+        página de aristas de la red ('desde', 'cantidad'), en NDJSON o con
+        formato=binario como pares int32 little-endian. La cabecera Link
+        (y la primera línea del NDJSON) apunta a la página siguiente
+        """
+        url = urllib.parse.urlsplit(self.path)
+        if url.path != '/grafos/generar':
+            self.send_error(404, "Ruta no encontrada")
+            return
+        parametros = {clave: valores[0] for clave, valores in urllib.parse.parse_qs(url.query).items()}
+        try:
+            red = grafos.parametros_red(parametros)
+            desde = api_calculo._entero(parametros, 'desde', 0, 0)
+            cantidad = api_calculo._entero(parametros, 'cantidad', grafos.PAGINA_DEFECTO, 1, grafos.MAX_PAGINA)
+            formato = parametros.get('formato', 'ndjson')
+            if formato not in ('ndjson', 'binario'):
+                raise ValueError("'formato' debe ser ndjson o binario")
+            origenes, destinos = grafos.generar(red, self.trabajos)
+        except ColaLlena as e:
+            self.responder_json(429, {"error": str(e)}, [('Retry-After', '5')])
+            return
+        except ColaNoDisponible as e:
+            self.responder_json(503, {"error": str(e)}, [('Retry-After', '1')])
+            return
+        except api_calculo.TiempoAgotado:
+            self.responder_json(504, {"error": "Generar la red tardó demasiado"})
+            return
+        except api_calculo.LimiteExcedido as e:
+            self.responder_json(422, {"error": str(e)})
+            return
+        except ValueError as e:
+            self.responder_json(400, {"error": str(e)})
+            return
+
+        total = len(origenes)
+        hasta = min(desde + cantidad, total)
+        siguiente = None
+        if hasta < total:
+            parametros['desde'] = str(hasta)
+            siguiente = '/grafos/generar?' + urllib.parse.urlencode(parametros)
         self.send_response(200)
         self.send_header('Access-Control-Allow-Origin', '*')
-        self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
-        self.send_header('Access-Control-Allow-Headers', 'Content-Type')
+        self.send_header('Access-Control-Expose-Headers', 'Link, X-Nodos, X-Aristas')
+        self.send_header('X-Nodos', str(red['nodos']))
+        self.send_header('X-Aristas', str(total))
+        if siguiente:
+            self.send_header('Link', f'<{siguiente}>; rel="next"')
+        if formato == 'binario':
+            cuerpo = grafos.pagina_binaria(origenes, destinos, min(desde, total), hasta)
+            self.send_header('Content-type', 'application/octet-stream')
+            self.send_header('Content-Length', str(len(cuerpo)))
+            self.end_headers()
+            self.wfile.write(cuerpo)
+            return
+        cabecera = {"modelo": red['modelo'], "nodos": red['nodos'], "aristas": total, "semilla": red['semilla'],
+                    "desde": desde, "hasta": max(hasta, desde), "siguiente": siguiente}
+        self.send_header('Content-type', 'application/x-ndjson; charset=utf-8')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        for trozo in grafos.pagina_ndjson(origenes, destinos, desde, hasta, cabecera):
+            self.wfile.write(f'{len(trozo):x}\r\n'.encode() + trozo + b'\r\n')
+        self.wfile.write(b'0\r\n\r\n')
+
+    def consultar_grafo(self):
+        """
+        GET /grafos/<id> devuelve las estadísticas (con ?completo=1 también
+        nodos y aristas); /grafos/<id>/camino, /centralidad y /componentes
+        reciben sus parámetros en la query
+        """
+        url = urllib.parse.urlsplit(self.path)
+        partes = url.path.split('/')[2:]
+        parametros = {clave: valores[0] for clave, valores in urllib.parse.parse_qs(url.query).items()}
+        if not partes or len(partes) > 2 or len(partes) == 2 and partes[1] not in grafos.CONSULTAS:
+            self.send_error(404, "Ruta no encontrada")
+            return
+        entrada = self.grafo_de_ruta(partes)
+        if entrada is None:
+            return
+        grafo, lock = entrada
+        try:
+            with lock:
+                if len(partes) == 2:
+                    with TIEMPO_GRAFOS.medir(partes[1]):
+                        respuesta = grafos.CONSULTAS[partes[1]](grafo, parametros)
+                else:
+                    respuesta = {"id": partes[0], "estadisticas": grafo.estadisticas()}
+                    if parametros.get('completo') in ('1', 'true'):
+                        respuesta['grafo'] = grafo.a_dict()
+        except api_calculo.LimiteExcedido as e:
+            self.responder_json(422, {"error": str(e)})
+        except KeyError as e:
+            self.responder_json(404, {"error": str(e.args[0])})
+        except ValueError as e:
+            self.responder_json(400, {"error": str(e)})
+        else:
+            self.responder_json(200, respuesta)
+
+    def do_DELETE(self):
+        partes = urllib.parse.urlsplit(self.path).path.split('/')[1:]
+        if len(partes) == 2 and partes[0] == 'grafos' and self.grafos is not None:
+            if self.grafos.eliminar(partes[1]):
+                self.responder_json(200, {"mensaje": "Grafo eliminado"})
+            else:
+                self.responder_json(404, {"error": "El grafo no existe o ya expiró"})
+        elif len(partes) != 2 or partes[0] != 'trabajos' or self.trabajos is None:
+            self.send_error(404, "Ruta no encontrada")
+        elif self.trabajos.cancelar(partes[1]):
+            # Si ya había terminado el estado no cambia; si no, pasa a 'cancelado' en cuanto el proceso lo note
+            self.responder_json(202, self.trabajos.consultar(partes[1], con_resultado=False))
+        else:
+            self.responder_json(404, {"error": "El trabajo no existe o ya expiró"})
+
+    def iniciar_sesion(self):
+        """
+        Verifica correo y contraseña y abre una sesión. Responde JSON con el
+        token (también en una cookie HttpOnly); si el formulario trae el campo
+        'siguiente' redirige allí, como hacen las páginas de login de la Vista
+        """
+        try:
+            datos = self.leer_formulario()
+        except ValueError:
+            self.responder_json(400, {"mensaje": "Datos de inicio de sesión no válidos"})
+            return
+        usuario = autenticar_usuario(datos.get('correo', '').strip(), datos.get('contraseña', ''))
+        siguiente = destino_local(datos.get('siguiente', ''))
+
+        if usuario is None:
+            if siguiente:
+                origen = urllib.parse.urlsplit(self.headers.get('Referer', '/')).path or '/'
+                self.redirigir(origen + '?error=credenciales')
+            else:
+                self.responder_json(401, {"mensaje": "Correo o contraseña incorrectos"})
+            return
+
+        token = self.sesiones.crear(usuario)
+        cookie = [('Set-Cookie', cookie_de_sesion(token, self.sesiones.ttl))]
+        if siguiente:
+            self.redirigir(siguiente, cookie)
+        else:
+            self.responder_json(200, {"mensaje": "Sesión iniciada", "usuario": usuario, "token": token}, cookie)
+
+    def cerrar_sesion(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        if self.sesiones is not None:
+            self.sesiones.eliminar(token_de_peticion(self.headers))
+        self.responder_json(200, {"mensaje": "Sesión cerrada"}, [('Set-Cookie', cookie_vencida())])
+
+    def do_OPTIONS(self):
+        self.send_response(200)
+        # Sin cabeceras CORS para /ia/*: otros sitios no pueden usar el proxy desde el navegador
+        if not self.path.startswith('/ia/'):
+            self.send_header('Access-Control-Allow-Origin', '*')
+            self.send_header('Access-Control-Allow-Methods', 'GET, HEAD, POST, DELETE, OPTIONS')
+            self.send_header('Access-Control-Allow-Headers', 'Content-Type, Authorization')
+        self.send_header('Content-Length', '0')
         self.end_headers()
 
+def argumentos():
+    parser = argparse.ArgumentParser(description="Servidor web del Proyecto MD")
+    parser.add_argument('--host', default='localhost')
+    parser.add_argument('--puerto', type=int, default=8000)
+    parser.add_argument('--trabajadores', type=int, default=16, help="Hilos que atienden peticiones")
+    parser.add_argument('--cola', type=int, default=64, help="Conexiones aceptadas en espera de un hilo")
+    parser.add_argument('--backlog', type=int, default=128, help="Backlog del socket de escucha")
+    parser.add_argument('--tiempo-espera', type=float, default=15,
+                        help="Segundos máximos de inactividad por conexión")
+    parser.add_argument('--procesos', type=int, default=None,
+                        help="Procesos para los cálculos pesados de /api (por defecto, uno por núcleo)")
+    parser.add_argument('--max-trabajos', type=int, default=32,
+                        help="Trabajos en cola o en ejecución antes de responder 429")
+    parser.add_argument('--tiempo-trabajo', type=float, default=120, help="Segundos máximos por trabajo")
+    parser.add_argument('--ttl-sesion', type=int, default=3600, help="Segundos de inactividad antes de cerrar una sesión")
+    parser.add_argument('--max-sesiones', type=int, default=10000, help="Sesiones guardadas en memoria")
+    parser.add_argument('--persistir-sesiones', action='store_true',
+                        help="Guarda las sesiones en SQLite para conservarlas al reiniciar")
+    parser.add_argument('--cache-ia-texto', type=int, default=64, help="MiB de respuestas de Gemini en caché")
+    parser.add_argument('--cache-ia-audio', type=int, default=512, help="MiB de audios de ElevenLabs en caché")
+    parser.add_argument('--ia-por-minuto', type=float, default=20,
+                        help="Consultas a /ia/* por usuario y minuto (con las claves del servidor)")
+    parser.add_argument('--ia-rafaga', type=int, default=10, help="Consultas seguidas permitidas antes del límite")
+    parser.add_argument('--nivel-registro', default='INFO', choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'],
+                        help="Nivel mínimo de los registros (INFO incluye una línea por petición)")
+    parser.add_argument('--max-grafos', type=int, default=32, help="Grafos guardados en memoria")
+    parser.add_argument('--ttl-grafo', type=int, default=3600, help="Segundos sin uso antes de descartar un grafo")
+    return parser.parse_args()
+
 if __name__ == '__main__':
+    args = argumentos()
+    oyente = metricas.configurar_registro(args.nivel_registro)
     try:
-        server = HTTPServer(('localhost', 8000), Servidor)
-        print("Servidor corriendo en http://localhost:8000")
+        server = ServidorConcurrente((args.host, args.puerto), Servidor,
+                                     trabajadores=args.trabajadores, cola=args.cola,
+                                     backlog=args.backlog, tiempo_espera=args.tiempo_espera)
+    except Exception:
+        registro.exception("Error al iniciar el servidor")
+    else:
+        apagado = []
+
+        def detener(signum, frame):
+            # shutdown() bloquea hasta que serve_forever termina: se llama desde otro hilo
+            if not apagado:
+                apagado.append(threading.Thread(target=server.apagar))
+                apagado[0].start()
+        signal.signal(signal.SIGINT, detener)
+        signal.signal(signal.SIGTERM, detener)
+        # Abre el pool de SQLite y aplica las migraciones pendientes una sola vez
+        obtener_pool()
+        Servidor.sesiones = AlmacenSesiones(ttl=args.ttl_sesion, capacidad=args.max_sesiones,
+                                            persistir=args.persistir_sesiones)
+        Servidor.trabajos = ColaTrabajos(procesos=args.procesos, max_pendientes=args.max_trabajos,
+                                         tiempo_maximo=args.tiempo_trabajo)
+        Servidor.grafos = grafos.AlmacenGrafos(capacidad=args.max_grafos, ttl=args.ttl_grafo)
+        cache_ia = proxy_ia.CacheIA(obtener_pool(), max_texto=args.cache_ia_texto * 1024 * 1024,
+                                    max_audio=args.cache_ia_audio * 1024 * 1024)
+        Servidor.proxy_ia = proxy_ia.ProxyIA(cache_ia, por_minuto=args.ia_por_minuto, rafaga=args.ia_rafaga)
+        CACHE_ESTATICOS.precargar()
+        registro.info("Servidor corriendo en http://%s:%s (%s hilos)", args.host, args.puerto, args.trabajadores)
         server.serve_forever()
-    except Exception as e:
-        print(f"Error al iniciar el servidor: {e}")
\ No newline at end of file
+        # serve_forever vuelve apenas se pide el apagado; apagar() sigue esperando a
+        # las peticiones en curso, que todavía usan los procesos, el proxy y el registro
+        for hilo in apagado:
+            hilo.join()
+        Servidor.trabajos.cerrar()
+        Servidor.proxy_ia.cerrar()
+        PERFILADOR.detener()
+        registro.info("Servidor detenido")
+    oyente.stop()
@@ -0,0 +1,179 @@
+import base64
+import hashlib
+import hmac
+import json
+import logging
+import os
+import secrets
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+registro = logging.getLogger('proyecto_md.sesiones')
+
+NOMBRE_COOKIE = 'sesion'
+RUTA_SECRETO = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.secreto_sesiones')
+
+def cargar_secreto(ruta=RUTA_SECRETO):
+    """
+    Clave de firma de los tokens: la variable PROYECTO_MD_SECRETO o, si no
+    existe, una clave aleatoria guardada junto a la base para sobrevivir reinicios
+    """
+    secreto = os.environ.get('PROYECTO_MD_SECRETO')
+    if secreto:
+        return secreto.encode()
+    try:
+        with open(ruta, 'rb') as f:
+            return f.read()
+    except FileNotFoundError:
+        secreto = secrets.token_bytes(32)
+        descriptor = os.open(ruta, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        with os.fdopen(descriptor, 'wb') as f:
+            f.write(secreto)
+        return secreto
+
+class AlmacenSesiones:
+    """
+    Sesiones en memoria indexadas por id, con vencimiento deslizante y
+    capacidad acotada. Como cada uso renueva el vencimiento y mueve la sesión
+    al final, el OrderedDict queda ordenado por vencimiento: purgar sólo mira
+    el principio y validar un token es O(1) sin consultar la base.
+    Con persistir=True las sesiones también se guardan en SQLite y se
+    recuperan al reiniciar.
+    """
+
+    def __init__(self, ttl=3600, capacidad=10000, secreto=None, persistir=False, pool=None):
+        self.ttl = ttl
+        self.capacidad = capacidad
+        self.persistir = persistir
+        self._secreto = secreto or cargar_secreto()
+        self._pool = pool
+        self._sesiones = OrderedDict()
+        self._lock = threading.Lock()
+        if persistir:
+            self._cargar()
+
+    def _firma(self, id_sesion):
+        digest = hmac.new(self._secreto, id_sesion.encode(), hashlib.sha256).digest()
+        return base64.urlsafe_b64encode(digest[:24]).decode()
+
+    def _id_de(self, token):
+        """Id de sesión si la firma del token es válida"""
+        if not token:
+            return None
+        id_sesion, _, firma = token.partition('.')
+        # compare_digest sólo acepta str ASCII: los bytes admiten cualquier token
+        if not id_sesion or not hmac.compare_digest(firma.encode(), self._firma(id_sesion).encode()):
+            return None
+        return id_sesion
+
+    def _purgar(self, ahora):
+        while self._sesiones:
+            _, expira = next(iter(self._sesiones.values()))
+            if expira > ahora:
+                break
+            self._sesiones.popitem(last=False)
+
+    def crear(self, usuario):
+        """Abre una sesión para el usuario y devuelve su token firmado"""
+        id_sesion = secrets.token_urlsafe(18)
+        ahora = time.time()
+        expira = ahora + self.ttl
+        with self._lock:
+            self._purgar(ahora)
+            self._sesiones[id_sesion] = (usuario, expira)
+            while len(self._sesiones) > self.capacidad:
+                self._sesiones.popitem(last=False)
+        if self.persistir:
+            self._guardar(id_sesion, usuario, expira)
+        return f'{id_sesion}.{self._firma(id_sesion)}'
+
+    def validar(self, token):
+        """Usuario de la sesión, o None si el token no es válido o venció"""
+        id_sesion = self._id_de(token)
+        if id_sesion is None:
+            return None
+        ahora = time.time()
+        with self._lock:
+            sesion = self._sesiones.get(id_sesion)
+            if sesion is None:
+                return None
+            usuario, expira = sesion
+            if expira <= ahora:
+                del self._sesiones[id_sesion]
+                return None
+            self._sesiones[id_sesion] = (usuario, ahora + self.ttl)
+            self._sesiones.move_to_end(id_sesion)
+            return usuario
+
+    def eliminar(self, token):
+        id_sesion = self._id_de(token)
+        if id_sesion is None:
+            return False
+        with self._lock:
+            existia = self._sesiones.pop(id_sesion, None) is not None
+        if self.persistir:
+            self._borrar(id_sesion)
+        return existia
+
+    def estadisticas(self):
+        with self._lock:
+            self._purgar(time.time())
+            return {'sesiones': len(self._sesiones), 'capacidad': self.capacidad, 'ttl': self.ttl}
+
+    # Persistencia en SQLite (tabla 'sesiones', creada por las migraciones)
+
+    def _obtener_pool(self):
+        if self._pool is None:
+            from conecion import obtener_pool
+            self._pool = obtener_pool()
+        return self._pool
+
+    def _guardar(self, id_sesion, usuario, expira):
+        try:
+            with self._obtener_pool().conexion() as conn:
+                conn.execute(
+                    'INSERT OR REPLACE INTO sesiones (id, usuario, expira) VALUES (?, ?, ?)',
+                    (id_sesion, json.dumps(usuario, ensure_ascii=False), expira)
+                )
+                conn.commit()
+        except sqlite3.Error as error:
+            registro.error("No se pudo guardar la sesión: %s", error)
+
+    def _borrar(self, id_sesion):
+        try:
+            with self._obtener_pool().conexion() as conn:
+                conn.execute('DELETE FROM sesiones WHERE id = ?', (id_sesion,))
+                conn.commit()
+        except sqlite3.Error as error:
+            registro.error("No se pudo borrar la sesión: %s", error)
+
+    def _cargar(self):
+        ahora = time.time()
+        with self._obtener_pool().conexion() as conn:
+            conn.execute('DELETE FROM sesiones WHERE expira <= ?', (ahora,))
+            conn.commit()
+            filas = conn.execute(
+                'SELECT id, usuario, expira FROM sesiones ORDER BY expira DESC LIMIT ?', (self.capacidad,)
+            ).fetchall()
+        with self._lock:
+            for id_sesion, usuario, expira in reversed(filas):
+                self._sesiones[id_sesion] = (json.loads(usuario), expira)
+
+def token_de_peticion(headers):
+    """Token de la cabecera Authorization: Bearer o de la cookie de sesión"""
+    autorizacion = headers.get('Authorization', '')
+    if autorizacion[:7].lower() == 'bearer ':
+        return autorizacion[7:].strip()
+    for parte in headers.get('Cookie', '').split(';'):
+        nombre, _, valor = parte.strip().partition('=')
+        if nombre == NOMBRE_COOKIE:
+            return valor
+    return None
+
+def cookie_de_sesion(token, ttl):
+    return f'{NOMBRE_COOKIE}={token}; Path=/; Max-Age={int(ttl)}; HttpOnly; SameSite=Lax'
+
+def cookie_vencida():
+    return f'{NOMBRE_COOKIE}=; Path=/; Max-Age=0; HttpOnly; SameSite=Lax'
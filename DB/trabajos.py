@@ -0,0 +1,394 @@
+import multiprocessing
+import os
+import queue
+import secrets
+import signal
+import threading
+import time
+import _thread
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as TiempoAgotado
+from concurrent.futures.process import BrokenProcessPool
+import api_calculo
+import grafos
+import motores
+from metricas import REGISTRO
+
+# Tipo de trabajo -> (función de api_calculo, si acepta el parámetro 'progreso')
+TIPOS = {
+    'booleana': (api_calculo.calcular_booleana, True),
+    'binaria': (api_calculo.calcular_binaria, False),
+    'conjuntos': (api_calculo.calcular_conjuntos, False),
+}
+
+# Cálculos que el servidor pide con ejecutar pero que no se aceptan en POST /trabajos
+INTERNOS = {
+    'red': (grafos.generar_red, False),
+}
+
+ESTADOS_FINALES = ('terminado', 'error', 'cancelado', 'tiempo_agotado')
+
+DURACION_TRABAJO = REGISTRO.histograma('proyecto_md_trabajo_segundos',
+                                       'Tiempo desde que un trabajo se encola hasta que termina',
+                                       ('tipo', 'estado'))
+
+class ColaLlena(Exception):
+    """Hay demasiados trabajos pendientes; el cliente debe reintentar más tarde"""
+
+class ColaNoDisponible(Exception):
+    """Murió un proceso de trabajo y el grupo se reemplazó; el cliente puede reintentar (HTTP 503)"""
+
+class Cancelado(Exception):
+    """Se lanza dentro del proceso de trabajo cuando se pidió cancelar"""
+
+class _Interrumpido(BaseException):
+    """
+    La lanza la señal del vigía en medio del motor; es BaseException para que
+    ningún 'except Exception' del motor la trague. _ejecutar la pasa a Cancelado
+    """
+
+# Señal con la que el vigía interrumpe el cálculo en curso (en Windows no hay SIGUSR1)
+SEÑAL_CANCELAR = getattr(signal, 'SIGUSR1', signal.SIGINT)
+REVISION_CANCELADOS = 0.1
+
+# Estado compartido en cada proceso de trabajo (lo fija _iniciar_proceso)
+_cola_eventos = None
+_cancelados = None
+_en_curso = None
+
+def _iniciar_proceso(cola_eventos, cancelados):
+    global _cola_eventos, _cancelados
+    _cola_eventos = cola_eventos
+    _cancelados = cancelados
+    signal.signal(SEÑAL_CANCELAR, _interrumpir)
+    threading.Thread(target=_vigilar, name='vigia', daemon=True).start()
+    motores.precargar()
+
+def _interrumpir(signum, frame):
+    # Corre en el hilo principal entre dos instrucciones del motor; si el
+    # trabajo ya terminó (la señal llegó tarde) no hace nada
+    if _en_curso is not None and _en_curso in _cancelados:
+        raise _Interrumpido()
+
+def _vigilar():
+    """
+    Hilo de cada proceso de trabajo: si el trabajo en curso se marcó como
+    cancelado (o vencido) interrumpe el hilo principal, así la cancelación
+    llega también a los motores que no reportan progreso
+    """
+    avisado = None
+    while True:
+        time.sleep(REVISION_CANCELADOS)
+        actual = _en_curso
+        try:
+            cancelado = actual is not None and actual != avisado and actual in _cancelados
+        except (EOFError, OSError):
+            return
+        if cancelado:
+            avisado = actual
+            _thread.interrupt_main(SEÑAL_CANCELAR)
+
+def _ejecutar(tipo, id_trabajo, datos):
+    """Corre en el proceso de trabajo: marca el trabajo en curso para el vigía y lo cancela si hace falta"""
+    global _en_curso
+    try:
+        try:
+            _en_curso = id_trabajo
+            return _calcular(tipo, id_trabajo, datos)
+        finally:
+            _en_curso = None
+    except _Interrumpido:
+        # También si la señal llegó justo en el finally
+        _en_curso = None
+        raise Cancelado() from None
+
+def _calcular(tipo, id_trabajo, datos):
+    """Avisa al empezar y reporta el progreso cada 0.1 s"""
+    funcion, con_progreso = TIPOS[tipo] if tipo in TIPOS else INTERNOS[tipo]
+    _cola_eventos.put((id_trabajo, 0, None))
+    if id_trabajo in _cancelados:
+        raise Cancelado()
+    if not con_progreso:
+        return funcion(datos)
+
+    ultimo = 0.0
+    def progreso(hechas, total):
+        nonlocal ultimo
+        # La cancelación es cooperativa: se revisa en cada bloque
+        if id_trabajo in _cancelados:
+            raise Cancelado()
+        ahora = time.monotonic()
+        if ahora - ultimo >= 0.1 or hechas == total:
+            ultimo = ahora
+            _cola_eventos.put((id_trabajo, hechas, total))
+    return funcion(datos, progreso=progreso)
+
+class Trabajo:
+    __slots__ = ('id', 'tipo', 'estado', 'hechas', 'total', 'resultado', 'error',
+                 'creado', 'iniciado', 'terminado', 'futuro', 'version')
+
+    def __init__(self, id_trabajo, tipo):
+        self.id = id_trabajo
+        self.tipo = tipo
+        self.estado = 'en_cola'
+        self.hechas = 0
+        self.total = None
+        self.resultado = None
+        self.error = None
+        self.creado = time.time()
+        self.iniciado = None
+        self.terminado = None
+        self.futuro = None
+        # Aumenta con cada cambio; los flujos de progreso esperan a que cambie
+        self.version = 0
+
+    def a_dict(self, con_resultado=True):
+        datos = {
+            'id': self.id,
+            'tipo': self.tipo,
+            'estado': self.estado,
+            'progreso': {'hechas': self.hechas, 'total': self.total},
+        }
+        if self.iniciado is not None:
+            fin = self.terminado or time.time()
+            datos['segundos'] = round(fin - self.iniciado, 3)
+        if self.error is not None:
+            datos['error'] = self.error
+        if con_resultado and self.estado == 'terminado':
+            datos['resultado'] = self.resultado
+        return datos
+
+class ColaTrabajos:
+    """
+    Trabajos de cálculo en segundo plano sobre un ProcessPoolExecutor.
+    Como mucho 'max_pendientes' trabajos pueden estar en cola o en ejecución;
+    el siguiente recibe ColaLlena (HTTP 429). Los procesos envían su progreso
+    por una multiprocessing.Queue que lee un hilo del servidor, y la
+    cancelación (pedida o por superar 'tiempo_maximo') se marca en un dict
+    compartido que los procesos consultan en cada bloque y que un vigía de
+    cada proceso revisa para interrumpir los motores sin progreso. Los
+    trabajos terminados se descartan 'ttl' segundos después.
+    """
+
+    def __init__(self, procesos=None, max_pendientes=32, tiempo_maximo=120, ttl=600, max_guardados=1000):
+        self.max_pendientes = max_pendientes
+        self.tiempo_maximo = tiempo_maximo
+        self.ttl = ttl
+        self.max_guardados = max_guardados
+        # Los resultados y errores que vuelven de los procesos pueden ser clases
+        # de los motores: este proceso también los necesita cargados para leerlos
+        motores.precargar()
+        self._gestor = multiprocessing.Manager()
+        self._cancelados = self._gestor.dict()
+        self._eventos = multiprocessing.Queue()
+        self._procesos = procesos or os.cpu_count() or 1
+        self.ejecutor = self._nuevo_ejecutor()
+        self._trabajos = OrderedDict()
+        self._activos = 0
+        self._cambio = threading.Condition()
+        self._detenido = False
+        self._hilo = threading.Thread(target=self._escuchar, name='trabajos', daemon=True)
+        self._hilo.start()
+
+    def enviar(self, tipo, datos):
+        """Encola un trabajo y devuelve su id"""
+        if tipo not in TIPOS:
+            raise ValueError(f"Tipo de trabajo desconocido '{tipo}'; use {', '.join(TIPOS)}")
+        if not isinstance(datos, dict):
+            raise ValueError("Los datos del trabajo deben ser un objeto JSON")
+        with self._cambio:
+            self._purgar(time.time())
+            if self._activos >= self.max_pendientes:
+                raise ColaLlena(f"Hay {self._activos} trabajos pendientes; intenta más tarde")
+            trabajo = Trabajo(secrets.token_urlsafe(12), tipo)
+            self._trabajos[trabajo.id] = trabajo
+            self._activos += 1
+        ejecutor = self.ejecutor
+        try:
+            trabajo.futuro = self._someter(ejecutor, tipo, trabajo.id, datos)
+        except BaseException:
+            with self._cambio:
+                del self._trabajos[trabajo.id]
+                self._activos -= 1
+            raise
+        trabajo.futuro.add_done_callback(lambda futuro: self._finalizar(trabajo, futuro, ejecutor))
+        return trabajo.id
+
+    def ejecutar(self, tipo, datos, tiempo_maximo):
+        """
+        Calcula y espera el resultado (las rutas síncronas de /api). Ocupa un
+        lugar entre los pendientes como cualquier trabajo, así que también
+        recibe ColaLlena (o ColaNoDisponible); si se agota el tiempo se
+        cancela igual que un trabajo y se lanza TimeoutError
+        """
+        with self._cambio:
+            if self._activos >= self.max_pendientes:
+                raise ColaLlena(f"Hay {self._activos} trabajos pendientes; intenta más tarde")
+            self._activos += 1
+        id_trabajo = secrets.token_urlsafe(12)
+        ejecutor = self.ejecutor
+        try:
+            futuro = self._someter(ejecutor, tipo, id_trabajo, datos)
+        except BaseException:
+            self._liberar(id_trabajo)
+            raise
+        futuro.add_done_callback(lambda futuro: self._liberar(id_trabajo))
+        try:
+            return futuro.result(timeout=tiempo_maximo)
+        except BrokenProcessPool:
+            self._reponer(ejecutor)
+            raise ColaNoDisponible("El proceso de cálculo terminó de forma inesperada; intenta de nuevo") from None
+        except TiempoAgotado:
+            if not futuro.cancel():
+                self._cancelados[id_trabajo] = True
+                # Si ya terminó, _liberar pudo correr antes de marcarlo
+                if futuro.done():
+                    self._cancelados.pop(id_trabajo, None)
+            raise
+
+    def consultar(self, id_trabajo, con_resultado=True):
+        with self._cambio:
+            trabajo = self._trabajos.get(id_trabajo)
+            return None if trabajo is None else trabajo.a_dict(con_resultado)
+
+    def cancelar(self, id_trabajo):
+        """Cancela un trabajo en cola o pide a su proceso que se detenga. False si no existe"""
+        with self._cambio:
+            trabajo = self._trabajos.get(id_trabajo)
+            if trabajo is None:
+                return False
+            if trabajo.estado in ESTADOS_FINALES:
+                return True
+        if trabajo.futuro is None or not trabajo.futuro.cancel():
+            self._cancelados[id_trabajo] = True
+        return True
+
+    def esperar_cambio(self, id_trabajo, version, espera):
+        """
+        Bloquea hasta que el trabajo cambie respecto de 'version' (o pase 'espera').
+        Devuelve (version, estado en dict) o None si el trabajo ya no existe
+        """
+        limite = time.monotonic() + espera
+        with self._cambio:
+            while True:
+                trabajo = self._trabajos.get(id_trabajo)
+                if trabajo is None:
+                    return None
+                restante = limite - time.monotonic()
+                if trabajo.version != version or restante <= 0:
+                    return trabajo.version, trabajo.a_dict(con_resultado=trabajo.estado in ESTADOS_FINALES)
+                self._cambio.wait(restante)
+
+    def estadisticas(self):
+        with self._cambio:
+            estados = {}
+            for trabajo in self._trabajos.values():
+                estados[trabajo.estado] = estados.get(trabajo.estado, 0) + 1
+            return {'activos': self._activos, 'max_pendientes': self.max_pendientes, 'estados': estados}
+
+    def cerrar(self):
+        self._detenido = True
+        with self._cambio:
+            pendientes = [t.id for t in self._trabajos.values() if t.estado not in ESTADOS_FINALES]
+        for id_trabajo in pendientes:
+            self.cancelar(id_trabajo)
+        self.ejecutor.shutdown(wait=True, cancel_futures=True)
+        self._hilo.join(timeout=1)
+        self._gestor.shutdown()
+
+    def _nuevo_ejecutor(self):
+        return ProcessPoolExecutor(
+            max_workers=self._procesos,
+            initializer=_iniciar_proceso, initargs=(self._eventos, self._cancelados),
+        )
+
+    def _someter(self, ejecutor, tipo, id_trabajo, datos):
+        try:
+            return ejecutor.submit(_ejecutar, tipo, id_trabajo, datos)
+        except BrokenProcessPool:
+            self._reponer(ejecutor)
+            raise ColaNoDisponible("Se reinició el grupo de procesos de cálculo; intenta de nuevo") from None
+
+    def _reponer(self, roto):
+        """Cambia el grupo de procesos por uno nuevo si murió un proceso (una sola vez por grupo)"""
+        with self._cambio:
+            if self.ejecutor is not roto or self._detenido:
+                return
+            self.ejecutor = self._nuevo_ejecutor()
+        roto.shutdown(wait=False, cancel_futures=True)
+
+    def _marcar(self, trabajo, **cambios):
+        for clave, valor in cambios.items():
+            setattr(trabajo, clave, valor)
+        trabajo.version += 1
+        self._cambio.notify_all()
+
+    def _finalizar(self, trabajo, futuro, ejecutor):
+        roto = not futuro.cancelled() and isinstance(futuro.exception(), BrokenProcessPool)
+        if roto:
+            self._reponer(ejecutor)
+        with self._cambio:
+            ahora = time.time()
+            if futuro.cancelled():
+                self._marcar(trabajo, estado='cancelado', terminado=ahora)
+            elif trabajo.estado == 'tiempo_agotado':
+                # El vigilante ya lo marcó; el resultado tardío se descarta
+                self._marcar(trabajo, terminado=ahora)
+            else:
+                error = futuro.exception()
+                if error is None:
+                    self._marcar(trabajo, estado='terminado', resultado=futuro.result(), terminado=ahora,
+                                 hechas=trabajo.total or trabajo.hechas)
+                elif isinstance(error, Cancelado):
+                    self._marcar(trabajo, estado='cancelado', terminado=ahora)
+                elif roto:
+                    self._marcar(trabajo, estado='error', terminado=ahora,
+                                 error="El proceso de cálculo terminó de forma inesperada")
+                else:
+                    self._marcar(trabajo, estado='error', error=str(error), terminado=ahora)
+            self._activos -= 1
+        DURACION_TRABAJO.observar(trabajo.terminado - trabajo.creado, trabajo.tipo, trabajo.estado)
+        self._cancelados.pop(trabajo.id, None)
+
+    def _liberar(self, id_trabajo):
+        with self._cambio:
+            self._activos -= 1
+        self._cancelados.pop(id_trabajo, None)
+
+    def _escuchar(self):
+        """Hilo que aplica los eventos de progreso y vigila los tiempos máximos"""
+        while not self._detenido:
+            try:
+                id_trabajo, hechas, total = self._eventos.get(timeout=0.5)
+            except queue.Empty:
+                id_trabajo = None
+            except (EOFError, OSError):
+                return
+            with self._cambio:
+                trabajo = self._trabajos.get(id_trabajo) if id_trabajo else None
+                if trabajo is not None and trabajo.estado in ('en_cola', 'ejecutando'):
+                    if trabajo.estado == 'en_cola':
+                        self._marcar(trabajo, estado='ejecutando', iniciado=time.time())
+                    if total is not None:
+                        self._marcar(trabajo, hechas=hechas, total=total)
+                vencidos = self._vencidos(time.time())
+            for trabajo in vencidos:
+                self._cancelados[trabajo.id] = True
+
+    def _vencidos(self, ahora):
+        vencidos = []
+        for trabajo in self._trabajos.values():
+            if trabajo.estado == 'ejecutando' and ahora - trabajo.iniciado > self.tiempo_maximo:
+                self._marcar(trabajo, estado='tiempo_agotado',
+                             error=f"Se superó el tiempo máximo de {self.tiempo_maximo} s")
+                vencidos.append(trabajo)
+        return vencidos
+
+    def _purgar(self, ahora):
+        """Descarta los trabajos terminados hace más de ttl segundos (o los más viejos si sobran)"""
+        for id_trabajo in list(self._trabajos):
+            trabajo = self._trabajos[id_trabajo]
+            if trabajo.estado not in ESTADOS_FINALES or trabajo.futuro is not None and not trabajo.futuro.done():
+                continue
+            if ahora - trabajo.terminado > self.ttl or len(self._trabajos) > self.max_guardados:
+                del self._trabajos[id_trabajo]
@@ -1,60 +1,95 @@
-from conecion import CConexion  # Corregido el nombre
+from conecion import obtener_pool
 import sqlite3
-import hashlib
 import re
+import contrasenas
+
+PATRON_CORREO = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
+LONGITUD_MINIMA_CONTRASEÑA = 8
 
 def validar_correo(correo):
-    patron = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-    return re.match(patron, correo) is not None
+    return PATRON_CORREO.match(correo) is not None
 
-def registrar_usuario(nombre, correo, contraseña):
-    # Validaciones
+def validar_usuario(nombre, correo, contraseña):
+    """Devuelve el mensaje de error de los datos, o None si son válidos"""
     if not nombre or not correo or not contraseña:
         return "Todos los campos son obligatorios"
     
     if not validar_correo(correo):
         return "El formato del correo no es válido"
     
-    if len(contraseña) < 8:
-        return "La contraseña debe tener al menos 8 caracteres"
+    if len(contraseña) < LONGITUD_MINIMA_CONTRASEÑA:
+        return f"La contraseña debe tener al menos {LONGITUD_MINIMA_CONTRASEÑA} caracteres"
+    return None
+
+def hash_contraseña(contraseña):
+    return contrasenas.hashear(contraseña)
+
+def registrar_usuario(nombre, correo, contraseña):
+    # Validaciones
+    error = validar_usuario(nombre, correo, contraseña)
+    if error:
+        return error
+    
+    # Hash de la contraseña antes de pedir una conexión al pool
+    hash_contraseña_usuario = contrasenas.hashear_en_pool(contraseña)
     
-    conn = CConexion.ConexionBaseDeDatos()
-    if conn:
-        cursor = None
-        try:
+    try:
+        with obtener_pool().conexion() as conn:
             cursor = conn.cursor()
-            
-            # Crear tabla si no existe
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS usuarios (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    nombre TEXT NOT NULL,
-                    correo TEXT UNIQUE NOT NULL,
-                    contraseña TEXT NOT NULL
+            try:
+                # Insertar nuevo usuario
+                cursor.execute(
+                    'INSERT INTO usuarios (nombre, correo, contraseña) VALUES (?, ?, ?)',
+                    (nombre, correo, hash_contraseña_usuario)
                 )
-            ''')
-            
-            # Hash de la contraseña
-            hash_contraseña = hashlib.sha256(contraseña.encode()).hexdigest()
-            
-            # Insertar nuevo usuario
-            cursor.execute(
-                'INSERT INTO usuarios (nombre, correo, contraseña) VALUES (?, ?, ?)',
-                (nombre, correo, hash_contraseña)
-            )
-            
-            conn.commit()
-            return "Usuario registrado correctamente"
-            
-        except sqlite3.IntegrityError:
-            conn.rollback()
-            return "Error: El correo ya está registrado"
-        except Exception as e:
-            conn.rollback()
-            return f"Error al registrar usuario: {str(e)}"
-        finally:
-            if cursor:
+                
+                conn.commit()
+                return "Usuario registrado correctamente"
+                
+            except sqlite3.IntegrityError:
+                conn.rollback()
+                return "Error: El correo ya está registrado"
+            except Exception as e:
+                conn.rollback()
+                return f"Error al registrar usuario: {str(e)}"
+            finally:
                 cursor.close()
-            conn.close()
-    
-    return "Error de conexión a la base de datos"
\ No newline at end of file
+    except sqlite3.Error:
+        return "Error de conexión a la base de datos"
+
+def autenticar_usuario(correo, contraseña):
+    """
+    Devuelve los datos del usuario si la contraseña es correcta, o None.
+    Si el hash guardado usa parámetros viejos (o el sha256 sin sal) se vuelve
+    a calcular con los actuales aprovechando que se conoce la contraseña
+    """
+    if not correo or not contraseña:
+        return None
+    try:
+        with obtener_pool().conexion() as conn:
+            fila = conn.execute(
+                'SELECT id, nombre, correo, contraseña FROM usuarios WHERE correo = ?', (correo,)
+            ).fetchone()
+    except sqlite3.Error:
+        return None
+    if fila is None:
+        # Se hace un hash igualmente para no revelar por el tiempo qué correos existen
+        contrasenas.hashear_en_pool(contraseña)
+        return None
+    id_usuario, nombre, correo, almacenado = fila
+    if not contrasenas.verificar_en_pool(contraseña, almacenado):
+        return None
+
+    if contrasenas.necesita_rehash(almacenado):
+        nuevo = contrasenas.hashear_en_pool(contraseña)
+        try:
+            with obtener_pool().conexion() as conn:
+                # Sólo se reemplaza si nadie cambió la contraseña mientras tanto
+                conn.execute(
+                    'UPDATE usuarios SET contraseña = ? WHERE id = ? AND contraseña = ?',
+                    (nuevo, id_usuario, almacenado)
+                )
+                conn.commit()
+        except sqlite3.Error:
+            pass
+    return {'id': id_usuario, 'nombre': nombre, 'correo': correo}
@@ -0,0 +1,6 @@
+import os
+import sys
+
+# Los módulos del servidor se importan como hermanos desde DB/, y los motores
+# de Controlador/Códigos con motores.cargar (sus nombres tienen espacios)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'DB'))
@@ -0,0 +1,26 @@
+import pytest
+
+import api_calculo
+
+
+def _general(k, **datos):
+    return dict(problema='general', categorias=[f'C{i}' for i in range(k)], **datos)
+
+
+def test_conjuntos_general_con_todas_las_uniones():
+    k = api_calculo.MAX_CONJUNTOS
+    n = 1 << k
+    uniones = {'∪'.join(f'C{i}' for i in range(k) if m >> i & 1): bin(m).count('1') for m in range(1, n)}
+    # Cada región con un solo conjunto tiene un elemento y las demás ninguno
+    respuesta = api_calculo.calcular('/api/conjuntos', _general(k, total=k + 3, uniones={
+        clave.replace('∪', ','): valor for clave, valor in uniones.items()}))
+    assert respuesta['regiones']['ninguno'] == 3
+    assert respuesta['totales'] == {f'C{i}': 1 for i in range(k)}
+
+
+def test_conjuntos_general_limita_la_eliminacion():
+    k = api_calculo.MAX_CONJUNTOS_ELIMINACION + 1
+    with pytest.raises(api_calculo.LimiteExcedido):
+        api_calculo.calcular('/api/conjuntos', _general(k, total=10, intersecciones={'C0': 3}))
+    with pytest.raises(ValueError, match="Faltan"):
+        api_calculo.calcular('/api/conjuntos', _general(k - 1, total=10, intersecciones={'C0': 3}))
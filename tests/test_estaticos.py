@@ -0,0 +1,145 @@
+import gzip
+import io
+import os
+
+import pytest
+
+import estaticos
+from estaticos import CacheEstaticos, servir_estatico
+
+TEXTO = ('<p>hola</p>\n' * 400).encode()
+DATOS = bytes(range(256)) * 40
+
+
+class Conexion:
+    def __init__(self, salida):
+        self.salida = salida
+
+    def sendfile(self, archivo, inicio, longitud):
+        archivo.seek(inicio)
+        self.salida.write(archivo.read(longitud))
+
+
+class Peticion:
+    """Lo mínimo de BaseHTTPRequestHandler que usa servir_estatico"""
+
+    def __init__(self, path, **cabeceras):
+        self.path = path
+        self.headers = {clave.replace('_', '-'): valor for clave, valor in cabeceras.items()}
+        self.wfile = io.BytesIO()
+        self.connection = Conexion(self.wfile)
+        self.codigo = None
+        self.respuesta = {}
+
+    def send_response(self, codigo):
+        self.codigo = codigo
+
+    def send_header(self, nombre, valor):
+        self.respuesta[nombre] = valor
+
+    def end_headers(self):
+        pass
+
+
+@pytest.fixture
+def cache(tmp_path):
+    (tmp_path / 'pagina.html').write_bytes(TEXTO)
+    (tmp_path / 'datos.bin').write_bytes(DATOS)
+    (tmp_path / 'grande.bin').write_bytes(DATOS * 4)
+    return CacheEstaticos(raiz=str(tmp_path), max_archivo=len(DATOS))
+
+
+def _servir(cache, path, **cabeceras):
+    peticion = Peticion(path, **cabeceras)
+    assert servir_estatico(peticion, cache)
+    return peticion
+
+
+def test_archivo_completo_y_cache(cache):
+    peticion = _servir(cache, '/datos.bin')
+    assert peticion.codigo == 200 and peticion.wfile.getvalue() == DATOS
+    _servir(cache, '/datos.bin')
+    assert cache.estadisticas()['aciertos'] == 1 and cache.estadisticas()['fallos'] == 1
+    assert not servir_estatico(Peticion('/../secreto'), cache)
+    assert not servir_estatico(Peticion('/no-existe.html'), cache)
+
+
+def test_cambio_en_disco_invalida_la_entrada(cache, tmp_path):
+    _servir(cache, '/datos.bin')
+    ruta = tmp_path / 'datos.bin'
+    ruta.write_bytes(DATOS[::-1])
+    os.utime(ruta, ns=(1, 1))
+    assert _servir(cache, '/datos.bin').wfile.getvalue() == DATOS[::-1]
+
+
+def test_etag_por_codificacion(cache):
+    identidad = _servir(cache, '/pagina.html')
+    comprimida = _servir(cache, '/pagina.html', Accept_Encoding='gzip, deflate')
+    assert comprimida.respuesta['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(comprimida.wfile.getvalue()) == TEXTO
+    assert comprimida.respuesta['Vary'] == identidad.respuesta['Vary'] == 'Accept-Encoding'
+    assert comprimida.respuesta['ETag'] != identidad.respuesta['ETag']
+    assert comprimida.respuesta['ETag'].endswith('-gz"')
+
+    # La etiqueta de una codificación no valida la otra
+    assert _servir(cache, '/pagina.html', Accept_Encoding='gzip',
+                   If_None_Match=identidad.respuesta['ETag']).codigo == 200
+    revalidada = _servir(cache, '/pagina.html', Accept_Encoding='gzip',
+                         If_None_Match='W/' + comprimida.respuesta['ETag'])
+    assert revalidada.codigo == 304 and revalidada.wfile.getvalue() == b''
+    assert _servir(cache, '/pagina.html', If_None_Match=identidad.respuesta['ETag']).codigo == 304
+    assert _servir(cache, '/pagina.html', Accept_Encoding='gzip;q=0',
+                   If_None_Match=identidad.respuesta['ETag']).codigo == 304
+
+
+@pytest.mark.skipif(estaticos.brotli is None, reason="brotli no está instalado")
+def test_etag_brotli(cache):
+    peticion = _servir(cache, '/pagina.html', Accept_Encoding='gzip, br')
+    assert peticion.respuesta['Content-Encoding'] == 'br'
+    assert peticion.respuesta['ETag'].endswith('-br"')
+
+
+def test_if_modified_since(cache):
+    ultima = _servir(cache, '/datos.bin').respuesta['Last-Modified']
+    assert _servir(cache, '/datos.bin', If_Modified_Since=ultima).codigo == 304
+    assert _servir(cache, '/datos.bin', If_Modified_Since='Thu, 01 Jan 1970 00:00:00 GMT').codigo == 200
+
+
+@pytest.mark.parametrize('archivo', ['datos.bin', 'grande.bin'])
+@pytest.mark.parametrize('rango, inicio, fin', [
+    ('bytes=0-9', 0, 9),
+    ('bytes=100-', 100, None),
+    ('bytes=-16', -16, None),
+    ('bytes=5-99999999', 5, None),
+])
+def test_rangos(cache, archivo, rango, inicio, fin):
+    contenido = DATOS if archivo == 'datos.bin' else DATOS * 4
+    esperado = contenido[inicio:None if fin is None else fin + 1]
+    peticion = _servir(cache, '/' + archivo, Range=rango, Accept_Encoding='gzip')
+    assert peticion.codigo == 206
+    assert peticion.wfile.getvalue() == esperado
+    desde = inicio % len(contenido)
+    assert peticion.respuesta['Content-Range'] == f'bytes {desde}-{desde + len(esperado) - 1}/{len(contenido)}'
+
+
+@pytest.mark.parametrize('rango, codigo', [
+    ('bytes=999999-', 416),
+    ('bytes=-0', 416),
+    ('bytes=5-3', 200),
+    ('bytes=a-b', 200),
+    ('bytes=0-1,4-5', 200),
+    ('lineas=0-3', 200),
+])
+def test_rangos_no_satisfacibles_o_no_validos(cache, rango, codigo):
+    peticion = _servir(cache, '/datos.bin', Range=rango)
+    assert peticion.codigo == codigo
+    if codigo == 416:
+        assert peticion.respuesta['Content-Range'] == f'bytes */{len(DATOS)}'
+    else:
+        assert peticion.wfile.getvalue() == DATOS
+
+
+def test_if_range(cache):
+    etag = _servir(cache, '/datos.bin').respuesta['ETag']
+    assert _servir(cache, '/datos.bin', Range='bytes=0-3', If_Range=etag).codigo == 206
+    assert _servir(cache, '/datos.bin', Range='bytes=0-3', If_Range='"otro"').codigo == 200
@@ -0,0 +1,301 @@
+import json
+import random
+import sys
+from array import array
+
+import pytest
+
+import grafos
+import motores
+from api_calculo import LimiteExcedido
+
+logica_grafos = motores.cargar('logica_grafos')
+
+
+def _completo(n):
+    origenes, destinos = zip(*[(i, j) for i in range(n) for j in range(i + 1, n)])
+    return logica_grafos.Grafo.desde_aristas(n, origenes, destinos)
+
+
+def test_centralidad_exacta_si_cabe_en_el_presupuesto():
+    respuesta = grafos.centralidad(_completo(20), {'tipo': 'intermediacion'})
+    assert respuesta['muestras'] is None
+    assert all(nodo['valor'] == 0 for nodo in respuesta['nodos'])
+
+
+def test_centralidad_muestrea_los_grafos_densos():
+    # 1000 nodos con ~500 000 aristas: pocos nodos, pero no cabe ni la exacta ni 64 fuentes
+    grafo = _completo(1000)
+    respuesta = grafos.centralidad(grafo, {'tipo': 'cercania', 'cantidad': 3})
+    assert respuesta['muestras'] == grafos.MUESTRAS_DEFECTO
+    with pytest.raises(LimiteExcedido):
+        grafos.centralidad(grafo, {'tipo': 'intermediacion', 'muestras': grafos.MAX_MUESTRAS})
+    assert grafos.centralidad(grafo, {'tipo': 'grado', 'muestras': grafos.MAX_MUESTRAS})['muestras'] is None
+
+
+def test_generar_en_los_procesos_de_trabajo(monkeypatch):
+    from trabajos import ColaTrabajos
+    monkeypatch.setattr(grafos, '_redes_generadas', type(grafos._redes_generadas)())
+    parametros = grafos.parametros_red({'modelo': 'barabasi_albert', 'nodos': 500, 'm': 3, 'semilla': 5})
+    cola = ColaTrabajos(procesos=1, max_pendientes=2)
+    try:
+        with pytest.raises(ValueError):
+            cola.enviar('red', parametros)
+        origenes, destinos = grafos.generar(parametros, cola)
+        assert (list(origenes), list(destinos)) == tuple(map(list, grafos.generar_red(parametros)))
+        # La segunda página sale de la memoria, sin volver al proceso
+        assert grafos.generar(parametros, cola)[0] is origenes
+    finally:
+        cola.cerrar()
+
+
+def _bfs(adyacencia, origen):
+    distancias, frontera = {origen: 0}, [origen]
+    while frontera:
+        siguiente = []
+        for u in frontera:
+            for v in adyacencia[u]:
+                if v not in distancias:
+                    distancias[v] = distancias[u] + 1
+                    siguiente.append(v)
+        frontera = siguiente
+    return distancias
+
+
+def _comparar(grafo, adyacencia):
+    assert grafo.n_nodos == len(adyacencia)
+    assert grafo.n_aristas == sum(map(len, adyacencia.values())) // 2
+    assert grafo.aislados == sum(1 for vecinos in adyacencia.values() if not vecinos)
+    for u, vecinos in adyacencia.items():
+        assert grafo.grado(u) == len(vecinos)
+        assert sorted(grafo.vecinos(u)) == sorted(vecinos)
+    grupos, vistos = [], set()
+    for u in adyacencia:
+        if u not in vistos:
+            grupo = _bfs(adyacencia, u)
+            vistos.update(grupo)
+            grupos.append(len(grupo))
+    assert grafo.numero_componentes() == len(grupos)
+    assert grafo.tamanos_componentes() == sorted(grupos, reverse=True)
+
+
+def test_eventos_mantienen_los_contadores():
+    # Suficientes eventos para pasar varias veces por la compactación del delta
+    rnd = random.Random(21)
+    grafo = logica_grafos.Grafo()
+    adyacencia = {}
+    for i in range(150):
+        grafo.agregar_persona(i)
+        adyacencia[i] = set()
+    siguiente_id = 150
+    for paso in range(6000):
+        accion = rnd.random()
+        if accion < 0.6 and len(adyacencia) > 1:
+            u, v = rnd.sample(sorted(adyacencia), 2)
+            assert grafo.crear_conexion(u, v) == (v not in adyacencia[u])
+            adyacencia[u].add(v)
+            adyacencia[v].add(u)
+        elif accion < 0.85:
+            aristas = [(u, v) for u in adyacencia for v in adyacencia[u] if u < v]
+            if aristas:
+                u, v = rnd.choice(aristas)
+                assert grafo.eliminar_arista(u, v)
+                assert not grafo.eliminar_arista(v, u)
+                adyacencia[u].discard(v)
+                adyacencia[v].discard(u)
+        elif accion < 0.9 and adyacencia:
+            u = rnd.choice(sorted(adyacencia))
+            assert grafo.eliminar_nodo(u)
+            assert not grafo.eliminar_nodo(u)
+            for v in adyacencia.pop(u):
+                adyacencia[v].discard(u)
+        else:
+            assert grafo.agregar_persona(siguiente_id)
+            assert not grafo.agregar_persona(siguiente_id)
+            adyacencia[siguiente_id] = set()
+            siguiente_id += 1
+        if paso % 500 == 0:
+            _comparar(grafo, adyacencia)
+    _comparar(grafo, adyacencia)
+    grafo.compactar()
+    _comparar(grafo, adyacencia)
+    copia = logica_grafos.Grafo.desde_dict(grafo.a_dict())
+    _comparar(copia, adyacencia)
+
+
+def _aleatorio(n, p, semilla):
+    rnd = random.Random(semilla)
+    pares = [(i, j) for i in range(n) for j in range(i + 1, n) if rnd.random() < p]
+    grafo = logica_grafos.Grafo.desde_listas([(i, str(i)) for i in range(n)], pares)
+    adyacencia = {i: set() for i in range(n)}
+    for i, j in pares:
+        adyacencia[i].add(j)
+        adyacencia[j].add(i)
+    return grafo, adyacencia
+
+
+def test_camino_mas_corto():
+    grafo, adyacencia = _aleatorio(60, 0.05, 1)
+    for u in range(0, 60, 7):
+        distancias = _bfs(adyacencia, u)
+        for v in range(60):
+            camino = grafo.camino_mas_corto(u, v)
+            if v not in distancias:
+                assert camino is None
+                continue
+            assert len(camino) - 1 == distancias[v]
+            assert camino[0] == u and camino[-1] == v
+            assert all(b in adyacencia[a] for a, b in zip(camino, camino[1:]))
+        assert grafo.distancias(u) == distancias
+
+
+def _intermediacion_fuerza_bruta(adyacencia):
+    nodos = sorted(adyacencia)
+    distancias = {u: _bfs(adyacencia, u) for u in nodos}
+    caminos = {}
+    for s in nodos:
+        sigma = {s: 1}
+        for v in sorted(distancias[s], key=distancias[s].get)[1:]:
+            sigma[v] = sum(sigma[w] for w in adyacencia[v] if distancias[s].get(w) == distancias[s][v] - 1)
+        caminos[s] = sigma
+    n = len(nodos)
+    resultado = {}
+    for v in nodos:
+        suma = 0.0
+        for s in nodos:
+            for t in nodos:
+                if s < t and v not in (s, t) and t in distancias[s] and v in distancias[s] \
+                        and t in distancias[v] and distancias[s][v] + distancias[v][t] == distancias[s][t]:
+                    suma += caminos[s][v] * caminos[v][t] / caminos[s][t]
+        resultado[v] = suma * 2 / ((n - 1) * (n - 2))
+    return resultado
+
+
+def _cercania_fuerza_bruta(adyacencia):
+    n = len(adyacencia)
+    resultado = {}
+    for u in adyacencia:
+        distancias = _bfs(adyacencia, u)
+        alcanzables, suma = len(distancias) - 1, sum(distancias.values())
+        resultado[u] = alcanzables / suma * alcanzables / (n - 1) if suma else 0.0
+    return resultado
+
+
+@pytest.mark.parametrize('semilla', [1, 2, 3])
+def test_centralidad_exacta_contra_fuerza_bruta(semilla):
+    grafo, adyacencia = _aleatorio(30, 0.12, semilla)
+    for obtenida, esperada in ((grafo.centralidad_intermediacion(), _intermediacion_fuerza_bruta(adyacencia)),
+                               (grafo.centralidad_cercania(), _cercania_fuerza_bruta(adyacencia))):
+        assert obtenida.keys() == esperada.keys()
+        assert all(obtenida[u] == pytest.approx(esperada[u]) for u in esperada)
+    # Con tantas muestras como nodos el muestreo es el cálculo exacto
+    assert grafo.centralidad_intermediacion(muestras=30) == grafo.centralidad_intermediacion()
+    grados = grafo.centralidad_grado()
+    assert all(grados[u] == len(adyacencia[u]) / 29 for u in adyacencia)
+
+
+def test_aplicar_eventos():
+    grafo = logica_grafos.Grafo.desde_dict({'nodos': [{'id': 1}, {'id': 2}], 'aristas': []})
+    resultado = grafos.aplicar_eventos(grafo, [
+        {'tipo': 'agregarPersona', 'id': 3, 'nombre': 'Ana'},
+        {'tipo': 'crearConexion', 'id1': 1, 'id2': 2},
+        {'tipo': 'crearConexion', 'arista': '2-3'},
+        {'tipo': 'crearConexion', 'id1': 2, 'id2': 1},
+        {'tipo': 'crearConexion', 'id1': 1, 'id2': 9},
+        {'tipo': 'eliminarArista', 'id1': 1, 'id2': 2},
+        {'tipo': 'otro'},
+    ])
+    assert resultado['aplicados'] == 4
+    assert [i['evento'] for i in resultado['ignorados']] == [3, 4, 6]
+    assert grafo.estadisticas()['aristas'] == 1 and grafo.aislados == 1
+    assert grafos.componentes(grafo, {})['tamanos'] == [2, 1]
+    assert grafos.camino(grafo, {'desde': 3, 'hasta': 2})['distancia'] == 1
+
+
+def _comprobar_red(nodos, origenes, destinos):
+    pares = set()
+    for u, v in zip(origenes, destinos):
+        assert 0 <= u < nodos and 0 <= v < nodos and u != v
+        pares.add((u, v) if u < v else (v, u))
+    assert len(pares) == len(origenes) == len(destinos)
+    return pares
+
+
+@pytest.mark.parametrize('parametros', [
+    {'modelo': 'erdos_renyi', 'nodos': 300, 'p': 0.05},
+    {'modelo': 'erdos_renyi', 'nodos': 300, 'aristas': 2000},
+    {'modelo': 'barabasi_albert', 'nodos': 300, 'm': 4},
+    {'modelo': 'mundo_pequeno', 'nodos': 300, 'k': 6, 'beta': 0.3},
+])
+def test_generar_red_reproducible_y_sin_repetidas(parametros):
+    red = logica_grafos.generar_red(semilla=11, **parametros)
+    pares = _comprobar_red(parametros['nodos'], *red)
+    assert logica_grafos.generar_red(semilla=11, **parametros) == red
+    assert _comprobar_red(parametros['nodos'], *logica_grafos.generar_red(semilla=12, **parametros)) != pares
+    esperadas = logica_grafos.aristas_esperadas(**{k: v for k, v in parametros.items() if k != 'beta'})
+    if parametros.get('p') is None:
+        assert len(pares) == esperadas
+    else:
+        assert abs(len(pares) - esperadas) < 0.1 * esperadas
+
+
+def test_erdos_renyi_extremos():
+    assert len(logica_grafos.generar_red('erdos_renyi', 50, p=0)[0]) == 0
+    completo = logica_grafos.generar_red('erdos_renyi', 50, p=1)
+    assert _comprobar_red(50, *completo) == {(i, j) for i in range(50) for j in range(i + 1, 50)}
+    assert len(logica_grafos.generar_red('erdos_renyi', 50, aristas=10 ** 6)[0]) == 50 * 49 // 2
+    # Una red grande: el salto geométrico se acerca a p·n(n-1)/2
+    n, p = 3000, 0.002
+    origenes, _ = logica_grafos.generar_red('erdos_renyi', n, p=p, semilla=3)
+    assert abs(len(origenes) - p * n * (n - 1) / 2) < 0.05 * p * n * (n - 1) / 2
+
+
+def test_barabasi_albert_une_cada_nodo_nuevo_a_m_anteriores():
+    m = 3
+    origenes, destinos = logica_grafos.generar_red('barabasi_albert', 200, m=m, semilla=4)
+    grafo = logica_grafos.Grafo.desde_aristas(200, origenes, destinos)
+    for nuevo in range(m, 200):
+        assert sum(1 for v in grafo.vecinos(nuevo) if v < nuevo) == m
+    assert grafo.numero_componentes() == 1
+
+
+def test_mundo_pequeno_sin_reconectar_es_el_anillo():
+    n, k = 40, 4
+    pares = _comprobar_red(n, *logica_grafos.generar_red('mundo_pequeno', n, k=k, beta=0))
+    assert pares == {tuple(sorted((u, (u + j) % n))) for u in range(n) for j in range(1, k // 2 + 1)}
+    reconectada = logica_grafos.generar_red('mundo_pequeno', n, k=k, beta=1, semilla=2)
+    assert len(_comprobar_red(n, *reconectada)) == n * k // 2
+
+
+@pytest.mark.parametrize('parametros', [
+    {'modelo': 'erdos_renyi', 'nodos': 10},
+    {'modelo': 'erdos_renyi', 'nodos': 10, 'p': 0.5, 'aristas': 3},
+    {'modelo': 'erdos_renyi', 'nodos': 10, 'p': 1.5},
+    {'modelo': 'barabasi_albert', 'nodos': 10, 'm': 10},
+    {'modelo': 'mundo_pequeno', 'nodos': 10, 'k': 3, 'beta': 0.1},
+    {'modelo': 'mundo_pequeno', 'nodos': 10, 'k': 4},
+    {'modelo': 'otro', 'nodos': 10},
+])
+def test_generar_red_parametros_invalidos(parametros):
+    with pytest.raises(ValueError):
+        logica_grafos.generar_red(**parametros)
+
+
+def test_paginas_de_aristas():
+    origenes, destinos = logica_grafos.generar_red('erdos_renyi', 500, aristas=25_000, semilla=8)
+    binaria = grafos.pagina_binaria(origenes, destinos, 100, 20_100)
+    pares = array('i', binaria)
+    if sys.byteorder == 'big':
+        pares.byteswap()
+    assert list(pares[0::2]) == list(origenes[100:20_100])
+    assert list(pares[1::2]) == list(destinos[100:20_100])
+    lineas = b''.join(grafos.pagina_ndjson(origenes, destinos, 24_990, 25_000, {'aristas': 25_000})).splitlines()
+    assert json.loads(lineas[0]) == {'aristas': 25_000}
+    assert [tuple(json.loads(linea)) for linea in lineas[1:]] == list(zip(origenes[24_990:], destinos[24_990:]))
+
+
+def test_parametros_red_respeta_el_limite():
+    with pytest.raises(LimiteExcedido):
+        grafos.parametros_red({'modelo': 'erdos_renyi', 'nodos': grafos.MAX_NODOS, 'p': 0.5})
+    with pytest.raises(ValueError):
+        grafos.parametros_red({'modelo': 'erdos_renyi', 'p': 0.5})
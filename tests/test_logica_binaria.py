@@ -0,0 +1,158 @@
+import json
+import random
+import threading
+from fractions import Fraction
+
+import pytest
+import motores
+
+binaria = motores.cargar('logica_binaria')
+
+
+def test_convertir_lote_concurrente(monkeypatch):
+    # Varios hilos piden la tabla mientras todavía no existe
+    monkeypatch.setattr(binaria, '_tabla_conversiones', None)
+    numeros = list(range(binaria.TAMANO_TABLA - 1, -1, -1))
+    esperado = ([format(i, 'b') for i in numeros], [format(i, 'o') for i in numeros],
+                [format(i, 'X') for i in numeros])
+    barrera = threading.Barrier(8)
+    resultados, errores = [], []
+
+    def convertir():
+        barrera.wait()
+        try:
+            resultados.append(binaria.convertir_lote(numeros))
+        except Exception as e:
+            errores.append(e)
+
+    hilos = [threading.Thread(target=convertir) for _ in range(8)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    assert not errores
+    assert all(resultado == esperado for resultado in resultados)
+
+
+def test_convertir_lote_coincide_con_format():
+    rnd = random.Random(7)
+    numeros = [0, 1, binaria.TAMANO_TABLA - 1, binaria.TAMANO_TABLA, 10 ** 400]
+    numeros += [rnd.randrange(1 << 40) for _ in range(500)]
+    binarios, octales, hexadecimales = binaria.convertir_lote(iter(numeros))
+    assert binarios == [format(n, 'b') for n in numeros]
+    assert octales == [format(n, 'o') for n in numeros]
+    assert hexadecimales == [format(n, 'X') for n in numeros]
+    assert [int(b, 2) for b in binarios] == numeros
+
+
+def test_convertir_lote_rechaza_negativos():
+    with pytest.raises(ValueError):
+        binaria.convertir_lote([3, -1])
+
+
+@pytest.mark.parametrize('base', [2, 3, 7, 10, 16, 36])
+def test_entero_a_base_ida_y_vuelta(base):
+    rnd = random.Random(base)
+    for bits in (0, 1, 64, 3000, 20000):
+        for _ in range(3):
+            numero = rnd.getrandbits(bits) if bits else 0
+            texto = binaria.entero_a_base(numero, base)
+            assert binaria.base_a_entero(texto, base) == numero
+            assert binaria.entero_a_base(-numero, base) == ('-' + texto if numero else '0')
+            if bits <= 3000:
+                assert texto == binaria._entero_a_base_simple(numero, base)
+
+
+def test_entero_enorme_ida_y_vuelta():
+    numero = 10 ** 100_000 - 12345
+    texto = binaria.entero_a_base(numero, 10)
+    assert len(texto) == 100_000 and texto.endswith('87655')
+    assert binaria.base_a_entero(texto, 10) == numero
+    assert binaria.base_a_entero(binaria.entero_a_base(numero, 36), 36) == numero
+
+
+@pytest.mark.parametrize('numero, base_destino, base_origen, esperado', [
+    ('0.1', 2, 10, '0.0(0011)'),
+    (Fraction(1, 3), 10, 10, '0.(3)'),
+    (Fraction(1, 6), 10, 10, '0.1(6)'),
+    (0.75, 2, 10, '0.11'),
+    ('-A.8', 10, 16, '-10.5'),
+    ('z', 10, 36, '35'),
+    ('255', 16, 10, 'FF'),
+])
+def test_convertir_numero(numero, base_destino, base_origen, esperado):
+    assert binaria.convertir_numero(numero, base_destino, base_origen) == esperado
+
+
+def test_convertir_numero_truncado():
+    assert binaria.convertir_numero(Fraction(1, 7), 10, precision=5) == '0.14285...'
+    assert binaria.convertir_numero(Fraction(1, 7), 10, precision=6) == '0.(142857)'
+
+
+@pytest.mark.parametrize('base', [2, 3, 5, 12, 36])
+def test_fracciones_ida_y_vuelta(base):
+    rnd = random.Random(base)
+    for _ in range(20):
+        valor = Fraction(rnd.randrange(-10 ** 6, 10 ** 6), base ** rnd.randrange(8))
+        texto = binaria.convertir_numero(valor, base, precision=20)
+        assert binaria.convertir_numero(texto, 10, base_origen=base) == binaria.convertir_numero(valor, 10)
+        assert binaria._a_fraccion(texto, base) == valor
+
+
+def test_complemento_a_dos():
+    assert binaria.convertir_numero(-1, 2, ancho=8) == '11111111'
+    assert binaria.convertir_numero(5, 2, ancho=8) == '00000101'
+    assert binaria.convertir_numero(-128, 16, ancho=8) == '80'
+    for numero in (128, -129):
+        with pytest.raises(ValueError):
+            binaria.convertir_numero(numero, 2, ancho=8)
+    with pytest.raises(ValueError):
+        binaria.convertir_numero('-0.5', 2, ancho=8)
+
+
+@pytest.mark.parametrize('llamada', [
+    lambda: binaria.convertir_numero(10, 1),
+    lambda: binaria.convertir_numero(10, 37),
+    lambda: binaria.base_a_entero('12', 2),
+    lambda: binaria.base_a_entero('', 10),
+])
+def test_entradas_invalidas(llamada):
+    with pytest.raises(ValueError):
+        llamada()
+
+
+def test_funciones_clasicas():
+    assert binaria.decimal_a_binario(10) == '1010'
+    assert binaria.decimal_a_octal(64) == '100'
+    assert binaria.decimal_a_hexadecimal(48879) == 'BEEF'
+    assert binaria.decimal_a_binario(2.5) == '10.1'
+
+
+def test_pasos_son_perezosos():
+    pasos = binaria.iterar_pasos(10 ** 50, 2)
+    assert next(pasos) == binaria.PasoDivision(10 ** 50, 10 ** 50 // 2, 0)
+    assert list(binaria.iterar_pasos(0, 2)) == []
+
+
+@pytest.mark.parametrize('base', [2, 8, 10, 16, 36])
+def test_traza_reconstruye_el_numero(base):
+    for numero in (0, 1, 255, 987654321, 3 ** 80):
+        traza = binaria.traza_dict(numero, base)
+        assert traza['resultado'] == binaria.entero_a_base(numero, base)
+        valor = 0
+        for paso in reversed(traza['pasos']):
+            valor = valor * base + binaria.DIGITOS.index(paso['residuo'])
+        assert valor == numero
+        for paso, siguiente in zip(traza['pasos'], traza['pasos'][1:]):
+            assert siguiente['dividendo'] == paso['cociente']
+        assert json.loads(binaria.traza_json(numero, base)) == traza
+
+
+def test_traza_renderizadores():
+    assert binaria.pasos_conversion(13, 2) is binaria.pasos_conversion(13, 2)
+    texto = binaria.traza_texto(13, 2, 'binario')
+    assert 'CONVERSIÓN A BINARIO (BASE 2)' in texto
+    assert texto.count('÷') == 4 and 'abajo hacia arriba): 1101' in texto
+    html = binaria.traza_html(13, 2)
+    assert html.count('<tr>') == 6 and 'Resultado: 1101' in html
+    assert binaria.mostrar_proceso_conversion(13, 2, 'binario') == '1101'
@@ -0,0 +1,191 @@
+import json
+import random
+import string
+
+import pytest
+import motores
+
+booleana = motores.cargar('logica_booleana')
+
+
+def test_cadena_plana_larga():
+    # ~250 operadores, ~1000 caracteres: antes fallaba con "too many nested parentheses"
+    expresion = ' y '.join('PQRS'[i % 4] for i in range(251))
+    assert len(expresion) < 2000
+    filas = booleana.CalculadoraBooleana(expresion, motor='filas')
+    _, resultados = filas.generar_tabla_verdad()
+    assert resultados == [False] * 15 + [True]
+
+
+def test_cadenas_largas_de_cada_operador():
+    for op in ('v', '-->', '<-->'):
+        expresion = f' {op} '.join('PQRS'[i % 4] for i in range(301))
+        filas = booleana.CalculadoraBooleana(expresion, motor='filas')
+        _, resultados = filas.generar_tabla_verdad()
+        assert len(resultados) == 16
+
+
+def test_negaciones_y_parentesis_profundos():
+    assert booleana.CalculadoraBooleana('~' * 5001 + 'P', motor='filas').generar_tabla_verdad()[1] == [True, False]
+    assert booleana.CalculadoraBooleana('(' * 3000 + 'P' + ')' * 3000,
+                                        motor='filas').generar_tabla_verdad()[1] == [False, True]
+
+
+@pytest.mark.parametrize('expresion', ['', 'P y', '(P', 'P)', 'P Q', 'y P', '~'])
+def test_expresiones_invalidas(expresion):
+    with pytest.raises(ValueError):
+        booleana.CalculadoraBooleana(expresion)
+
+
+def _anidada(niveles):
+    expresion = 'P'
+    for i in range(niveles):
+        expresion = f'~({expresion} {["y", "v", "-->", "<-->"][i % 4]} {"QRS"[i % 3]})'
+    return expresion
+
+
+@pytest.mark.parametrize('expresion', [
+    'y'.join('PQRS'[i % 4] for i in range(1000)),
+    '<-->'.join('PQRS'[i % 4] for i in range(400)),
+    '-->'.join('PQRS'[i % 4] for i in range(500)),
+    _anidada(400),
+])
+def test_motor_de_bits_coincide_con_filas(expresion):
+    assert booleana.CalculadoraBooleana(expresion).comparar_motores()
+
+
+@pytest.mark.parametrize('filas', [1, 7, 64, 1 << 16])
+def test_lista_a_bits_ida_y_vuelta(filas):
+    rnd = random.Random(filas)
+    resultados = [rnd.random() < 0.5 for _ in range(filas)]
+    bits = booleana.lista_a_bits(resultados)
+    assert bits == sum(1 << i for i, r in enumerate(resultados) if r)
+    assert booleana.bits_a_lista(bits, filas) == resultados
+
+
+def _cubiertas(terminos):
+    cubiertas = 0
+    for imp in terminos:
+        for m in booleana._minterminos_de(imp):
+            cubiertas |= 1 << m
+    return cubiertas
+
+
+def _calculadora(n_vars):
+    return booleana.CalculadoraBooleana(' y '.join(string.ascii_uppercase[:n_vars]))
+
+
+@pytest.mark.parametrize('metodo', ['qm', 'espresso'])
+@pytest.mark.parametrize('n_vars', [1, 2, 3, 4, 5, 6, 8])
+def test_minimizar_reproduce_la_tabla(metodo, n_vars):
+    rnd = random.Random(n_vars)
+    calc = _calculadora(n_vars)
+    for _ in range(20):
+        on = rnd.getrandbits(1 << n_vars)
+        assert _cubiertas(calc.minimizar(on, metodo=metodo)) == on
+
+
+@pytest.mark.parametrize('metodo', ['qm', 'espresso'])
+def test_minimizar_con_indiferentes(metodo):
+    rnd = random.Random(4)
+    calc = _calculadora(5)
+    for _ in range(30):
+        on = rnd.getrandbits(32)
+        indiferentes = [i for i in range(32) if rnd.random() < 0.25]
+        dc = sum(1 << i for i in indiferentes)
+        cubiertas = _cubiertas(calc.minimizar(on, indiferentes, metodo=metodo))
+        assert cubiertas & ~dc == on & ~dc
+        assert not cubiertas & ~(on | dc)
+
+
+def test_minimizar_es_minimo():
+    # Σm(0,1,2,5,6,7) es cíclico: no hay esenciales y Petrick elige 3 de los 6 primos
+    calc = _calculadora(3)
+    on = sum(1 << m for m in (0, 1, 2, 5, 6, 7))
+    terminos = calc.minimizar(on, metodo='qm')
+    assert len(terminos) == 3
+    assert all(imp.mascara.bit_count() == 1 for imp in terminos)
+    # Σm(4,8,10,11,12,15) + d(9,14): B~C~D v A~B v AC
+    calc = _calculadora(4)
+    on = sum(1 << m for m in (4, 8, 10, 11, 12, 15))
+    terminos = calc.minimizar(on, [9, 14], metodo='qm')
+    assert len(terminos) == 3
+    assert sum(4 - imp.mascara.bit_count() for imp in terminos) == 7
+
+
+def test_minimizar_casos_extremos():
+    calc = _calculadora(3)
+    assert calc.minimizar(0) == []
+    assert calc.minimizar(0b11111111) == [booleana.Implicante(0, 0b111)]
+    assert calc.simplificar_quine_mccluskey(0b11111111) == '1'
+    assert calc.simplificar_quine_mccluskey(0) == '0'
+    with pytest.raises(ValueError):
+        calc.minimizar(1, metodo='otro')
+
+
+def test_minimizar_usa_espresso_con_muchas_variables():
+    n_vars = booleana.UMBRAL_ESPRESSO + 2
+    rnd = random.Random(n_vars)
+    on = rnd.getrandbits(1 << n_vars)
+    assert _cubiertas(_calculadora(n_vars).minimizar(on)) == on
+
+
+@pytest.mark.parametrize('expresion', ['P <--> Q <--> R', '(P --> Q) y (Q --> R) y (R --> P)',
+                                       '~(P y Q) v (R y ~S) v (P <--> S)'])
+def test_simplificada_equivale_a_la_original(expresion):
+    original = booleana.CalculadoraBooleana(expresion)
+    resultados = original.evaluar_bits()
+    texto = original.simplificar_quine_mccluskey(resultados)
+    # Se añade una contradicción con todas las variables para conservar su orden
+    primera = original.variables[0]
+    contradiccion = f'{primera} y ~{primera} y ' + ' y '.join(original.variables)
+    simplificada = booleana.CalculadoraBooleana(f'({texto}) v ({contradiccion})')
+    assert simplificada.variables == original.variables
+    assert simplificada.evaluar_bits() == resultados
+
+
+@pytest.mark.parametrize('n_vars', [1, 2, 3, 4, 5, 6, 7, 8])
+def test_mapa_karnaugh_coloca_cada_fila(n_vars):
+    rnd = random.Random(n_vars)
+    resultados = rnd.getrandbits(1 << n_vars)
+    mapa = _calculadora(n_vars).mapa_karnaugh(resultados)
+    filas = mapa.filas()
+    assert len(filas) * len(filas[0]) == 1 << n_vars
+    vistas = set()
+    for etiqueta_fila, fila in zip(mapa.etiquetas_filas, filas):
+        for etiqueta_columna, valor in zip(mapa.etiquetas_columnas, fila):
+            indice = int(etiqueta_fila + etiqueta_columna, 2)
+            vistas.add(indice)
+            assert valor == str(resultados >> indice & 1)
+    assert vistas == set(range(1 << n_vars))
+
+
+@pytest.mark.parametrize('n_vars', [2, 3, 4, 5, 6, 7])
+def test_mapa_karnaugh_vecinas_difieren_en_un_bit(n_vars):
+    mapa = booleana.mapa_karnaugh(0, n_vars)
+    for etiquetas in (mapa.etiquetas_filas, mapa.etiquetas_columnas):
+        if len(etiquetas) < 2:
+            continue
+        # También la primera y la última (el mapa es toroidal)
+        for a, b in zip(etiquetas, etiquetas[1:] + etiquetas[:1]):
+            assert sum(x != y for x, y in zip(a, b)) == 1
+
+
+def test_mapa_karnaugh_representaciones():
+    calc = booleana.CalculadoraBooleana('(P y Q) v (R y ~S)')
+    resultados = calc.evaluar_bits()
+    mapa = calc.mapa_karnaugh(resultados)
+    assert calc.mapa_karnaugh(booleana.bits_a_lista(resultados, 16)) == mapa
+    datos = json.loads(mapa.a_json(calc.variables))
+    assert datos['variables_filas'] == ['P', 'Q']
+    assert datos['variables_columnas'] == ['R', 'S']
+    assert datos['etiquetas_columnas'] == ['00', '01', '11', '10']
+    assert datos['celdas'] == [[int(v) for v in fila] for fila in mapa.filas()]
+    # Fila PQ=11: verdadera en todas las columnas; fila PQ=00 sólo con RS=10
+    assert datos['celdas'][2] == [1, 1, 1, 1]
+    assert datos['celdas'][0] == [0, 0, 0, 1]
+    html = mapa.a_html(calc.variables)
+    assert html.count('<tr>') == 5 and html.count('class="v1"') == bin(resultados).count('1')
+    texto = calc.generar_mapa_karnaugh(resultados)
+    assert texto == mapa.a_texto(calc.variables)
+    assert '4 variables' in texto and all(e in texto for e in datos['etiquetas_columnas'])
@@ -0,0 +1,172 @@
+import random
+from fractions import Fraction
+
+import pytest
+import motores
+
+conjuntos = motores.cargar('logica_conjuntos')
+
+
+def _determinadas(ecuaciones, n):
+    """Referencia densa: RREF exacta; x_j queda determinada si su fila pivote no toca columnas libres"""
+    filas = [[Fraction(int(j in miembros)) for j in range(n)] for miembros in ecuaciones]
+    pivotes = []
+    fila = 0
+    for columna in range(n):
+        elegida = next((i for i in range(fila, len(filas)) if filas[i][columna]), None)
+        if elegida is None:
+            continue
+        filas[fila], filas[elegida] = filas[elegida], filas[fila]
+        factor = filas[fila][columna]
+        filas[fila] = [v / factor for v in filas[fila]]
+        for i in range(len(filas)):
+            if i != fila and filas[i][columna]:
+                a = filas[i][columna]
+                filas[i] = [v - a * w for v, w in zip(filas[i], filas[fila])]
+        pivotes.append(columna)
+        fila += 1
+    libres = set(range(n)) - set(pivotes)
+    return {columna for f, columna in enumerate(pivotes) if not any(filas[f][c] for c in libres)}
+
+
+def _problema(rnd, k):
+    n = 1 << k
+    categorias = [chr(ord('A') + i) for i in range(k)]
+    regiones = [rnd.randrange(20) for _ in range(n)]
+    datos = {'intersecciones': {}, 'regiones': {}, 'uniones': {}}
+    ecuaciones = []
+    for _ in range(rnd.randrange(1, n)):
+        m = rnd.randrange(n)
+        tipo = rnd.choice(['intersecciones', 'regiones', 'uniones'])
+        if tipo == 'intersecciones':
+            miembros = [s for s in range(n) if s & m == m]
+        elif tipo == 'regiones':
+            miembros = [m]
+        else:
+            m = m or 1
+            miembros = [s for s in range(n) if s & m]
+        datos[tipo][m] = sum(regiones[s] for s in miembros)
+        ecuaciones.append(set(miembros))
+    return categorias, datos, ecuaciones
+
+
+def test_regiones_indeterminadas_exactas():
+    rnd = random.Random(2024)
+    for _ in range(3000):
+        k = rnd.randint(2, 4)
+        n = 1 << k
+        categorias, datos, ecuaciones = _problema(rnd, k)
+        esperadas = sorted(conjuntos._nombre_region(m, categorias)
+                           for m in set(range(n)) - _determinadas(ecuaciones, n))
+        try:
+            conjuntos.resolver_conjuntos(categorias, **datos)
+            obtenidas = []
+        except conjuntos.DatosInsuficientes as e:
+            obtenidas = sorted(e.regiones)
+        assert obtenidas == esperadas, datos
+
+
+def test_todas_las_intersecciones():
+    solucion = conjuntos.resolver_conjuntos(['A', 'B'], total=10, intersecciones={'A': 6, 'B': 5, 'A∩B': 3})
+    assert solucion.regiones == [2, 3, 2, 3]
+
+
+def test_datos_contradictorios():
+    with pytest.raises(conjuntos.DatosInconsistentes):
+        conjuntos.resolver_conjuntos(['A', 'B'], total=10, regiones={'A': 4, 'B': 4, 'A∩B': 4, 'ninguno': 4})
+
+
+def _uniones(regiones, k):
+    n = 1 << k
+    return {m: sum(v for r, v in enumerate(regiones) if r & m) for m in range(1, n)}
+
+
+@pytest.mark.parametrize('con_total', [True, False])
+def test_todas_las_uniones(con_total):
+    rnd = random.Random(7)
+    k = 11
+    categorias = [f'C{i}' for i in range(k)]
+    regiones = [rnd.randrange(50) for _ in range(1 << k)]
+    datos = {'uniones': _uniones(regiones, k), 'intersecciones': {3: sum(v for r, v in enumerate(regiones) if r & 3 == 3)}}
+    if con_total:
+        solucion = conjuntos.resolver_conjuntos(categorias, total=sum(regiones), **datos)
+        assert solucion.regiones == regiones
+    else:
+        with pytest.raises(conjuntos.DatosInsuficientes) as error:
+            conjuntos.resolver_conjuntos(categorias, **datos)
+        assert error.value.regiones == ['ninguno']
+        solucion = conjuntos.resolver_conjuntos(categorias, regiones={'ninguno': regiones[0]}, **datos)
+        assert solucion.regiones == regiones
+
+
+def test_uniones_que_no_cuadran():
+    regiones = [1, 2, 3, 4, 5, 6, 7, 8]
+    uniones = _uniones(regiones, 3)
+    with pytest.raises(conjuntos.DatosInconsistentes):
+        conjuntos.resolver_conjuntos(['A', 'B', 'C'], total=36, uniones=uniones, regiones={'A': 3})
+    with pytest.raises(conjuntos.DatosInconsistentes):
+        conjuntos.resolver_conjuntos(['A', 'B', 'C'], total=20, uniones=uniones)
+    assert conjuntos.resolver_conjuntos(['A', 'B', 'C'], total=36, uniones=uniones).regiones == regiones
+
+
+def test_lote_dos_conjuntos_coincide_con_el_solucionador():
+    rnd = random.Random(19)
+    filas = [(rnd.randint(1, 60), rnd.randint(0, 20), rnd.randint(0, 20), rnd.randint(0, 20))
+             for _ in range(300)]
+    total, solo_a, solo_b, ninguno = (list(c) for c in zip(*filas))
+    lote = conjuntos.resolver_lote_dos_conjuntos(total, solo_a, solo_b, ninguno=ninguno)
+    assert len(lote) == len(filas)
+    for i, (t, a, b, ni) in enumerate(filas):
+        fila = lote.fila(i)
+        solver = conjuntos.SolucionadorConjuntos()
+        try:
+            reporte = solver.problema_dos_conjuntos(t, a, b, ni)
+        except ValueError:
+            assert not fila['valido'] and i in lote.invalidos()
+            continue
+        assert fila['valido']
+        assert fila['ambos'] == reporte['ambos'] and fila['ninguno'] == reporte['ninguno']
+        assert fila['total_a'] == reporte['total_A'] and fila['total_b'] == reporte['total_B']
+        assert fila['porcentaje_a'] == reporte['porcentaje_A']
+        assert lote.texto(i) == reporte['solucion_texto']
+
+
+def test_lote_dos_conjuntos_con_ambos():
+    lote = conjuntos.resolver_lote_dos_conjuntos(100, [30, 50], [20, 40], ambos=[10, 20])
+    assert lote.a_columnas()['ninguno'] == [40, -10]
+    assert lote.invalidos() == [1]
+    reporte = conjuntos.SolucionadorConjuntos().problema_dos_conjuntos_con_ambos(100, 30, 20, 10)
+    assert lote.texto(0) == reporte['solucion_texto']
+    with pytest.raises(ValueError):
+        lote.texto(1)
+
+
+def test_lote_tres_conjuntos_coincide_con_el_solucionador():
+    rnd = random.Random(3)
+    for _ in range(200):
+        regiones = [rnd.randint(0, 15) for _ in range(7)]
+        total = sum(regiones) + rnd.randint(-5, 10)
+        lote = conjuntos.resolver_lote_tres_conjuntos([total], *[[r] for r in regiones])
+        fila = lote.fila(0)
+        assert fila['valido'] == (total >= sum(regiones) and total > 0)
+        if not fila['valido']:
+            continue
+        reporte = conjuntos.SolucionadorConjuntos().problema_tres_conjuntos(
+            total, *regiones, ninguno=total - sum(regiones))
+        assert [fila[c] for c in ('total_a', 'total_b', 'total_c')] == \
+               [reporte['total_A'], reporte['total_B'], reporte['total_C']]
+        assert lote.texto(0) == reporte['solucion_texto']
+
+
+def test_lote_tres_conjuntos_con_ninguno_debe_cuadrar():
+    lote = conjuntos.resolver_lote_tres_conjuntos([20, 20], 1, 2, 3, 1, 1, 1, 1, ninguno=[10, 9])
+    assert [f['valido'] for f in lote.filas()] == [True, False]
+
+
+def test_lote_columnas_invalidas():
+    with pytest.raises(ValueError):
+        conjuntos.resolver_lote_dos_conjuntos([10, 20], [1, 2, 3], 1, ninguno=0)
+    with pytest.raises(ValueError):
+        conjuntos.resolver_lote_dos_conjuntos(10, 1, 1, ninguno=1, ambos=1)
+    with pytest.raises(ValueError):
+        conjuntos.resolver_lote_dos_conjuntos(10, 1, 1)
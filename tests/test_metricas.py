@@ -0,0 +1,157 @@
+import io
+import json
+import logging
+import random
+import threading
+import time
+
+import pytest
+
+import metricas
+
+
+def _muestras(texto):
+    """{'nombre{etiquetas}': valor} de las líneas de datos del formato de Prometheus"""
+    resultado = {}
+    for linea in texto.splitlines():
+        if linea and not linea.startswith('#'):
+            clave, _, valor = linea.rpartition(' ')
+            resultado[clave] = float(valor)
+    return resultado
+
+
+def _en_hilos(funcion, hilos=8):
+    barrera = threading.Barrier(hilos)
+
+    def correr(i):
+        barrera.wait()
+        funcion(i)
+
+    lista = [threading.Thread(target=correr, args=(i,)) for i in range(hilos)]
+    for hilo in lista:
+        hilo.start()
+    for hilo in lista:
+        hilo.join()
+
+
+def test_histograma_coincide_con_recalcular():
+    registro = metricas.Registro()
+    histograma = registro.histograma('prueba_segundos', 'Prueba', ('ruta',))
+    observados = {'/a': [], '/b': []}
+
+    def observar(i):
+        rnd = random.Random(i)
+        ruta = '/a' if i % 2 else '/b'
+        valores = [rnd.choice(metricas.LIMITES_SEGUNDOS + (40.0,)) if rnd.random() < 0.2
+                   else rnd.expovariate(10) for _ in range(5000)]
+        for valor in valores:
+            histograma.observar(valor, ruta)
+        observados[ruta].extend(valores)
+
+    _en_hilos(observar)
+    muestras = _muestras(registro.exportar())
+    for ruta, valores in observados.items():
+        for limite in metricas.LIMITES_SEGUNDOS + (float('inf'),):
+            le = metricas._numero(limite)
+            assert muestras[f'prueba_segundos_bucket{{ruta="{ruta}",le="{le}"}}'] == \
+                   sum(1 for v in valores if v <= limite)
+        assert muestras[f'prueba_segundos_count{{ruta="{ruta}"}}'] == len(valores)
+        assert muestras[f'prueba_segundos_sum{{ruta="{ruta}"}}'] == pytest.approx(sum(valores))
+
+
+def test_contadores_y_medidores_concurrentes():
+    registro = metricas.Registro()
+    contador = registro.contador('prueba_total', 'Prueba', ('codigo',))
+    en_curso = registro.medidor('prueba_en_curso', 'Prueba')
+
+    def atender(i):
+        for _ in range(2000):
+            en_curso.sumar()
+            contador.sumar(str(200 + i % 2))
+            en_curso.sumar(valor=-1)
+        contador.sumar('500', valor=3)
+
+    _en_hilos(atender)
+    muestras = _muestras(registro.exportar())
+    assert muestras['prueba_total{codigo="200"}'] == 4 * 2000
+    assert muestras['prueba_total{codigo="201"}'] == 4 * 2000
+    assert muestras['prueba_total{codigo="500"}'] == 8 * 3
+    assert muestras['prueba_en_curso'] == 0
+    en_curso.fijar(valor=7)
+    assert _muestras(registro.exportar())['prueba_en_curso'] == 7
+
+
+def test_medir_registra_aunque_falle():
+    registro = metricas.Registro()
+    histograma = registro.histograma('prueba_segundos', 'Prueba', ('motor',), limites=(0.5, 10))
+    with histograma.medir('bien'):
+        time.sleep(0.01)
+    with pytest.raises(ZeroDivisionError):
+        with histograma.medir('mal'):
+            1 / 0
+    muestras = _muestras(registro.exportar())
+    assert muestras['prueba_segundos_count{motor="bien"}'] == 1
+    assert muestras['prueba_segundos_count{motor="mal"}'] == 1
+    assert 0.01 <= muestras['prueba_segundos_sum{motor="bien"}'] < 0.5
+
+
+def test_exportar_formato_y_colectores(caplog):
+    registro = metricas.Registro()
+    contador = registro.contador('prueba_total', 'Prueba', ('ruta',))
+    assert registro.contador('prueba_total', 'Otra ayuda', ('ruta',)) is contador
+    contador.sumar('a"b\\c\nd')
+    registro.colector(lambda: [metricas.valores(metricas.Medidor, 'prueba_cache', 'Caché', ('nombre',),
+                                                {('libros',): 3})])
+    registro.colector(lambda: 1 / 0)
+    with caplog.at_level(logging.ERROR, logger='proyecto_md'):
+        texto = registro.exportar()
+    assert '# TYPE prueba_total counter' in texto and '# TYPE prueba_cache gauge' in texto
+    assert 'prueba_total{ruta="a\\"b\\\\c\\nd"} 1\n' in texto
+    assert 'prueba_cache{nombre="libros"} 3\n' in texto
+    assert any('colector' in r.getMessage() for r in caplog.records)
+
+
+def test_registro_json_asincrono():
+    registro = metricas.registro
+    anteriores = (registro.handlers, registro.level, registro.propagate)
+    destino = io.StringIO()
+    oyente = metricas.configurar_registro(logging.INFO, destino)
+    try:
+        valores = [1, 2]
+        registro.info("Petición %s", valores, extra={'ruta': '/metrics', 'codigo': 200})
+        # El mensaje se interpola al encolar, no al escribir
+        valores.append(3)
+        registro.debug("No se escribe")
+        try:
+            1 / 0
+        except ZeroDivisionError:
+            registro.exception("Falló")
+    finally:
+        oyente.stop()
+        registro.handlers, registro.level, registro.propagate = anteriores
+    lineas = [json.loads(linea) for linea in destino.getvalue().splitlines()]
+    assert len(lineas) == 2
+    assert lineas[0]['mensaje'] == "Petición [1, 2]"
+    assert (lineas[0]['ruta'], lineas[0]['codigo'], lineas[0]['nivel']) == ('/metrics', 200, 'INFO')
+    assert lineas[1]['mensaje'] == "Falló" and 'ZeroDivisionError' in lineas[1]['error']
+
+
+def _ocupado(segundos):
+    fin = time.perf_counter() + segundos
+    while time.perf_counter() < fin:
+        pass
+
+
+def test_perfilador():
+    perfilador = metricas.Perfilador(intervalo=0.002)
+    perfilador.iniciar()
+    try:
+        assert perfilador.activo
+        _ocupado(0.2)
+    finally:
+        perfilador.detener()
+    estado = perfilador.estado()
+    assert not estado['activo'] and estado['muestras'] > 0
+    lineas = perfilador.reporte().splitlines()
+    assert any('_ocupado (test_metricas.py' in linea for linea in lineas)
+    assert sum(int(linea.rpartition(' ')[2]) for linea in lineas) >= estado['muestras']
@@ -0,0 +1,68 @@
+import logging
+import sqlite3
+
+import pytest
+
+import migraciones
+
+
+@pytest.fixture
+def conexion(tmp_path):
+    conexion = sqlite3.connect(str(tmp_path / 'prueba.db'))
+    # Como la base original: sólo la tabla Usiarios
+    conexion.execute('''
+        CREATE TABLE "Usiarios" (
+            "id" INTEGER, "nombre" TEXT, "correo" TEXT, "contraseña" TEXT,
+            "tipoUsuario" INTEGER, "usuario" TEXT, PRIMARY KEY("id" AUTOINCREMENT)
+        )
+    ''')
+    conexion.commit()
+    yield conexion
+    conexion.close()
+
+
+def _tablas(conexion):
+    return {fila[0] for fila in conexion.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+
+
+def test_base_nueva_queda_en_la_ultima_version(conexion):
+    aplicadas = migraciones.migrar(conexion)
+    assert len(aplicadas) == len(migraciones.MIGRACIONES)
+    assert migraciones.version_actual(conexion) == migraciones.MIGRACIONES[-1][0]
+    assert {'usuarios', 'sesiones', 'cache_ia'} <= _tablas(conexion)
+    assert 'Usiarios' not in _tablas(conexion)
+    # Una segunda vez no hay nada pendiente
+    assert migraciones.migrar(conexion) == []
+
+
+def test_usiarios_no_pierde_filas(conexion, caplog):
+    conexion.executemany('INSERT INTO Usiarios (nombre, correo, contraseña, tipoUsuario, usuario) VALUES (?, ?, ?, ?, ?)', [
+        ('Ana', 'ana@x.com', 'h1', 1, 'ana'),
+        ('Sin correo', None, 'h2', 2, 'sc'),
+        ('Ana otra vez', 'ana@x.com', 'h3', 1, 'ana2'),
+        ('Beto', 'beto@x.com', None, 2, 'beto'),
+        ('Caro', 'caro@x.com', 'h4', 1, 'caro'),
+    ])
+    conexion.commit()
+    # 'caro' ya se había registrado por la página antes de migrar
+    migraciones._crear_usuarios(conexion.cursor())
+    conexion.execute("INSERT INTO usuarios (nombre, correo, contraseña) VALUES ('Carolina', 'caro@x.com', 'h5')")
+    conexion.execute('PRAGMA user_version = 1')
+    conexion.commit()
+
+    with caplog.at_level(logging.WARNING, logger='proyecto_md.migraciones'):
+        migraciones.migrar(conexion)
+    usuarios = conexion.execute(
+        'SELECT nombre, correo, contraseña, tipo_usuario, usuario FROM usuarios ORDER BY correo').fetchall()
+    assert usuarios == [
+        ('Ana', 'ana@x.com', 'h1', 1, 'ana'),
+        ('Beto', 'beto@x.com', '', 2, 'beto'),
+        ('Carolina', 'caro@x.com', 'h5', None, None),
+    ]
+    sin_migrar = conexion.execute('SELECT nombre, motivo FROM usiarios_sin_migrar ORDER BY id').fetchall()
+    assert sin_migrar == [
+        ('Sin correo', 'sin correo'),
+        ('Ana otra vez', 'correo repetido en Usiarios'),
+        ('Caro', 'el correo ya estaba en usuarios'),
+    ]
+    assert '3 filas' in caplog.text
@@ -0,0 +1,21 @@
+from proxy_ia import LimiteTasa
+
+
+def test_limite_por_usuario():
+    limite = LimiteTasa(por_minuto=60, rafaga=2)
+    assert limite.consumir(1) == 0
+    assert limite.consumir(1) == 0
+    espera = limite.consumir(1)
+    assert 0 < espera <= 1
+    # Cada usuario tiene su propia cubeta
+    assert limite.consumir(2) == 0
+
+
+def test_purga_cubetas_llenas():
+    limite = LimiteTasa(por_minuto=60, rafaga=1, max_usuarios=2)
+    limite.consumir('a')
+    limite.consumir('b')
+    # Las cubetas de 'a' y 'b' vuelven a estar llenas un segundo después
+    limite._cubetas = {usuario: (fichas, antes - 1) for usuario, (fichas, antes) in limite._cubetas.items()}
+    limite.consumir('c')
+    assert set(limite._cubetas) == {'c'}
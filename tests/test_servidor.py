@@ -0,0 +1,16 @@
+import pytest
+import servidor
+
+
+@pytest.mark.parametrize('siguiente, esperado', [
+    # Las páginas de login envían el valor ya codificado
+    ('/ACCESO%20WEB/1-Center%20Web.html', '/ACCESO%20WEB/1-Center%20Web.html'),
+    ('/ACCESO WEB/1-Center Web.html', '/ACCESO%20WEB/1-Center%20Web.html'),
+    ('//otro.sitio/x', None),
+    ('/\\otro.sitio', None),
+    ('https://otro.sitio/', None),
+    ('/no-existe.html', None),
+    ('/../DB/servidor.py', None),
+])
+def test_destino_local(siguiente, esperado):
+    assert servidor.destino_local(siguiente) == esperado
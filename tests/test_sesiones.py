@@ -0,0 +1,35 @@
+import pytest
+
+from sesiones import AlmacenSesiones, token_de_peticion
+
+USUARIO = {'id': 1, 'nombre': 'Ana', 'correo': 'ana@x.com'}
+
+
+@pytest.fixture
+def almacen():
+    return AlmacenSesiones(secreto=b'secreto de prueba')
+
+
+def test_token_valido(almacen):
+    token = almacen.crear(USUARIO)
+    assert almacen.validar(token) == USUARIO
+    assert almacen.eliminar(token)
+    assert almacen.validar(token) is None
+
+
+@pytest.mark.parametrize('token', ['', 'sin-firma', 'abc.def', 'ñandú.ñandú', 'abc.éé', 'é.'])
+def test_tokens_no_validos(almacen, token):
+    almacen.crear(USUARIO)
+    assert almacen.validar(token) is None
+    assert not almacen.eliminar(token)
+
+
+def test_firma_alterada(almacen):
+    id_sesion, _, firma = almacen.crear(USUARIO).partition('.')
+    assert almacen.validar(f'{id_sesion}.{firma[:-1]}é') is None
+
+
+def test_token_de_la_cookie_con_caracteres_no_ascii(almacen):
+    # http.server decodifica las cabeceras como latin-1
+    cabeceras = {'Cookie': 'otra=1; sesion=áé.í'}
+    assert almacen.validar(token_de_peticion(cabeceras)) is None
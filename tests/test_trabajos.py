@@ -0,0 +1,120 @@
+import multiprocessing
+import os
+import time
+
+import pytest
+
+import trabajos
+from trabajos import ColaTrabajos, ColaLlena, TiempoAgotado
+
+EXPRESION = '(A v ~B) y (B v ~C) y C'
+
+
+@pytest.fixture
+def cola():
+    cola = ColaTrabajos(procesos=1, max_pendientes=1)
+    yield cola
+    cola.cerrar()
+
+
+def test_ejecutar_devuelve_el_resultado(cola):
+    respuesta = cola.ejecutar('booleana', {'expresion': EXPRESION}, 30)
+    assert respuesta['variables'] == ['A', 'B', 'C']
+    assert cola.estadisticas()['activos'] == 0
+
+
+def test_ejecutar_cuenta_como_pendiente(cola):
+    cola.max_pendientes = 0
+    with pytest.raises(ColaLlena):
+        cola.ejecutar('booleana', {'expresion': EXPRESION}, 30)
+    assert cola.estadisticas()['activos'] == 0
+
+
+def test_ejecutar_libera_el_lugar_al_agotar_el_tiempo(cola):
+    # El proceso todavía está arrancando: el cálculo no llega a tiempo
+    with pytest.raises(TiempoAgotado):
+        cola.ejecutar('booleana', {'expresion': EXPRESION}, 0.001)
+    limite = time.monotonic() + 30
+    while cola.estadisticas()['activos'] and time.monotonic() < limite:
+        time.sleep(0.05)
+    assert cola.estadisticas()['activos'] == 0
+    assert len(cola._cancelados) == 0
+
+
+def test_ejecutar_devuelve_los_errores_de_los_motores(cola):
+    datos = {'problema': 'general', 'categorias': ['A', 'B'], 'total': 10}
+    with pytest.raises(ValueError, match="Faltan"):
+        cola.ejecutar('conjuntos', datos, 30)
+    assert cola.ejecutar('binaria', {'numero': '10', 'bases': [2]}, 30)['resultados'] == {'2': '1010'}
+
+
+def _sin_fin(datos):
+    # Un motor que nunca reporta progreso
+    while True:
+        pass
+
+
+def _esperar(condicion, segundos=10):
+    limite = time.monotonic() + segundos
+    while not condicion() and time.monotonic() < limite:
+        time.sleep(0.05)
+    return condicion()
+
+
+@pytest.fixture
+def cola_sin_fin(monkeypatch):
+    if multiprocessing.get_start_method() != 'fork':
+        pytest.skip("los procesos de trabajo tienen que heredar el tipo de prueba")
+    monkeypatch.setitem(trabajos.TIPOS, 'sin_fin', (_sin_fin, False))
+    cola = ColaTrabajos(procesos=1, max_pendientes=4, tiempo_maximo=0.5)
+    yield cola
+    cola.cerrar()
+
+
+def test_cancelar_detiene_motores_sin_progreso(cola_sin_fin):
+    id_trabajo = cola_sin_fin.enviar('sin_fin', {})
+    assert _esperar(lambda: cola_sin_fin.consultar(id_trabajo)['estado'] == 'ejecutando')
+    cola_sin_fin.cancelar(id_trabajo)
+    assert _esperar(lambda: cola_sin_fin.estadisticas()['activos'] == 0, 3)
+    assert cola_sin_fin.consultar(id_trabajo)['estado'] == 'cancelado'
+    # El proceso sigue vivo y atiende el siguiente trabajo
+    assert cola_sin_fin.ejecutar('binaria', {'numero': '5', 'bases': [2]}, 10)['resultados'] == {'2': '101'}
+
+
+def test_tiempo_maximo_detiene_el_trabajo(cola_sin_fin):
+    id_trabajo = cola_sin_fin.enviar('sin_fin', {})
+    assert _esperar(lambda: cola_sin_fin.estadisticas()['activos'] == 0, 5)
+    assert cola_sin_fin.consultar(id_trabajo)['estado'] == 'tiempo_agotado'
+
+
+def test_ejecutar_detiene_el_calculo_al_agotar_el_tiempo(cola_sin_fin):
+    with pytest.raises(TiempoAgotado):
+        cola_sin_fin.ejecutar('sin_fin', {}, 0.5)
+    assert _esperar(lambda: cola_sin_fin.estadisticas()['activos'] == 0, 3)
+
+
+def _matar_proceso(datos):
+    os._exit(1)
+
+
+def test_proceso_muerto_libera_el_lugar_y_repone_el_grupo(cola_sin_fin, monkeypatch):
+    monkeypatch.setitem(trabajos.TIPOS, 'matar', (_matar_proceso, False))
+    id_trabajo = cola_sin_fin.enviar('matar', {})
+    assert _esperar(lambda: cola_sin_fin.consultar(id_trabajo)['estado'] == 'error')
+    assert cola_sin_fin.estadisticas()['activos'] == 0
+    with pytest.raises(trabajos.ColaNoDisponible):
+        cola_sin_fin.ejecutar('matar', {}, 10)
+    assert cola_sin_fin.estadisticas()['activos'] == 0
+    assert cola_sin_fin.ejecutar('binaria', {'numero': '5', 'bases': [2]}, 10)['resultados'] == {'2': '101'}
+
+
+def test_enviar_a_un_grupo_roto(cola_sin_fin):
+    roto = cola_sin_fin.ejecutor
+    roto._broken = "prueba"
+    with pytest.raises(trabajos.ColaNoDisponible):
+        cola_sin_fin.enviar('binaria', {'numero': '5'})
+    estadisticas = cola_sin_fin.estadisticas()
+    assert estadisticas['activos'] == 0 and estadisticas['estados'] == {}
+    assert cola_sin_fin.ejecutor is not roto
+    id_trabajo = cola_sin_fin.enviar('binaria', {'numero': '5', 'bases': [2]})
+    assert _esperar(lambda: cola_sin_fin.consultar(id_trabajo)['estado'] == 'terminado')